@@ -49,9 +49,14 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "axes.middleware.AxesMiddleware",
+    # Async-capable wrapper around axes.middleware.AxesMiddleware
+    "bestellungen.middleware.AxesLockoutMiddleware",
+    "bestellungen.middleware.ReplicaStickinessMiddleware",
 ]
 
+# axes only looks for its own middleware by name (axes.W002)
+SILENCED_SYSTEM_CHECKS = ["axes.W002"]
+
 ROOT_URLCONF = "baecker.urls"
 
 TEMPLATES = [
@@ -83,6 +88,45 @@ else:
         }
     }
 
+# Optional read replica for read-only views, reports and exports. Locally,
+# pointing it at the primary (same URL) works as a stand-in.
+if env("REPLICA_DATABASE_URL", default=""):
+    DATABASES["replica"] = env.db("REPLICA_DATABASE_URL")
+    # Tests read the replica alias from the primary test database
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+DATABASE_ROUTERS = ["bestellungen.db_router.ReplicaRouter"]
+# Seconds a user's reads stay on the primary after one of their writes
+REPLICA_STICKY_SECONDS = env.int("REPLICA_STICKY_SECONDS", default=15)
+
+# Cache (use a shared backend such as redis://redis:6379/1 with several workers)
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+CATALOG_CACHE_TIMEOUT = env.int("CATALOG_CACHE_TIMEOUT", default=60 * 15)
+TOKEN_CACHE_TIMEOUT = env.int("TOKEN_CACHE_TIMEOUT", default=60)
+ADMIN_COUNT_CACHE_TIMEOUT = env.int("ADMIN_COUNT_CACHE_TIMEOUT", default=60 * 5)
+
+# Stored responses for Idempotency-Key retries
+IDEMPOTENCY_KEY_TTL_HOURS = env.int("IDEMPOTENCY_KEY_TTL_HOURS", default=24)
+
+# Catalog delta feed: the returned cursor lags this many seconds behind
+# the response so rows committed late are sent again (clients dedupe by id),
+# and purge_product_tombstones keeps deletions for this many days
+CATALOG_CHANGES_OVERLAP_SECONDS = env.int("CATALOG_CHANGES_OVERLAP_SECONDS", default=60)
+PRODUCT_TOMBSTONE_RETENTION_DAYS = env.int(
+    "PRODUCT_TOMBSTONE_RETENTION_DAYS", default=30
+)
+
+# Maximum number of sub-requests per POST /api/v1/batch/
+BATCH_MAX_REQUESTS = env.int("BATCH_MAX_REQUESTS", default=25)
+
+# Draft orders (carts): create an empty cart right after checkout, and the
+# age in days after which purge_drafts deletes empty and abandoned carts
+CREATE_CART_AFTER_CHECKOUT = env.bool("CREATE_CART_AFTER_CHECKOUT", default=True)
+DRAFT_EMPTY_RETENTION_DAYS = env.int("DRAFT_EMPTY_RETENTION_DAYS", default=1)
+DRAFT_STALE_RETENTION_DAYS = env.int("DRAFT_STALE_RETENTION_DAYS", default=30)
+
+# Exported and cancelled orders older than this move to the order archive
+ORDER_ARCHIVE_AFTER_MONTHS = env.int("ORDER_ARCHIVE_AFTER_MONTHS", default=24)
+
 # Custom User Model
 AUTH_USER_MODEL = "bestellungen.CustomUser"
 
@@ -126,7 +170,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "bestellungen.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -134,6 +178,18 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 50,
+    "DEFAULT_THROTTLE_CLASSES": [
+        "bestellungen.throttling.CustomerRateThrottle",
+    ],
+    # Views opt in via throttle_scope; "<scope>_b2b" applies to B2B customers
+    "DEFAULT_THROTTLE_RATES": {
+        "auth": env("THROTTLE_RATE_AUTH", default="20/min"),
+        "catalog": env("THROTTLE_RATE_CATALOG", default="120/min"),
+        "catalog_b2b": env("THROTTLE_RATE_CATALOG_B2B", default="600/min"),
+        "order_writes": env("THROTTLE_RATE_ORDER_WRITES", default="30/min"),
+        "order_writes_b2b": env("THROTTLE_RATE_ORDER_WRITES_B2B", default="300/min"),
+        "export": env("THROTTLE_RATE_EXPORT", default="10/min"),
+    },
 }
 
 # CORS Settings
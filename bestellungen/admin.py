@@ -2,10 +2,34 @@
 Admin configuration for bestellungen app.
 """
 
-from django.contrib import admin
-from django.contrib.auth.admin import UserAdmin
+import io
 
-from .models import CustomUser, ExportLog, Order, OrderChangeRequest, OrderItem, Product
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin
+from django.core.cache import cache
+from django.db.models import Count
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .forms import ProductImportForm
+from .importers import ProductImporter
+from .models import (
+    ArchivedOrder,
+    CustomUser,
+    DailySales,
+    ExportLog,
+    Order,
+    OrderChangeRequest,
+    OrderEvent,
+    OrderItem,
+    Product,
+    ProductionCapacity,
+    ProductPriceHistory,
+)
+from .pagination import EstimatedCountPaginator
+from .services import bulk_transition, recalculate_totals
 
 
 @admin.register(CustomUser)
@@ -86,6 +110,7 @@ class ProductAdmin(admin.ModelAdmin):
     ]
 
     readonly_fields = ["created_at", "updated_at"]
+    change_list_template = "admin/bestellungen/product/change_list.html"
 
     def price_euro(self, obj):
         """Display price in Euro."""
@@ -93,24 +118,182 @@ class ProductAdmin(admin.ModelAdmin):
 
     price_euro.short_description = "Preis"
 
+    def get_urls(self):
+        """Add the CSV import view to the product admin."""
+        urls = [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="bestellungen_product_import",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """Upload a CSV file and bulk import products."""
+        if not self.has_change_permission(request) or not self.has_add_permission(
+            request
+        ):
+            return redirect("admin:bestellungen_product_changelist")
+
+        if request.method == "POST":
+            form = ProductImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                upload = form.cleaned_data["csv_file"]
+                importer = ProductImporter(
+                    source=f"admin:{upload.name}",
+                    dry_run=form.cleaned_data["dry_run"],
+                    delimiter=form.cleaned_data["delimiter"],
+                )
+                result = importer.run(
+                    io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+                )
+
+                for error in result.errors[:20]:
+                    self.message_user(request, error, level=messages.ERROR)
+
+                prefix = "Testlauf: " if importer.dry_run else ""
+                self.message_user(
+                    request,
+                    f"{prefix}{result.inserted} neu, {result.updated} aktualisiert, "
+                    f"{result.unchanged} unverändert, {len(result.errors)} Fehler.",
+                    level=messages.WARNING if result.errors else messages.SUCCESS,
+                )
+                return redirect("admin:bestellungen_product_changelist")
+        else:
+            form = ProductImportForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Produkte importieren",
+            "form": form,
+        }
+        return TemplateResponse(
+            request, "admin/bestellungen/product/import_form.html", context
+        )
+
+
+@admin.register(ProductPriceHistory)
+class ProductPriceHistoryAdmin(admin.ModelAdmin):
+    """Read-only admin for ProductPriceHistory model."""
+
+    list_display = [
+        "product",
+        "old_price_cents",
+        "new_price_cents",
+        "old_available",
+        "new_available",
+        "source",
+        "changed_at",
+    ]
+    list_filter = ["changed_at", "source"]
+    list_select_related = ["product"]
+    search_fields = ["product__sku", "product__name"]
+    date_hierarchy = "changed_at"
+
+    def has_add_permission(self, request):
+        """History rows are written by imports only."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """History rows are immutable."""
+        return False
+
+
+@admin.register(ProductionCapacity)
+class ProductionCapacityAdmin(admin.ModelAdmin):
+    """Admin for ProductionCapacity model."""
+
+    list_display = ["product", "delivery_date", "capacity", "reserved", "remaining"]
+    list_editable = ["capacity"]
+    list_filter = ["delivery_date"]
+    list_select_related = ["product"]
+    search_fields = ["product__sku", "product__name"]
+    date_hierarchy = "delivery_date"
+    ordering = ["delivery_date", "product__name"]
+    autocomplete_fields = ["product"]
+
+    readonly_fields = ["reserved"]
+
+    def remaining(self, obj):
+        """Display remaining capacity."""
+        return obj.remaining
+
+    remaining.short_description = "Verfügbar"
+
 
 class OrderItemInline(admin.TabularInline):
     """Inline admin for OrderItem."""
 
     model = OrderItem
     extra = 0
-    readonly_fields = ["subtotal_euro"]
+    readonly_fields = ["sku", "product_name", "subtotal_euro"]
 
     def subtotal_euro(self, obj):
-        """Display subtotal in Euro."""
+        """Display subtotal in Euro (nothing for the empty "add" row)."""
+        if obj.pk is None:
+            return "-"
         return f"{obj.subtotal_euro:.2f}€"
 
     subtotal_euro.short_description = "Zwischensumme"
 
 
+class OrderEventInline(admin.TabularInline):
+    """Read-only inline for the status history of an order."""
+
+    model = OrderEvent
+    extra = 0
+    fields = ["created_at", "from_status", "to_status", "source", "actor", "note"]
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        """Events are written by status transitions only."""
+        return False
+
+
+ORDER_STATUS_COUNTS_KEY = "admin:order_status_counts"
+
+
+def order_status_counts():
+    """Return ``{status: number of orders}``, cached for the admin sidebar."""
+    return cache.get_or_set(
+        ORDER_STATUS_COUNTS_KEY,
+        lambda: dict(
+            Order.objects.order_by().values_list("status").annotate(count=Count("pk"))
+        ),
+        settings.ADMIN_COUNT_CACHE_TIMEOUT,
+    )
+
+
+class OrderStatusFilter(admin.SimpleListFilter):
+    """Status filter that shows the (cached) number of orders per status."""
+
+    title = "Status"
+    parameter_name = "status"
+
+    def lookups(self, request, model_admin):
+        counts = order_status_counts()
+        return [
+            (value, f"{label} ({counts.get(value, 0)})")
+            for value, label in Order.STATUS_CHOICES
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(status=self.value())
+        return queryset
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    """Admin for Order model."""
+    """Admin for Order model.
+
+    Built for large order tables: the customer is joined instead of loaded
+    per row, unfiltered pages use an estimated count, order numbers are
+    looked up by primary key and status counts come from the cache.
+    """
 
     list_display = [
         "id",
@@ -121,10 +304,16 @@ class OrderAdmin(admin.ModelAdmin):
         "placed_at",
         "exported_at",
     ]
-    list_filter = ["status", "delivery_type", "placed_at", "exported_at"]
-    search_fields = ["id", "user__email", "user__first_name", "user__last_name"]
-    ordering = ["-created_at"]
-    inlines = [OrderItemInline]
+    list_select_related = ["user"]
+    list_filter = [OrderStatusFilter, "delivery_type", "exported_at"]
+    date_hierarchy = "placed_at"
+    search_fields = ["user__email", "user__first_name", "user__last_name"]
+    search_help_text = "Bestellnummer oder Kunde (E-Mail, Name)"
+    # The newest orders via the primary key index; created_at has none
+    ordering = ["-id"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    inlines = [OrderItemInline, OrderEventInline]
 
     fieldsets = [
         (
@@ -147,12 +336,40 @@ class OrderAdmin(admin.ModelAdmin):
         ),
         (
             "Zeitstempel",
-            {"fields": ("placed_at", "exported_at", "created_at", "updated_at")},
+            {
+                "fields": (
+                    "placed_at",
+                    "delivery_date",
+                    "exported_at",
+                    "created_at",
+                    "updated_at",
+                )
+            },
         ),
         ("Export", {"fields": ("external_export_id",), "classes": ("collapse",)}),
     ]
 
-    readonly_fields = ["created_at", "updated_at", "total_cents", "delivery_fee_cents"]
+    # Status changes go through the actions (bulk_transition), which record
+    # events, update the sales rollup and release capacity
+    readonly_fields = [
+        "status",
+        "created_at",
+        "updated_at",
+        "total_cents",
+        "delivery_fee_cents",
+    ]
+
+    def get_search_results(self, request, queryset, search_term):
+        """Look up order numbers (``123`` or ``#123``) by primary key."""
+        term = search_term.strip().lstrip("#")
+        if term.isdigit():
+            return queryset.filter(pk=int(term)), False
+        return super().get_search_results(request, queryset, search_term)
+
+    def save_related(self, request, form, formsets, change):
+        """Update totals and item count after the items were saved."""
+        super().save_related(request, form, formsets, change)
+        form.instance.calculate_total()
 
     def total_euro(self, obj):
         """Display total in Euro."""
@@ -166,18 +383,48 @@ class OrderAdmin(admin.ModelAdmin):
 
     grand_total_euro.short_description = "Gesamt inkl. Lieferung"
 
-    actions = ["recalculate_totals"]
+    actions = ["recalculate_totals", "cancel_orders", "unexport_orders"]
 
     def recalculate_totals(self, request, queryset):
-        """Admin action to recalculate order totals."""
-        for order in queryset:
-            order.calculate_total()
+        """Admin action to recalculate order totals with one UPDATE per chunk."""
+        corrected = recalculate_totals(queryset)
         self.message_user(
-            request, f"{queryset.count()} Bestellungen wurden neuberechnet."
+            request,
+            f"{queryset.count()} Bestellungen geprüft, {corrected} korrigiert.",
         )
 
     recalculate_totals.short_description = "Gesamt neu berechnen"
 
+    def cancel_orders(self, request, queryset):
+        """Admin action to cancel orders in bulk."""
+        ids = bulk_transition(
+            queryset,
+            ["DRAFT", "PLACED", "EXPORTED"],
+            "CANCELLED",
+            actor=request.user,
+            source="ADMIN",
+        )
+        self.message_user(request, f"{len(ids)} Bestellungen wurden storniert.")
+
+    cancel_orders.short_description = "Bestellungen stornieren"
+
+    def unexport_orders(self, request, queryset):
+        """Admin action to reset exported orders so they are exported again."""
+        ids = bulk_transition(
+            queryset,
+            ["EXPORTED"],
+            "PLACED",
+            actor=request.user,
+            source="ADMIN",
+            exported_at=None,
+            external_export_id=None,
+        )
+        self.message_user(
+            request, f"{len(ids)} Bestellungen wurden auf 'Bestellt' zurückgesetzt."
+        )
+
+    unexport_orders.short_description = "Export zurücksetzen"
+
 
 @admin.register(OrderChangeRequest)
 class OrderChangeRequestAdmin(admin.ModelAdmin):
@@ -197,6 +444,84 @@ class OrderChangeRequestAdmin(admin.ModelAdmin):
     readonly_fields = ["created_at", "updated_at"]
 
 
+@admin.register(OrderEvent)
+class OrderEventAdmin(admin.ModelAdmin):
+    """Read-only admin for OrderEvent model."""
+
+    list_display = [
+        "order",
+        "from_status",
+        "to_status",
+        "source",
+        "actor",
+        "created_at",
+    ]
+    list_filter = ["to_status", "source", "created_at"]
+    list_select_related = ["order", "actor"]
+    search_fields = ["order__id", "note", "actor__email"]
+    date_hierarchy = "created_at"
+    raw_id_fields = ["order", "actor"]
+
+    def has_add_permission(self, request):
+        """Events are written by status transitions only."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Events are append-only."""
+        return False
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    """Read-only admin for ArchivedOrder model."""
+
+    list_display = ["id", "user", "status", "placed_at", "grand_total_euro"]
+    list_filter = ["status", "delivery_type"]
+    list_select_related = ["user"]
+    search_fields = ["=id", "user__email"]
+    date_hierarchy = "placed_at"
+    ordering = ["-placed_at", "-id"]
+
+    def grand_total_euro(self, obj):
+        """Display grand total with delivery in Euro."""
+        return f"{obj.grand_total_euro:.2f}€"
+
+    grand_total_euro.short_description = "Gesamt inkl. Lieferung"
+
+    def has_add_permission(self, request):
+        """Archived orders are written by archive_orders only."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Archived orders are immutable."""
+        return False
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    """Read-only admin for the DailySales rollup."""
+
+    list_display = ["date", "customer", "sku", "quantity", "revenue_euro"]
+    list_select_related = ["customer"]
+    search_fields = ["=sku", "customer__email"]
+    date_hierarchy = "date"
+    ordering = ["-date", "customer", "sku"]
+
+    def revenue_euro(self, obj):
+        """Display revenue in Euro."""
+        return f"{obj.revenue_euro:.2f}€"
+
+    revenue_euro.short_description = "Umsatz"
+
+    def has_add_permission(self, request):
+        """Rollup rows are written by transitions and rebuild_rollups only."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Rollup rows are derived data."""
+        return False
+
+
 @admin.register(ExportLog)
 class ExportLogAdmin(admin.ModelAdmin):
     """Admin for ExportLog model."""
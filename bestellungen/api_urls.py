@@ -5,12 +5,23 @@ API URL configuration for bestellungen app.
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .api_views import AuthViewSet, ExportViewSet, OrderViewSet, ProductViewSet
+from .api_views import (
+    AdminOrderViewSet,
+    AuthViewSet,
+    BatchViewSet,
+    ExportViewSet,
+    MetricsViewSet,
+    OrderViewSet,
+    ProductViewSet,
+    ReportViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"products", ProductViewSet, basename="product")
 router.register(r"orders", OrderViewSet, basename="order")
+router.register(r"admin/orders", AdminOrderViewSet, basename="admin-order")
 router.register(r"admin/export", ExportViewSet, basename="export")
+router.register(r"admin/reports", ReportViewSet, basename="report")
 
 # Auth endpoints are registered manually since they don't follow standard REST patterns
 auth_patterns = [
@@ -34,5 +45,11 @@ auth_patterns = [
 ]
 
 urlpatterns = auth_patterns + [
+    path("batch/", BatchViewSet.as_view({"post": "run"}), name="batch"),
+    path(
+        "admin/metrics/",
+        MetricsViewSet.as_view({"get": "retrieve"}),
+        name="admin-metrics",
+    ),
     path("", include(router.urls)),
 ]
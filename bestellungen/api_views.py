@@ -2,16 +2,45 @@
 API views for the bestellungen app.
 """
 
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.conf import settings
 from django.contrib.auth import login, logout
+from django.core.cache import cache
 from django.core.management import call_command
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.db import transaction
+from django.db.models import DateField, Prefetch, Sum
+from django.db.models.functions import Trunc
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import permissions, status, viewsets
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
-from .models import CustomUser, ExportLog, Order, Product
+from . import batch
+from .authentication import CachedTokenAuthentication
+from .cache import catalog_cache_key
+from .db_router import ReplicaReadMixin, read_replica
+from .fast_serializers import order_columns, serialize_orders
+from .idempotency import idempotent
+from .models import (
+    CustomUser,
+    DailySales,
+    ExportLog,
+    Order,
+    OrderItem,
+    Product,
+    ProductionCapacity,
+    ProductTombstone,
+    StaleOrderError,
+)
+from .pagination import ExportLogCursorPagination, OrderCursorPagination
+from .renderers import FastJSONRenderer
 from .serializers import (
     ExportLogSerializer,
     LoginSerializer,
@@ -20,6 +49,7 @@ from .serializers import (
     ProductSerializer,
     UserRegistrationSerializer,
     UserSerializer,
+    selected_fields,
 )
 
 
@@ -30,10 +60,27 @@ class IsAdminUser(permissions.BasePermission):
         return request.user and request.user.is_staff
 
 
+def parse_day_range(request):
+    """Return the dates of the ``from`` and ``to`` query parameters."""
+    days = []
+    for name in ("from", "to"):
+        try:
+            value = parse_date(request.query_params.get(name, ""))
+        except ValueError:
+            value = None
+        if value is None:
+            raise ValidationError({name: "Datum erforderlich (erwartet: JJJJ-MM-TT)."})
+        days.append(value)
+    if days[0] > days[1]:
+        raise ValidationError({"to": "'to' darf nicht vor 'from' liegen."})
+    return days
+
+
 class AuthViewSet(viewsets.GenericViewSet):
     """ViewSet for authentication operations."""
 
     permission_classes = [permissions.AllowAny]
+    throttle_scope = "auth"
 
     @action(detail=False, methods=["post"])
     def register(self, request):
@@ -113,13 +160,33 @@ class AuthViewSet(viewsets.GenericViewSet):
         )
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Product operations."""
 
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = "catalog"
     lookup_field = "sku"
+    # Not list: it refills the catalog cache right after invalidations, when
+    # a lagging replica would cache the old catalog. Not changes: its cursor
+    # is the primary's clock, so rows missing on the replica would be skipped.
+    replica_actions = ("retrieve",)
+
+    # Model columns needed per serialized field (for ?fields=)
+    field_columns = {
+        "id": ["id"],
+        "sku": ["sku"],
+        "name": ["name"],
+        "description": ["description"],
+        "price_cents": ["price_cents"],
+        "price_euro": ["price_cents"],
+        "available": ["available"],
+        "max_per_order": ["max_per_order"],
+        "remaining_capacity": [],
+        "created_at": ["created_at"],
+        "updated_at": ["updated_at"],
+    }
 
     def get_queryset(self):
         """Filter available products by default."""
@@ -129,25 +196,204 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         if available.lower() == "true":
             queryset = queryset.filter(available=True)
 
-        return queryset
+        fields = selected_fields(self.request, ProductSerializer.Meta.fields)
+        if fields is not None:
+            queryset = queryset.only(
+                *{column for name in fields for column in self.field_columns[name]}
+            )
+            if "remaining_capacity" not in fields:
+                return queryset
+
+        # list() adds remaining capacity per request, outside the cache
+        if self.action == "list":
+            return queryset
+
+        return queryset.annotate(
+            remaining_capacity=ProductionCapacity.remaining_subquery(
+                self.get_delivery_date()
+            )
+        )
+
+    def get_delivery_date(self):
+        """Return the delivery day used for remaining capacity (?delivery_date=)."""
+        value = self.request.query_params.get("delivery_date")
+        if not value:
+            return Order.next_delivery_date()
+
+        try:
+            delivery_date = parse_date(value)
+        except ValueError:
+            delivery_date = None
+        if delivery_date is None:
+            raise ValidationError(
+                {"delivery_date": "Ungültiges Datum (erwartet: JJJJ-MM-TT)."}
+            )
+        return delivery_date
 
-    @method_decorator(cache_page(60 * 15))  # Cache for 15 minutes
     def list(self, request, *args, **kwargs):
-        """List products with caching."""
-        return super().list(request, *args, **kwargs)
+        """List products with caching (invalidated on catalog changes).
+
+        Remaining capacity changes with every order and with the delivery
+        day, so the cached page leaves it out and it is added per request
+        with one query.
+        """
+        delivery_date = self.get_delivery_date()
+        cache_key = catalog_cache_key(request.get_full_path())
+        cached = cache.get(cache_key)
+        if cached is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+            products = list(queryset) if page is None else page
+            data = self.get_serializer(products, many=True).data
+            if page is not None:
+                data = self.get_paginated_response(data).data
+            cached = {"data": data, "ids": [product.pk for product in products]}
+            cache.set(cache_key, cached, settings.CATALOG_CACHE_TIMEOUT)
+
+        data = cached["data"]
+        fields = selected_fields(request, ProductSerializer.Meta.fields)
+        if fields is None or "remaining_capacity" in fields:
+            remaining = ProductionCapacity.remaining_for(delivery_date, cached["ids"])
+            rows = data["results"] if isinstance(data, dict) else data
+            for row, product_id in zip(rows, cached["ids"]):
+                row["remaining_capacity"] = remaining.get(product_id)
+        return Response(data)
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """Return products changed or deleted since the ``since`` cursor.
+
+        Without ``since`` the full list of available products is returned.
+        Clients store the returned ``cursor`` and send it as ``since`` on
+        the next sync; they should apply ``deleted`` before ``products``.
+
+        The cursor lags ``CATALOG_CHANGES_OVERLAP_SECONDS`` behind the
+        response: a row written by a transaction that commits after this
+        response carries an earlier ``updated_at`` and would otherwise be
+        skipped. Rows in the overlap are sent again, so clients upsert by id.
+        """
+        now = timezone.now()
+        cursor = now - timedelta(seconds=settings.CATALOG_CHANGES_OVERLAP_SECONDS)
+        since = request.query_params.get("since")
+
+        products = Product.objects.annotate(
+            remaining_capacity=ProductionCapacity.remaining_subquery(
+                self.get_delivery_date()
+            )
+        ).filter(updated_at__lte=now)
+        deleted = ProductTombstone.objects.none()
+
+        if since:
+            try:
+                since_dt = parse_datetime(since)
+            except ValueError:
+                since_dt = None
+            if since_dt is None:
+                raise ValidationError(
+                    {"since": "Ungültiger Cursor (erwartet: ISO-8601-Zeitstempel)."}
+                )
+            if timezone.is_naive(since_dt):
+                since_dt = timezone.make_aware(since_dt)
+            if since_dt < ProductTombstone.expiry_cutoff():
+                raise ValidationError(
+                    {
+                        "since": "Cursor abgelaufen, bitte ohne since "
+                        "vollständig synchronisieren."
+                    }
+                )
 
+            products = products.filter(updated_at__gt=since_dt).order_by(
+                "updated_at", "id"
+            )
+            deleted = ProductTombstone.objects.filter(
+                deleted_at__gt=since_dt, deleted_at__lte=now
+            )
+        else:
+            products = products.filter(available=True)
 
-class OrderViewSet(viewsets.ModelViewSet):
+        return Response(
+            {
+                "cursor": cursor.isoformat().replace("+00:00", "Z"),
+                "products": ProductSerializer(products, many=True).data,
+                "deleted": [
+                    {"id": t.product_id, "sku": t.sku}
+                    for t in deleted.only("product_id", "sku")
+                ],
+            }
+        )
+
+
+class OrderViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """ViewSet for Order operations."""
 
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OrderCursorPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    # Model columns needed per serialized field (for ?fields=)
+    field_columns = {
+        "id": ["id"],
+        "user": ["user_id"],
+        "user_email": ["user__email"],
+        "status": ["status"],
+        "total_cents": ["total_cents"],
+        "total_euro": ["total_cents"],
+        "item_count": ["item_count"],
+        "placed_at": ["placed_at"],
+        "exported_at": ["exported_at"],
+        "created_at": ["created_at"],
+        "updated_at": ["updated_at"],
+        "version": ["version"],
+        "items": [],
+    }
+    item_read_columns = [
+        "id",
+        "order_id",
+        "product_id",
+        "product_name",
+        "sku",
+        "quantity",
+        "unit_price_cents",
+    ]
+
+    @property
+    def throttle_scope(self):
+        """Throttle order writes only; reads are cheap and per-user anyway."""
+        if self.request.method in permissions.SAFE_METHODS:
+            return None
+        return "order_writes"
 
     def get_queryset(self):
-        """Return orders for the current user only."""
-        return Order.objects.filter(user=self.request.user).prefetch_related(
-            "items__product"
+        """Return orders for the current user only.
+
+        List and detail reads run with a fixed number of queries and load
+        only the columns of the serialized fields: the user is joined only
+        for ``user_email`` and items are prefetched (in one query, with their
+        product snapshot columns) only when they are part of the response.
+        """
+        queryset = Order.objects.filter(user=self.request.user)
+
+        if self.action not in ("list", "retrieve"):
+            return queryset
+
+        fields = selected_fields(
+            self.request, OrderSerializer.Meta.fields, OrderSerializer.expandable_fields
         )
+        if fields is None:
+            fields = set(self.field_columns)
+
+        # created_at is read by the cursor paginator
+        columns = {"created_at"}
+        columns.update(column for name in fields for column in self.field_columns[name])
+
+        if "user_email" in fields:
+            queryset = queryset.select_related("user")
+        if "items" in fields:
+            items = OrderItem.objects.only(*self.item_read_columns).order_by("id")
+            queryset = queryset.prefetch_related(Prefetch("items", queryset=items))
+
+        return queryset.only(*columns)
 
     def get_serializer_class(self):
         """Use different serializer for creation."""
@@ -155,42 +401,131 @@ class OrderViewSet(viewsets.ModelViewSet):
             return OrderCreateSerializer
         return OrderSerializer
 
+    def list(self, request, *args, **kwargs):
+        """List orders from values() rows instead of model serializers.
+
+        Produces the same output as OrderSerializer (see fast_serializers)
+        with one query for the page of orders and one for their items.
+        """
+        fields = selected_fields(
+            request, OrderSerializer.Meta.fields, OrderSerializer.expandable_fields
+        )
+        queryset = self.filter_queryset(Order.objects.filter(user=request.user))
+        page = self.paginate_queryset(queryset.values(*order_columns(fields)))
+        return self.get_paginated_response(serialize_orders(page, fields))
+
+    def get_expected_version(self, order):
+        """Return the ``version`` sent by the client, or the loaded one."""
+        version = self.request.data.get("version", order.version)
+        try:
+            return int(version)
+        except (TypeError, ValueError):
+            raise ValidationError({"version": "Ganzzahl erwartet."})
+
+    @idempotent
     def create(self, request, *args, **kwargs):
-        """Create a new order."""
+        """Add items to the user's draft order (created if needed)."""
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            order = serializer.save()
+            try:
+                order = serializer.save()
+            except StaleOrderError as e:
+                return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
             return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=["post"])
+    @idempotent
     def place(self, request, pk=None):
         """Place an order (change status from DRAFT to PLACED)."""
         order = self.get_object()
 
         try:
+            order.version = self.get_expected_version(order)
             order.place_order()
             return Response(OrderSerializer(order).data)
+        except StaleOrderError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=["post"])
+    @idempotent
     def cancel(self, request, pk=None):
         """Cancel an order."""
         order = self.get_object()
 
         try:
+            order.version = self.get_expected_version(order)
             order.cancel_order()
             return Response(OrderSerializer(order).data)
+        except StaleOrderError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ExportViewSet(viewsets.GenericViewSet):
+class AdminOrderViewSet(viewsets.GenericViewSet):
+    """ViewSet for bulk order access by staff and the ERP integration."""
+
+    permission_classes = [IsAdminUser]
+    throttle_scope = "export"
+    stream_chunk_size = 500
+
+    @action(detail=False, methods=["get"])
+    def stream(self, request):
+        """Stream all orders placed between ``from`` and ``to`` as JSON Lines.
+
+        Orders are read through a server-side cursor in chunks, and the items
+        of each chunk are fetched with one query, so memory use stays
+        constant regardless of the range.
+        """
+        start, end = parse_day_range(request)
+
+        queryset = (
+            Order.objects.filter(
+                placed_at__gte=timezone.make_aware(datetime.combine(start, time.min)),
+                placed_at__lt=timezone.make_aware(
+                    datetime.combine(end + timedelta(days=1), time.min)
+                ),
+            )
+            .order_by("id")
+            .values(*order_columns())
+        )
+
+        response = StreamingHttpResponse(
+            self._stream_lines(queryset), content_type="application/x-ndjson"
+        )
+        # Let nginx pass chunks through instead of buffering the response
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def _stream_lines(self, queryset):
+        """Yield one JSON line per order, joining items per chunk.
+
+        The response is consumed after the view returned, so the replica is
+        selected here rather than around the view.
+        """
+        renderer = FastJSONRenderer()
+        with read_replica():
+            rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+            while True:
+                chunk = list(islice(rows, self.stream_chunk_size))
+                if not chunk:
+                    break
+                yield b"".join(
+                    renderer.render(order) + b"\n" for order in serialize_orders(chunk)
+                )
+
+
+class ExportViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     """ViewSet for export operations (admin only)."""
 
     permission_classes = [IsAdminUser]
+    throttle_scope = "export"
+    replica_actions = ("logs",)
     serializer_class = ExportLogSerializer
+    pagination_class = ExportLogCursorPagination
 
     @action(detail=False, methods=["post"])
     def run(self, request):
@@ -212,7 +547,138 @@ class ExportViewSet(viewsets.GenericViewSet):
 
     @action(detail=False, methods=["get"])
     def logs(self, request):
-        """List export logs."""
-        logs = ExportLog.objects.all()[:50]  # Last 50 logs
-        serializer = ExportLogSerializer(logs, many=True)
-        return Response(serializer.data)
+        """List export logs, newest first, with cursor pagination."""
+        page = self.paginate_queryset(ExportLog.objects.all())
+        serializer = ExportLogSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ReportViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
+    """Sales reports for staff, read only from the DailySales rollup."""
+
+    permission_classes = [IsAdminUser]
+    throttle_scope = "export"
+    replica_actions = ("sales",)
+    dimensions = ("sku", "customer")
+    periods = ("day", "week", "month", "quarter", "year")
+
+    @action(detail=False, methods=["get"])
+    def sales(self, request):
+        """Return sold quantity and revenue for the days ``from`` to ``to``.
+
+        ``group_by`` (``sku``, ``customer`` or both, comma separated) and
+        ``period`` (day, week, month, quarter, year) split the totals;
+        ``customer`` (user id) and ``sku`` filter them.
+        """
+        start, end = parse_day_range(request)
+        params = request.query_params
+
+        queryset = DailySales.objects.filter(date__gte=start, date__lte=end)
+        if params.get("customer"):
+            try:
+                queryset = queryset.filter(customer_id=int(params["customer"]))
+            except ValueError:
+                raise ValidationError({"customer": "Kunden-ID muss eine Zahl sein."})
+        if params.get("sku"):
+            queryset = queryset.filter(sku=params["sku"])
+
+        group_by = [name for name in params.get("group_by", "").split(",") if name]
+        unknown = [name for name in group_by if name not in self.dimensions]
+        if unknown:
+            raise ValidationError(
+                {"group_by": f"Unbekannte Gruppierung: {', '.join(unknown)}."}
+            )
+
+        period = params.get("period")
+        periods = {}
+        if period:
+            if period not in self.periods:
+                raise ValidationError(
+                    {"period": f"Erlaubt: {', '.join(self.periods)}."}
+                )
+            periods["period"] = Trunc("date", period, output_field=DateField())
+
+        totals = {"sold": Sum("quantity"), "revenue": Sum("revenue_cents")}
+        if group_by or periods:
+            columns = [*periods, *group_by]
+            rows = (
+                queryset.values(*group_by, **periods)
+                .annotate(**totals)
+                .order_by(*columns)
+            )
+        else:
+            columns = []
+            rows = [queryset.aggregate(**totals)]
+
+        results = [
+            {
+                **{name: row[name] for name in columns},
+                "quantity": row["sold"] or 0,
+                "revenue_cents": row["revenue"] or 0,
+            }
+            for row in rows
+        ]
+        return Response(
+            {
+                "from": start,
+                "to": end,
+                "group_by": group_by,
+                "period": period,
+                "results": results,
+            }
+        )
+
+
+class MetricsViewSet(viewsets.GenericViewSet):
+    """Runtime metrics of the serving worker process (admin only)."""
+
+    permission_classes = [IsAdminUser]
+
+    def retrieve(self, request):
+        """Return the token cache hit rate.
+
+        The counters are kept per process, so consecutive calls may be
+        answered by different workers.
+        """
+        return Response({"token_cache": CachedTokenAuthentication.stats()})
+
+
+class BatchViewSet(viewsets.GenericViewSet):
+    """Execute several API requests in one round trip."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def run(self, request):
+        """Run ``requests`` in order and return all responses.
+
+        With ``"atomic": true`` all sub-requests share one transaction: the
+        first response with status >= 400 stops the batch and rolls back
+        everything before it.
+        """
+        entries = request.data.get("requests")
+        if not isinstance(entries, list) or not entries:
+            raise ValidationError({"requests": "Liste von Requests erwartet."})
+        if len(entries) > settings.BATCH_MAX_REQUESTS:
+            raise ValidationError(
+                {
+                    "requests": f"Höchstens {settings.BATCH_MAX_REQUESTS} "
+                    "Requests pro Batch."
+                }
+            )
+
+        if not request.data.get("atomic"):
+            responses = [batch.execute(request, entry) for entry in entries]
+            return Response({"committed": True, "responses": responses})
+
+        responses = []
+        with transaction.atomic():
+            for entry in entries:
+                result = batch.execute(request, entry)
+                responses.append(result)
+                if result["status"] >= 400:
+                    transaction.set_rollback(True)
+                    break
+
+        committed = responses[-1]["status"] < 400
+        return Response({"committed": committed, "responses": responses})
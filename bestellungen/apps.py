@@ -5,3 +5,6 @@ class BestellungenConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "bestellungen"
     verbose_name = "Bestellungen"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,77 @@
+"""
+Authentication classes for the REST API.
+"""
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+TOKEN_CACHE_PREFIX = "auth:token:"
+
+
+def token_cache_key(key):
+    """Return the cache key for an API token (the raw token is never stored)."""
+    return TOKEN_CACHE_PREFIX + hashlib.sha256(key.encode()).hexdigest()
+
+
+def evict_token(key):
+    """Remove a token from the authentication cache."""
+    cache.delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that resolves token -> user from the shared cache.
+
+    Entries live for ``TOKEN_CACHE_TIMEOUT`` seconds. Logout and user changes
+    (e.g. deactivation) evict them immediately via signals, so the TTL only
+    bounds how long a missed eviction could go unnoticed.
+
+    Hit and miss counters are kept per process; ``stats()`` is served by
+    ``GET /api/v1/admin/metrics/``.
+    """
+
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            self._count(hit=True)
+            return cached
+
+        self._count(hit=False)
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, (user, token), settings.TOKEN_CACHE_TIMEOUT)
+        return user, token
+
+    @classmethod
+    def _count(cls, hit):
+        with cls._lock:
+            if hit:
+                cls._hits += 1
+            else:
+                cls._misses += 1
+
+    @classmethod
+    def stats(cls):
+        """Return hits, misses and hit rate of this process."""
+        with cls._lock:
+            hits, misses = cls._hits, cls._misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    @classmethod
+    def reset_stats(cls):
+        """Reset the hit and miss counters."""
+        with cls._lock:
+            cls._hits = cls._misses = 0
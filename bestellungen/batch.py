@@ -0,0 +1,129 @@
+"""
+In-process execution of batched API sub-requests.
+
+Each sub-request is turned into a regular Django request and dispatched to
+the view its path resolves to, authenticated as the caller of the batch.
+Middleware does not run for sub-requests; the batch request itself went
+through it already. Sub-requests therefore have no session, so the auth
+endpoints (login, logout, ...) cannot be batched.
+"""
+
+import json
+import logging
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve, reverse
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+
+# Outer request headers that must not leak into sub-requests
+DROPPED_META = {"CONTENT_TYPE", "CONTENT_LENGTH", "HTTP_IDEMPOTENCY_KEY"}
+
+
+class BatchError(ValueError):
+    """Raised for a malformed sub-request."""
+
+
+def api_prefix():
+    """Return the path prefix of the REST API (e.g. ``/api/v1/``)."""
+    return reverse("product-list").rsplit("products/", 1)[0]
+
+
+def parse_sub_request(entry):
+    """Validate one sub-request and return ``(method, path, query, body, headers)``."""
+    if not isinstance(entry, dict):
+        raise BatchError("Jeder Sub-Request muss ein Objekt sein.")
+
+    method = str(entry.get("method", "GET")).upper()
+    if method not in ALLOWED_METHODS:
+        raise BatchError(f"Methode nicht erlaubt: {method}")
+
+    url = entry.get("path")
+    if not isinstance(url, str) or not url:
+        raise BatchError("'path' fehlt.")
+
+    parts = urlsplit(url)
+    prefix = api_prefix()
+    path = parts.path if parts.path.startswith("/") else prefix + parts.path
+    if not path.startswith(prefix) or path == reverse("batch"):
+        raise BatchError(f"Pfad nicht erlaubt: {url}")
+    if path.startswith(prefix + "auth/"):
+        raise BatchError(f"Auth-Endpunkte sind im Batch nicht möglich: {url}")
+
+    headers = entry.get("headers") or {}
+    if not isinstance(headers, dict):
+        raise BatchError("'headers' muss ein Objekt sein.")
+
+    return method, path, parts.query, entry.get("body"), headers
+
+
+def build_sub_request(request, method, path, query, body, headers):
+    """Return a Django request for a sub-request of the DRF ``request``."""
+    payload = b"" if body is None else json.dumps(body).encode()
+
+    environ = {
+        key: value for key, value in request.META.items() if key not in DROPPED_META
+    }
+    environ.update(
+        {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(payload)),
+            "wsgi.input": BytesIO(payload),
+        }
+    )
+    for name, value in headers.items():
+        environ["HTTP_" + name.upper().replace("-", "_")] = str(value)
+
+    sub_request = WSGIRequest(environ)
+    # Reuse the caller's authentication instead of authenticating again
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def execute(request, entry):
+    """Run one sub-request and return ``{"status", "headers", "body"}``."""
+    try:
+        method, path, query, body, headers = parse_sub_request(entry)
+        match = resolve(path)
+    except BatchError as e:
+        return {"status": 400, "headers": {}, "body": {"error": str(e)}}
+    except Resolver404:
+        return {"status": 404, "headers": {}, "body": {"error": "Nicht gefunden."}}
+
+    sub_request = build_sub_request(request, method, path, query, body, headers)
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Exception:
+        # Fail this entry only; the responses before it are still reported
+        logger.exception("Batch sub-request %s %s failed", method, path)
+        return {"status": 500, "headers": {}, "body": {"error": "Interner Fehler."}}
+
+    if response.streaming:
+        return {
+            "status": 400,
+            "headers": {},
+            "body": {"error": "Streaming-Endpunkte sind im Batch nicht möglich."},
+        }
+
+    if hasattr(response, "data"):
+        result = response.data
+    else:
+        result = response.content.decode(response.charset or "utf-8")
+
+    return {
+        "status": response.status_code,
+        "headers": {
+            name: value
+            for name, value in response.items()
+            if name not in ("Content-Type", "Content-Length", "Vary", "Allow")
+        },
+        "body": result,
+    }
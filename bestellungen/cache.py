@@ -0,0 +1,42 @@
+"""
+Cache helpers for the product catalog.
+
+Catalog responses are cached under a version number. Bumping the version
+invalidates every cached catalog page at once without having to know their
+keys, which keeps bulk changes down to a single cache write.
+"""
+
+import time
+
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def catalog_version():
+    """Return the current catalog cache version."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        _init_version()
+        version = cache.get(CATALOG_VERSION_KEY, 0)
+    return version
+
+
+def catalog_cache_key(path):
+    """Return the cache key for a catalog response at ``path``."""
+    return f"catalog:{catalog_version()}:{path}"
+
+
+def invalidate_catalog():
+    """Invalidate all cached catalog responses."""
+    _init_version()
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # Key was evicted between add() and incr()
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), None)
+
+
+def _init_version():
+    """Seed the version from the clock so an evicted key never reuses old entries."""
+    cache.add(CATALOG_VERSION_KEY, time.time_ns(), None)
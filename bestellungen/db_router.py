@@ -0,0 +1,138 @@
+"""
+Routing of read-only work to an optional read replica.
+
+Reads go to the ``replica`` database only inside ``read_replica()``, which
+read-only views, reports and exports enter via ``replica_view`` or
+``ReplicaReadMixin``. Everything else, and every write, uses ``default``.
+
+Replicas lag behind the primary. After a user's own write, their reads
+therefore stay on the primary for ``REPLICA_STICKY_SECONDS``
+(read-your-writes). ``ReplicaStickinessMiddleware`` records the write in
+the cache.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection
+
+from .decorators import aget_user
+
+REPLICA = "replica"
+
+# Database alias for reads in the current request, thread or task
+_read_db = ContextVar("bestellungen_read_db", default=None)
+
+
+def replica_configured():
+    """Return whether a replica database is configured."""
+    return REPLICA in settings.DATABASES
+
+
+def sticky_cache_key(user_id):
+    """Return the cache key pinning a user's reads to the primary."""
+    return f"db:sticky:{user_id}"
+
+
+def mark_sticky(user):
+    """Pin the reads of ``user`` to the primary for a while."""
+    cache.set(sticky_cache_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user):
+    """Return whether ``user`` wrote recently and must read from the primary."""
+    if user is None or not user.is_authenticated:
+        return False
+    return bool(cache.get(sticky_cache_key(user.pk)))
+
+
+@contextmanager
+def read_replica(user=None):
+    """Send reads inside the block to the replica.
+
+    Does nothing without a configured replica, if ``user`` wrote recently or
+    inside a transaction, whose own writes the replica has not seen. Only
+    wrap read-only code: reads that a write depends on belong on the primary.
+    """
+    if not replica_configured() or connection.in_atomic_block or is_sticky(user):
+        yield
+        return
+
+    previous = _read_db.get()
+    _read_db.set(REPLICA)
+    try:
+        yield
+    finally:
+        _read_db.set(previous)
+
+
+def replica_view(view):
+    """Serve a read-only (sync or async) function view from the replica."""
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            user = await aget_user(request)
+            with read_replica(user):
+                return await view(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with read_replica(request.user):
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """Serve the viewset actions listed in ``replica_actions`` from the replica.
+
+    The replica is used from authentication until ``dispatch()`` returns, so
+    serialization reads from it as well. It is left in a ``finally`` block,
+    so a view that raises does not leave the next request on the replica.
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        """Switch reads to the replica for read actions."""
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self._replica_reads = read_replica(request.user)
+            self._replica_reads.__enter__()
+
+    def dispatch(self, request, *args, **kwargs):
+        """Switch reads back before the response leaves the view, always."""
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            replica_reads = self.__dict__.pop("_replica_reads", None)
+            if replica_reads is not None:
+                replica_reads.__exit__(None, None, None)
+
+
+class ReplicaRouter:
+    """Route reads to the alias chosen by ``read_replica()``, all else to default."""
+
+    def db_for_read(self, model, **hints):
+        # Also outside read_replica() for objects loaded from the replica
+        return _read_db.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives the schema through replication
+        if db == REPLICA:
+            return False
+        return None
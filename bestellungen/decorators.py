@@ -0,0 +1,39 @@
+"""
+View decorators for async views.
+
+Django 4.2's ``login_required`` only supports sync views, and touching
+``request.user`` (a lazy session lookup) from async code raises
+``SynchronousOnlyOperation``.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+
+
+async def aget_user(request):
+    """Resolve the lazy ``request.user`` in a thread and return it.
+
+    Afterwards the user (and the session it was loaded from) is cached on
+    the request, so templates can use ``user`` and ``messages`` safely.
+    """
+
+    def load():
+        request.user.is_authenticated
+        return request.user
+
+    return await sync_to_async(load)()
+
+
+def async_login_required(view):
+    """``login_required`` for async views."""
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,120 @@
+"""
+values()-based serialization for high-volume order listings.
+
+These functions build the same dicts as ``OrderSerializer`` from plain
+``values()`` rows, skipping DRF's per-field machinery. Money and timestamps
+are formatted exactly like ``DecimalField(decimal_places=2)`` and
+``DateTimeField`` would, so the rendered JSON is byte-identical.
+"""
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OrderItem
+from .serializers import OrderItemSerializer, OrderSerializer
+
+
+def format_euro(cents):
+    """Format an amount in cents like a two-decimal DRF DecimalField."""
+    sign = "-" if cents < 0 else ""
+    cents = abs(cents)
+    return f"{sign}{cents // 100}.{cents % 100:02d}"
+
+
+def format_datetime(value):
+    """Format a datetime like DRF's ISO 8601 DateTimeField."""
+    if not value:
+        return None
+    value = timezone.localtime(value).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _identity(value):
+    return value
+
+
+# Serialized field -> (values() column, formatter); "items" is nested
+ORDER_FIELDS = {
+    "id": ("id", _identity),
+    "user": ("user_id", _identity),
+    "user_email": ("user__email", _identity),
+    "status": ("status", _identity),
+    "total_cents": ("total_cents", _identity),
+    "total_euro": ("total_cents", format_euro),
+    "item_count": ("item_count", _identity),
+    "placed_at": ("placed_at", format_datetime),
+    "exported_at": ("exported_at", format_datetime),
+    "created_at": ("created_at", format_datetime),
+    "updated_at": ("updated_at", format_datetime),
+    "version": ("version", _identity),
+}
+
+ITEM_FIELDS = {
+    "id": ("id", _identity),
+    "product": ("product_id", _identity),
+    "product_name": ("product_name", _identity),
+    "product_sku": ("sku", _identity),
+    "quantity": ("quantity", _identity),
+    "unit_price_cents": ("unit_price_cents", _identity),
+    "subtotal_cents": ("subtotal_cents", _identity),
+    "subtotal_euro": ("subtotal_cents", format_euro),
+}
+
+
+def order_fields(selected=None):
+    """Return the serialized order fields in OrderSerializer order."""
+    return [
+        name
+        for name in OrderSerializer.Meta.fields
+        if selected is None or name in selected
+    ]
+
+
+def order_columns(selected=None):
+    """Return the values() columns needed for ``selected`` fields.
+
+    ``created_at`` is always included for the cursor paginator.
+    """
+    columns = {"id", "created_at"}
+    columns.update(
+        ORDER_FIELDS[name][0] for name in order_fields(selected) if name != "items"
+    )
+    return sorted(columns)
+
+
+def items_by_order(order_ids):
+    """Return serialized items grouped by order id, in one query."""
+    layout = [(name, *ITEM_FIELDS[name]) for name in OrderItemSerializer.Meta.fields]
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .order_by("id")
+        .values(
+            "order_id",
+            *{column for _, column, _ in layout if column != "subtotal_cents"},
+            subtotal_cents=F("quantity") * F("unit_price_cents"),
+        )
+    )
+
+    grouped = {order_id: [] for order_id in order_ids}
+    for row in rows:
+        grouped[row["order_id"]].append(
+            {name: fmt(row[column]) for name, column, fmt in layout}
+        )
+    return grouped
+
+
+def serialize_orders(rows, selected=None):
+    """Build OrderSerializer-compatible dicts from ``values()`` rows."""
+    fields = order_fields(selected)
+    layout = [ORDER_FIELDS.get(name, (name, None)) for name in fields]
+    items = items_by_order([row["id"] for row in rows]) if "items" in fields else None
+
+    data = []
+    for row in rows:
+        order = {}
+        for name, (column, fmt) in zip(fields, layout):
+            order[name] = items[row["id"]] if fmt is None else fmt(row[column])
+        data.append(order)
+    return data
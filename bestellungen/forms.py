@@ -120,3 +120,21 @@ class LoginForm(forms.Form):
             attrs={"class": "form-control", "placeholder": "Passwort"}
         )
     )
+
+
+class ProductImportForm(forms.Form):
+    """Form for uploading a product CSV in the admin."""
+
+    csv_file = forms.FileField(
+        label="CSV-Datei",
+        help_text="Spalten: sku, name, description, price_cents, available, max_per_order",
+    )
+    delimiter = forms.ChoiceField(
+        label="Trennzeichen",
+        choices=[(",", "Komma (,)"), (";", "Semikolon (;)")],
+        initial=",",
+    )
+    dry_run = forms.BooleanField(
+        label="Nur prüfen (Testlauf)",
+        required=False,
+    )
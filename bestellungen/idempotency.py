@@ -0,0 +1,96 @@
+"""
+Idempotency-Key support for unsafe API actions.
+
+The first response for a (user, key) pair is stored in ``IdempotencyKey``.
+Retries with the same key replay it without running the view again.
+"""
+
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def expiry_cutoff():
+    """Return the creation time before which stored keys have expired."""
+    return timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def idempotent(view_method):
+    """Make a DRF view method idempotent for requests with an Idempotency-Key."""
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"{IDEMPOTENCY_HEADER} ist zu lang."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Expired keys may be reused
+        IdempotencyKey.objects.filter(
+            user=request.user, key=key, created_at__lt=expiry_cutoff()
+        ).delete()
+
+        record, created = IdempotencyKey.objects.get_or_create(
+            user=request.user,
+            key=key,
+            defaults={"method": request.method, "path": request.path},
+        )
+
+        if not created:
+            return replay(record, request)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500:
+            # Let the client retry server errors
+            record.delete()
+        else:
+            record.status_code = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=["status_code", "response_body"])
+
+        return response
+
+    return wrapper
+
+
+def replay(record, request):
+    """Return the stored response for ``record``."""
+    if record.method != request.method or record.path != request.path:
+        return Response(
+            {
+                "error": f"{IDEMPOTENCY_HEADER} wurde bereits für einen "
+                "anderen Request verwendet."
+            },
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    if record.status_code is None:
+        return Response(
+            {"error": "Ein Request mit diesem Idempotency-Key wird noch verarbeitet."},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    return Response(
+        record.response_body,
+        status=record.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
@@ -0,0 +1,181 @@
+"""
+Bulk import of the product catalog from CSV.
+
+The CSV is read as a stream and written in batches: one ``in_bulk`` lookup,
+one upsert (``INSERT ... ON CONFLICT (sku) DO UPDATE``) for new and changed
+SKUs and one ``bulk_create`` of price history rows per batch. Catalog caches are
+invalidated once after the whole file has been imported.
+"""
+
+import csv
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import transaction
+
+from .cache import invalidate_catalog
+from .models import Product, ProductPriceHistory
+
+IMPORT_FIELDS = ["name", "description", "price_cents", "available", "max_per_order"]
+REQUIRED_FOR_INSERT = ["name", "price_cents"]
+
+TRUE_VALUES = {"1", "true", "ja", "yes", "x", "y", "j"}
+FALSE_VALUES = {"0", "false", "nein", "no", "n", ""}
+
+
+@dataclass
+class ImportResult:
+    """Summary of a product import run."""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def changed(self):
+        """Return whether the import wrote anything."""
+        return bool(self.inserted or self.updated)
+
+
+class ProductImporter:
+    """Upsert products by SKU from a CSV stream."""
+
+    def __init__(self, batch_size=1000, source="", dry_run=False, delimiter=","):
+        self.batch_size = batch_size
+        self.source = source
+        self.dry_run = dry_run
+        self.delimiter = delimiter
+
+    def run(self, lines):
+        """Import products from an iterable of CSV lines and return the result."""
+        reader = csv.DictReader(lines, delimiter=self.delimiter)
+        result = ImportResult()
+
+        if not reader.fieldnames or "sku" not in reader.fieldnames:
+            result.errors.append("CSV-Datei benötigt eine Spalte 'sku'.")
+            return result
+
+        columns = [name for name in IMPORT_FIELDS if name in reader.fieldnames]
+        rows = self._parse_rows(reader, columns, result)
+
+        with transaction.atomic():
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self._import_batch(batch, columns, result)
+
+            if self.dry_run:
+                transaction.set_rollback(True)
+
+        if result.changed and not self.dry_run:
+            invalidate_catalog()
+
+        return result
+
+    def _parse_rows(self, reader, columns, result):
+        """Yield ``(line, sku, values)`` for valid rows, collecting errors."""
+        for row in reader:
+            try:
+                sku = (row.get("sku") or "").strip()
+                if not sku:
+                    raise ValueError("SKU fehlt")
+                values = {
+                    name: self._parse_value(name, row.get(name)) for name in columns
+                }
+            except ValueError as e:
+                result.errors.append(f"Zeile {reader.line_num}: {e}")
+                continue
+            yield reader.line_num, sku, values
+
+    def _parse_value(self, name, raw):
+        """Convert a raw CSV cell to the model value for ``name``."""
+        raw = (raw or "").strip()
+
+        if name == "available":
+            if raw.lower() in TRUE_VALUES:
+                return True
+            if raw.lower() in FALSE_VALUES:
+                return False
+            raise ValueError(f"Ungültiger Wert für available: '{raw}'")
+
+        if name in ("price_cents", "max_per_order"):
+            try:
+                value = int(raw)
+            except ValueError:
+                raise ValueError(f"Ungültige Zahl für {name}: '{raw}'")
+            minimum = 1 if name == "max_per_order" else 0
+            if value < minimum:
+                raise ValueError(f"{name} muss mindestens {minimum} sein")
+            return value
+
+        if name == "name" and not raw:
+            raise ValueError("Name fehlt")
+
+        return raw
+
+    def _import_batch(self, batch, columns, result):
+        """Write one batch of parsed rows."""
+        # Later rows for the same SKU win
+        rows = {sku: (line, values) for line, sku, values in batch}
+        existing = Product.objects.in_bulk(list(rows), field_name="sku")
+
+        upserts = []
+        inserted = updated = 0
+        history = []
+
+        for sku, (line, values) in rows.items():
+            product = existing.get(sku)
+
+            if product is None:
+                missing = [name for name in REQUIRED_FOR_INSERT if name not in values]
+                if missing:
+                    result.errors.append(
+                        f"Zeile {line}: Neues Produkt {sku} benötigt {', '.join(missing)}"
+                    )
+                    continue
+                upserts.append(Product(sku=sku, **values))
+                inserted += 1
+                continue
+
+            changes = {
+                name: value
+                for name, value in values.items()
+                if getattr(product, name) != value
+            }
+            if not changes:
+                result.unchanged += 1
+                continue
+
+            if "price_cents" in changes or "available" in changes:
+                history.append(
+                    ProductPriceHistory(
+                        product=product,
+                        old_price_cents=product.price_cents,
+                        new_price_cents=changes.get("price_cents", product.price_cents),
+                        old_available=product.available,
+                        new_available=changes.get("available", product.available),
+                        source=self.source,
+                    )
+                )
+
+            # Upsert rows without a pk so the conflict target is the SKU. The
+            # INSERT half needs every NOT NULL column, so columns missing
+            # from the CSV keep their current values.
+            current = {name: getattr(product, name) for name in IMPORT_FIELDS}
+            upserts.append(Product(sku=sku, **{**current, **values}))
+            updated += 1
+
+        if upserts:
+            Product.objects.bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=["sku"],
+                update_fields=columns + ["updated_at"],
+            )
+        if history:
+            ProductPriceHistory.objects.bulk_create(history)
+
+        result.inserted += inserted
+        result.updated += updated
@@ -0,0 +1,58 @@
+"""
+Management command to move old exported and cancelled orders to the archive.
+
+Orders are copied to ArchivedOrder and deleted from the live tables in
+chunks, each in its own transaction. Customers and staff can still read
+archived orders (order archive view, admin).
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bestellungen.services import archivable_orders, archive_orders
+
+
+class Command(BaseCommand):
+    help = "Archive exported and cancelled orders older than N months"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=settings.ORDER_ARCHIVE_AFTER_MONTHS,
+            help="Archive orders placed more than this many months (30 days) ago",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of orders moved per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count matching orders without moving them",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=30 * options["months"])
+        orders = archivable_orders(cutoff)
+
+        self.stdout.write(f"Cutoff:   {cutoff:%Y-%m-%d}")
+
+        if options["dry_run"]:
+            self.stdout.write(f"Matching: {orders.count()}")
+            self.stdout.write(self.style.WARNING("⚠ DRY RUN - No changes written"))
+            return
+
+        started = time.monotonic()
+        archived = archive_orders(orders, chunk_size=options["chunk_size"])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(f"Archived: {archived}")
+        self.stdout.write(f"Duration: {elapsed:.2f}s")
+        self.stdout.write(self.style.SUCCESS("✓ Orders archived"))
@@ -0,0 +1,138 @@
+"""
+Management command to benchmark order list serialization.
+
+Compares OrderSerializer + JSONRenderer with the values()-based fast path
+(fast_serializers + FastJSONRenderer) on generated data. All data is
+created inside a transaction that is rolled back at the end.
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from bestellungen.fast_serializers import order_columns, serialize_orders
+from bestellungen.models import Order, OrderItem, Product
+from bestellungen.renderers import FastJSONRenderer
+from bestellungen.serializers import OrderSerializer
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Raised to roll back the benchmark data."""
+
+
+class Command(BaseCommand):
+    help = "Benchmark order list serialization (serializer vs. fast path)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[50, 500, 5000],
+            help="Numbers of orders to benchmark (default: 50 500 5000)",
+        )
+        parser.add_argument(
+            "--items", type=int, default=3, help="Items per order (default: 3)"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Runs per size, best is reported"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'orders':>8} {'serializer':>12} {'fast path':>12} {'speedup':>8}"
+        )
+
+        try:
+            with transaction.atomic():
+                user, products = self.create_fixtures(options["items"])
+                created = 0
+                for size in sorted(options["sizes"]):
+                    self.create_orders(user, products, size - created)
+                    created = size
+                    self.run_size(user, size, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_fixtures(self, items):
+        """Create the benchmark user and products."""
+        user = User.objects.create_user(
+            username="benchmark-order-list",
+            email="benchmark-order-list@example.invalid",
+            password=None,
+        )
+        products = Product.objects.bulk_create(
+            Product(
+                sku=f"BENCH-{i}", name=f"Benchmark Brötchen {i}", price_cents=45 + i
+            )
+            for i in range(items)
+        )
+        return user, products
+
+    def create_orders(self, user, products, count):
+        """Create ``count`` placed orders with one item per product."""
+        orders = Order.objects.bulk_create(
+            Order(
+                user=user,
+                status="PLACED",
+                total_cents=1234,
+                item_count=len(products),
+            )
+            for _ in range(count)
+        )
+        if orders and orders[0].pk is None:
+            orders = list(Order.objects.filter(user=user).order_by("-id")[:count])
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order,
+                product=product,
+                quantity=2,
+                unit_price_cents=product.price_cents,
+                sku=product.sku,
+                product_name=product.name,
+            )
+            for order in orders
+            for product in products
+        )
+
+    def run_size(self, user, size, repeat):
+        """Time both paths for ``size`` orders and print the result."""
+        queryset = Order.objects.filter(user=user).order_by("-created_at", "-id")
+
+        def serializer_path():
+            data = OrderSerializer(
+                queryset.select_related("user").prefetch_related("items__product"),
+                many=True,
+            ).data
+            return JSONRenderer().render(data)
+
+        def fast_path():
+            rows = list(queryset.values(*order_columns()))
+            return FastJSONRenderer().render(serialize_orders(rows))
+
+        slow_time, slow_body = self.best_of(serializer_path, repeat)
+        fast_time, fast_body = self.best_of(fast_path, repeat)
+
+        if slow_body != fast_body:
+            raise CommandError(f"Output differs for {size} orders")
+
+        self.stdout.write(
+            f"{size:>8} {slow_time * 1000:>10.1f}ms {fast_time * 1000:>10.1f}ms "
+            f"{slow_time / fast_time:>7.1f}x"
+        )
+
+    def best_of(self, func, repeat):
+        """Return the best wall time and the result of ``func``."""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
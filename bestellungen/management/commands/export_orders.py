@@ -11,7 +11,9 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
 
+from bestellungen.db_router import read_replica
 from bestellungen.models import ExportLog, Order
+from bestellungen.services import bulk_transition
 
 
 class Command(BaseCommand):
@@ -45,7 +47,7 @@ class Command(BaseCommand):
         orders_query = (
             Order.objects.filter(status="PLACED", exported_at__isnull=True)
             .select_related("user")
-            .prefetch_related("items__product")
+            .prefetch_related("items")
         )
 
         if since:
@@ -59,7 +61,11 @@ class Command(BaseCommand):
                 )
                 return
 
-        orders = list(orders_query)
+        # Reading from the replica is safe: orders it does not have yet are
+        # exported next time, and claim_orders only claims orders that are
+        # still placed on the primary
+        with read_replica():
+            orders = list(orders_query)
 
         if not orders:
             self.stdout.write(self.style.SUCCESS("✓ No orders to export"))
@@ -68,7 +74,7 @@ class Command(BaseCommand):
         self.stdout.write(f"\nFound {len(orders)} order(s) to export:")
         for order in orders:
             self.stdout.write(
-                f"  - Order #{order.id} ({order.user.email}) - {order.items.count()} items"
+                f"  - Order #{order.id} ({order.user.email}) - {order.item_count} items"
             )
 
         # Create export directory if it doesn't exist
@@ -80,12 +86,15 @@ class Command(BaseCommand):
         csv_filename = f"export_orders_{timestamp}.csv"
         csv_filepath = os.path.join(export_path, csv_filename)
 
-        # Export to CSV
+        # Claim the orders before writing the CSV: one conditional UPDATE moves
+        # them from PLACED to EXPORTED, so orders cancelled meanwhile are left
+        # out and exported ones can no longer be cancelled. A failed CSV
+        # write rolls the claim back.
         try:
-            self.export_to_csv(orders, csv_filepath)
-            self.stdout.write(
-                self.style.SUCCESS(f"\n✓ CSV exported to: {csv_filepath}")
-            )
+            with transaction.atomic():
+                if not dry_run:
+                    orders = self.claim_orders(orders)
+                self.export_to_csv(orders, csv_filepath)
         except Exception as e:
             error_msg = f"Error exporting to CSV: {str(e)}"
             self.stdout.write(self.style.ERROR(f"✗ {error_msg}"))
@@ -96,9 +105,9 @@ class Command(BaseCommand):
             )
             return
 
-        # Mark orders as exported (unless dry-run)
+        self.stdout.write(self.style.SUCCESS(f"\n✓ CSV exported to: {csv_filepath}"))
+
         if not dry_run:
-            self.mark_orders_exported(orders)
             self.stdout.write(
                 self.style.SUCCESS(f"✓ {len(orders)} order(s) marked as exported")
             )
@@ -156,8 +165,8 @@ class Command(BaseCommand):
                             order.user.email,
                             order.user.first_name,
                             order.user.last_name,
-                            item.product.sku,
-                            item.product.name,
+                            item.sku,
+                            item.product_name,
                             item.quantity,
                             item.unit_price_cents,
                             order.placed_at.isoformat(),
@@ -166,14 +175,18 @@ class Command(BaseCommand):
                     )
 
         self.stdout.write(
-            f"  Wrote {sum(o.items.count() for o in orders)} order items to CSV"
+            f"  Wrote {sum(o.item_count for o in orders)} order items to CSV"
         )
 
-    def mark_orders_exported(self, orders):
-        """Mark orders as exported."""
-        with transaction.atomic():
-            now = timezone.now()
-            for order in orders:
-                order.status = "EXPORTED"
-                order.exported_at = now
-                order.save(update_fields=["status", "exported_at"])
+    def claim_orders(self, orders):
+        """Mark orders as exported if still placed and return the claimed ones."""
+        claimed = set(
+            bulk_transition(
+                Order.objects.filter(id__in=[order.id for order in orders]),
+                ["PLACED"],
+                "EXPORTED",
+                source="EXPORT",
+                exported_at=timezone.now(),
+            )
+        )
+        return [order for order in orders if order.id in claimed]
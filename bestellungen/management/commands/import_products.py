@@ -0,0 +1,71 @@
+"""
+Management command to bulk import products and prices from CSV.
+"""
+
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bestellungen.importers import ProductImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Import products from CSV "
+        "(columns: sku, name, description, price_cents, available, max_per_order)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file", type=str, help="Path to the CSV file")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows written per batch (default: 1000)",
+        )
+        parser.add_argument(
+            "--delimiter", type=str, default=",", help="CSV delimiter (default: ,)"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and count changes without writing them",
+        )
+
+    def handle(self, *args, **options):
+        csv_file = options["csv_file"]
+        dry_run = options["dry_run"]
+
+        if not os.path.exists(csv_file):
+            raise CommandError(f"File not found: {csv_file}")
+
+        self.stdout.write(self.style.WARNING("=" * 60))
+        self.stdout.write(self.style.WARNING("  IMPORT PRODUCTS"))
+        self.stdout.write(self.style.WARNING("=" * 60))
+
+        importer = ProductImporter(
+            batch_size=options["batch_size"],
+            source=f"import:{os.path.basename(csv_file)}",
+            dry_run=dry_run,
+            delimiter=options["delimiter"],
+        )
+
+        started = time.monotonic()
+        with open(csv_file, newline="", encoding="utf-8-sig") as f:
+            result = importer.run(f)
+        elapsed = time.monotonic() - started
+
+        for error in result.errors:
+            self.stdout.write(self.style.ERROR(f"✗ {error}"))
+
+        self.stdout.write(f"\nInserted:  {result.inserted}")
+        self.stdout.write(f"Updated:   {result.updated}")
+        self.stdout.write(f"Unchanged: {result.unchanged}")
+        self.stdout.write(f"Errors:    {len(result.errors)}")
+        self.stdout.write(f"Duration:  {elapsed:.2f}s")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("\n⚠ DRY RUN - No changes written"))
+        else:
+            self.stdout.write(self.style.SUCCESS("\n✓ Import completed"))
@@ -864,7 +864,7 @@ class Command(BaseCommand):
         # Create sample orders
         if not Order.objects.filter(user=user1, status="PLACED").exists():
             # Order 1 - Placed
-            order1 = Order.objects.create(user=user1, status="DRAFT")
+            order1 = Order.objects.get_cart(user1)
             OrderItem.objects.create(
                 order=order1,
                 product=created_products[0],  # Bauernbrot
@@ -883,7 +883,7 @@ class Command(BaseCommand):
             )
 
             # Order 2 - Draft (in cart)
-            order2 = Order.objects.create(user=user1, status="DRAFT")
+            order2 = Order.objects.get_cart(user1)
             OrderItem.objects.create(
                 order=order2,
                 product=created_products[6],  # Croissant
@@ -0,0 +1,149 @@
+"""
+Management command to delete empty and abandoned draft orders (carts).
+
+Drafts are deleted in batches, each in its own short transaction, so the
+command can run next to live checkouts (e.g. nightly via cron). Every batch
+locks its drafts and re-checks the conditions before deleting, so a cart
+that is filled or updated in the meantime is kept.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from bestellungen.models import Order, OrderItem
+
+
+class Command(BaseCommand):
+    help = "Delete empty and abandoned draft orders in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--empty-days",
+            type=int,
+            default=settings.DRAFT_EMPTY_RETENTION_DAYS,
+            help="Delete empty drafts not updated for this many days",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.DRAFT_STALE_RETENTION_DAYS,
+            help="Delete drafts with items not updated for this many days",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of drafts deleted per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Seconds to pause between batches (default: 0)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count matching drafts without deleting them",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        has_items = Exists(OrderItem.objects.filter(order=OuterRef("pk")))
+        drafts = Order.objects.filter(status="DRAFT")
+        targets = {
+            "empty": drafts.filter(
+                ~has_items, updated_at__lt=now - timedelta(days=options["empty_days"])
+            ),
+            "stale": drafts.filter(
+                has_items, updated_at__lt=now - timedelta(days=options["days"])
+            ),
+        }
+
+        if options["dry_run"]:
+            for name, queryset in targets.items():
+                self.stdout.write(f"{name.capitalize() + ':':<12} {queryset.count()}")
+            self.stdout.write(self.style.WARNING("⚠ DRY RUN - No changes written"))
+            return
+
+        row_bytes = {
+            model: self.estimate_row_bytes(model) for model in (Order, OrderItem)
+        }
+        started = time.monotonic()
+        deleted = {Order: 0, OrderItem: 0}
+        batches = 0
+
+        for name, queryset in targets.items():
+            count = 0
+            for per_model in self.delete_in_batches(
+                queryset, options["batch_size"], options["sleep"]
+            ):
+                batches += 1
+                count += per_model.get(Order._meta.label, 0)
+                deleted[OrderItem] += per_model.get(OrderItem._meta.label, 0)
+            deleted[Order] += count
+            self.stdout.write(f"{name.capitalize() + ':':<12} {count}")
+
+        self.stdout.write(f"{'Items:':<12} {deleted[OrderItem]}")
+        self.stdout.write(f"{'Batches:':<12} {batches}")
+        if None in row_bytes.values():
+            self.stdout.write(f"{'Reclaimed:':<12} n/a")
+        else:
+            reclaimed = sum(row_bytes[model] * deleted[model] for model in deleted)
+            self.stdout.write(
+                f"{'Reclaimed:':<12} ~{reclaimed / 1024 / 1024:.1f} MB "
+                "(estimated, freed for reuse by VACUUM)"
+            )
+        self.stdout.write(f"{'Duration:':<12} {time.monotonic() - started:.2f}s")
+        self.stdout.write(self.style.SUCCESS("✓ Drafts purged"))
+
+    def delete_in_batches(self, queryset, batch_size, sleep):
+        """Delete ``queryset`` in batches and yield the per-model counts."""
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    queryset.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[:batch_size]
+                )
+                if not ids:
+                    return
+                last_pk = ids[-1]
+                # Lock the batch so new items (foreign key check) and cart
+                # updates wait for the commit, then re-check the conditions:
+                # a draft filled or touched before the lock was granted is
+                # kept.
+                list(
+                    Order.objects.select_for_update()
+                    .filter(pk__in=ids)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)
+                )
+                ids = list(queryset.filter(pk__in=ids).values_list("pk", flat=True))
+                _, per_model = Order.objects.filter(pk__in=ids).delete()
+            yield per_model
+            if sleep:
+                time.sleep(sleep)
+
+    def estimate_row_bytes(self, model):
+        """Return the average on-disk bytes per row incl. indexes (PostgreSQL).
+
+        Returns ``None`` on other databases or before the table was analyzed.
+        """
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_total_relation_size(oid) / reltuples FROM pg_class "
+                "WHERE relname = %s AND reltuples > 0",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
@@ -0,0 +1,21 @@
+"""
+Management command to delete expired Idempotency-Key responses.
+
+Run it periodically (e.g. hourly via cron); keys older than
+IDEMPOTENCY_KEY_TTL_HOURS can no longer be replayed.
+"""
+
+from django.core.management.base import BaseCommand
+
+from bestellungen.idempotency import expiry_cutoff
+from bestellungen.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key responses"
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(
+            created_at__lt=expiry_cutoff()
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted: {deleted}"))
@@ -0,0 +1,21 @@
+"""
+Management command to delete old product tombstones.
+
+Run it periodically (e.g. daily via cron); deletions older than
+PRODUCT_TOMBSTONE_RETENTION_DAYS are no longer reported by the catalog
+delta feed, which rejects cursors older than that.
+"""
+
+from django.core.management.base import BaseCommand
+
+from bestellungen.models import ProductTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete product tombstones older than the retention period"
+
+    def handle(self, *args, **options):
+        deleted, _ = ProductTombstone.objects.filter(
+            deleted_at__lt=ProductTombstone.expiry_cutoff()
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted: {deleted}"))
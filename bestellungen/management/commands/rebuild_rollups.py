@@ -0,0 +1,127 @@
+"""
+Management command to rebuild the daily sales rollup for a date range.
+
+The range is split into chunks of days; each chunk is recomputed in its own
+transaction from live and archived orders. Chunks run in parallel worker
+threads with their own database connections. Use it to backfill the rollup
+after the first deploy and to repair it after direct edits of placed orders.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from bestellungen.models import ArchivedOrder, Order
+from bestellungen.services import rebuild_daily_sales
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollup (DailySales) for a date range"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="start",
+            help="First day (YYYY-MM-DD, default: day of the first placed order)",
+        )
+        parser.add_argument(
+            "--to", dest="end", help="Last day (YYYY-MM-DD, default: today)"
+        )
+        parser.add_argument(
+            "--chunk-days",
+            type=int,
+            default=7,
+            help="Number of days rebuilt per transaction (default: 7)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of chunks rebuilt in parallel (default: 4, SQLite: 1)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Compute the rollup rows without writing them",
+        )
+
+    def handle(self, *args, **options):
+        end = self.parse_day(options["end"], "--to") or timezone.localdate()
+        start = self.parse_day(options["start"], "--from") or self.first_day()
+        if start is None:
+            self.stdout.write("Nothing to rebuild: no placed orders")
+            return
+        if start > end:
+            raise CommandError("--from must not be after --to")
+        if options["chunk_days"] < 1:
+            raise CommandError("--chunk-days must be at least 1")
+
+        workers = max(options["workers"], 1)
+        if connection.vendor == "sqlite":
+            # SQLite allows only one writer at a time
+            workers = 1
+
+        chunks = []
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(
+                chunk_start + timedelta(days=options["chunk_days"] - 1), end
+            )
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(f"Range:    {start:%Y-%m-%d} – {end:%Y-%m-%d}")
+        self.stdout.write(f"Chunks:   {len(chunks)} ({workers} workers)")
+
+        dry_run = options["dry_run"]
+        started = time.monotonic()
+        if workers == 1:
+            rows = sum(rebuild_daily_sales(*chunk, dry_run=dry_run) for chunk in chunks)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                rows = sum(
+                    pool.map(lambda chunk: self.rebuild_chunk(chunk, dry_run), chunks)
+                )
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(f"Rows:     {rows}")
+        self.stdout.write(f"Duration: {elapsed:.2f}s")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("⚠ DRY RUN - No changes written"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✓ Rollup rebuilt"))
+
+    def rebuild_chunk(self, chunk, dry_run):
+        """Rebuild one chunk in a worker thread and close its connection."""
+        try:
+            return rebuild_daily_sales(*chunk, dry_run=dry_run)
+        finally:
+            connection.close()
+
+    def parse_day(self, value, option):
+        """Return the date given for ``option``, or None if it is not set."""
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise CommandError(f"{option} expects a date (YYYY-MM-DD)")
+        return day
+
+    def first_day(self):
+        """Return the local day of the first placed live or archived order."""
+        firsts = [
+            model.objects.aggregate(first=Min("placed_at"))["first"]
+            for model in (Order, ArchivedOrder)
+        ]
+        firsts = [first for first in firsts if first is not None]
+        return timezone.localdate(min(firsts)) if firsts else None
@@ -0,0 +1,100 @@
+"""
+Management command to repair stored order totals.
+
+Recomputes total_cents, item_count and delivery_fee_cents from the items
+and customers with one UPDATE per chunk; only orders whose stored values
+drift are written. With --dry-run the drifted orders are listed instead.
+
+Examples:
+    python manage.py recalculate_totals --dry-run
+    python manage.py recalculate_totals --status PLACED EXPORTED
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from bestellungen.models import Order
+from bestellungen.services import drifted_orders, recalculate_totals
+
+COLUMNS = ["total_cents", "item_count", "delivery_fee_cents"]
+
+
+class Command(BaseCommand):
+    help = "Recompute order totals from their items and list or fix drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status",
+            nargs="+",
+            choices=[value for value, _ in Order.STATUS_CHOICES],
+            help="Only orders in these statuses (default: all)",
+        )
+        parser.add_argument("--ids", type=int, nargs="+", help="Order ids")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of orders checked per UPDATE (default: 1000)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List drifted orders (stored → computed) without fixing them",
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=100,
+            help="Maximum number of drifted orders listed in a dry run",
+        )
+
+    def handle(self, *args, **options):
+        orders = Order.objects.all()
+        if options["status"]:
+            orders = orders.filter(status__in=options["status"])
+        if options["ids"]:
+            orders = orders.filter(id__in=options["ids"])
+
+        if options["dry_run"]:
+            self.show_drift(orders, options["show"])
+            self.stdout.write(self.style.WARNING("⚠ DRY RUN - No changes written"))
+            return
+
+        started = time.monotonic()
+        corrected = recalculate_totals(orders, chunk_size=options["chunk_size"])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(f"Corrected: {corrected}")
+        self.stdout.write(f"Duration:  {elapsed:.2f}s")
+        self.stdout.write(self.style.SUCCESS("✓ Order totals recalculated"))
+
+    def show_drift(self, orders, limit):
+        """Print the drifted orders with their stored and computed values."""
+        drifted = (
+            drifted_orders(orders)
+            .annotate(
+                **{
+                    f"computed_{name}": expression
+                    for name, expression in Order.total_expressions().items()
+                }
+            )
+            .order_by("pk")
+        )
+        rows = drifted.values("pk", *COLUMNS, *(f"computed_{name}" for name in COLUMNS))
+
+        count = 0
+        for row in rows.iterator():
+            count += 1
+            if count > limit:
+                continue
+            changes = ", ".join(
+                f"{name} {row[name]} → {row[f'computed_{name}']}"
+                for name in COLUMNS
+                if row[name] != row[f"computed_{name}"]
+            )
+            self.stdout.write(f"#{row['pk']}: {changes}")
+
+        if count > limit:
+            self.stdout.write(f"… {count - limit} more")
+        self.stdout.write(f"Drifted: {count}")
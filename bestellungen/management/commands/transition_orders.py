@@ -0,0 +1,104 @@
+"""
+Management command to move many orders to another status at once.
+
+Examples:
+    python manage.py transition_orders --to CANCELLED --from PLACED \
+        --delivery-date 2024-05-02 --note "Tour 3 ausgefallen"
+    python manage.py transition_orders --to PLACED --from EXPORTED --ids 12 13 14
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bestellungen.models import Order
+from bestellungen.services import BULK_TRANSITIONS, bulk_transition
+
+# Extra field values per target status
+TARGET_VALUES = {
+    "PLACED": {"exported_at": None, "external_export_id": None},
+}
+
+
+class Command(BaseCommand):
+    help = "Transition orders in bulk and record an OrderEvent per order"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--to",
+            required=True,
+            choices=sorted(BULK_TRANSITIONS),
+            help="Target status",
+        )
+        parser.add_argument(
+            "--from",
+            dest="from_states",
+            nargs="+",
+            help="Current statuses to transition (default: all allowed)",
+        )
+        parser.add_argument("--ids", type=int, nargs="+", help="Order ids")
+        parser.add_argument("--customer", type=str, help="Customer email")
+        parser.add_argument(
+            "--delivery-date", type=str, help="Delivery date (YYYY-MM-DD)"
+        )
+        parser.add_argument(
+            "--note", type=str, default="", help="Note stored on each event"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of orders updated per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count matching orders without changing them",
+        )
+
+    def handle(self, *args, **options):
+        to_state = options["to"]
+        from_states = options["from_states"] or BULK_TRANSITIONS[to_state]
+
+        invalid = set(from_states) - set(BULK_TRANSITIONS[to_state])
+        if invalid:
+            raise CommandError(
+                f"Cannot transition from {', '.join(sorted(invalid))} to {to_state}"
+            )
+
+        if not (options["ids"] or options["customer"] or options["delivery_date"]):
+            raise CommandError("Use --ids, --customer or --delivery-date")
+
+        orders = Order.objects.filter(status__in=from_states)
+        if options["ids"]:
+            orders = orders.filter(id__in=options["ids"])
+        if options["customer"]:
+            orders = orders.filter(user__email__iexact=options["customer"])
+        if options["delivery_date"]:
+            try:
+                delivery_date = date.fromisoformat(options["delivery_date"])
+            except ValueError:
+                raise CommandError("Invalid --delivery-date, use YYYY-MM-DD")
+            orders = orders.filter(delivery_date=delivery_date)
+
+        if options["dry_run"]:
+            self.stdout.write(f"Matching: {orders.count()}")
+            self.stdout.write(self.style.WARNING("⚠ DRY RUN - No changes written"))
+            return
+
+        started = time.monotonic()
+        ids = bulk_transition(
+            orders,
+            from_states,
+            to_state,
+            source="COMMAND",
+            note=options["note"],
+            chunk_size=options["chunk_size"],
+            **TARGET_VALUES.get(to_state, {}),
+        )
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(f"Transitioned: {len(ids)}")
+        self.stdout.write(f"Duration:     {elapsed:.2f}s")
+        self.stdout.write(self.style.SUCCESS(f"✓ Orders moved to {to_state}"))
@@ -0,0 +1,71 @@
+"""
+Middleware for the bestellungen app.
+"""
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from axes.helpers import get_lockout_response
+from axes.middleware import AxesMiddleware
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .db_router import mark_sticky, replica_configured
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+def _mark_writer(request):
+    """Pin the reads of the user behind a write request to the primary."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        mark_sticky(user)
+
+
+@sync_and_async_middleware
+def ReplicaStickinessMiddleware(get_response):
+    """Keep users on the primary for a while after their own writes.
+
+    Runs after the view, so users authenticated by DRF (token) or logged in
+    by the request itself are covered too.
+    """
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            response = await get_response(request)
+            if request.method not in SAFE_METHODS and replica_configured():
+                await sync_to_async(_mark_writer)(request)
+            return response
+
+    else:
+
+        def middleware(request):
+            response = get_response(request)
+            if request.method not in SAFE_METHODS and replica_configured():
+                _mark_writer(request)
+            return response
+
+    return middleware
+
+
+@sync_and_async_middleware
+def AxesLockoutMiddleware(get_response):
+    """Async-capable replacement for ``axes.middleware.AxesMiddleware``.
+
+    The axes middleware is sync-only, so under ASGI Django would adapt the
+    whole chain and run every async view in a thread. The lockout only has to
+    be mapped to a response after a failed login flagged the request; for all
+    other requests this is a plain attribute check.
+    """
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            response = await get_response(request)
+            if settings.AXES_ENABLED and getattr(request, "axes_locked_out", None):
+                credentials = getattr(request, "axes_credentials", None)
+                response = await sync_to_async(get_lockout_response)(
+                    request, credentials
+                )
+            return response
+
+        return middleware
+
+    return AxesMiddleware(get_response)
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:38
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="delivery_date",
+            field=models.DateField(
+                blank=True,
+                help_text="Tag, für den Produktionskapazität reserviert wurde",
+                null=True,
+                verbose_name="Liefertag",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ProductionCapacity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("delivery_date", models.DateField(verbose_name="Liefertag")),
+                (
+                    "capacity",
+                    models.IntegerField(
+                        help_text="Maximale Produktionsmenge für diesen Tag",
+                        validators=[django.core.validators.MinValueValidator(0)],
+                        verbose_name="Kapazität",
+                    ),
+                ),
+                (
+                    "reserved",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Bereits durch aufgegebene Bestellungen reservierte Menge",
+                        validators=[django.core.validators.MinValueValidator(0)],
+                        verbose_name="Reserviert",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="capacities",
+                        to="bestellungen.product",
+                        verbose_name="Produkt",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Produktionskapazität",
+                "verbose_name_plural": "Produktionskapazitäten",
+                "ordering": ["delivery_date", "product__name"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="productioncapacity",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("reserved__gte", 0), ("reserved__lte", models.F("capacity"))
+                ),
+                name="capacity_reserved_within_bounds",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="productioncapacity",
+            unique_together={("product", "delivery_date")},
+        ),
+    ]
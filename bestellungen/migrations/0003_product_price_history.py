@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0002_production_capacity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductPriceHistory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "old_price_cents",
+                    models.IntegerField(verbose_name="Alter Preis (Cent)"),
+                ),
+                (
+                    "new_price_cents",
+                    models.IntegerField(verbose_name="Neuer Preis (Cent)"),
+                ),
+                ("old_available", models.BooleanField(verbose_name="Vorher verfügbar")),
+                ("new_available", models.BooleanField(verbose_name="Jetzt verfügbar")),
+                (
+                    "source",
+                    models.CharField(blank=True, max_length=200, verbose_name="Quelle"),
+                ),
+                (
+                    "changed_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Geändert am"),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_history",
+                        to="bestellungen.product",
+                        verbose_name="Produkt",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Preisänderung",
+                "verbose_name_plural": "Preisänderungen",
+                "ordering": ["-changed_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["product", "-changed_at"], name="price_hist_product_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0003_product_price_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("product_id", models.BigIntegerField(verbose_name="Produkt-ID")),
+                ("sku", models.CharField(max_length=50, verbose_name="SKU")),
+                (
+                    "deleted_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Gelöscht am"),
+                ),
+            ],
+            options={
+                "verbose_name": "Gelöschtes Produkt",
+                "verbose_name_plural": "Gelöschte Produkte",
+                "ordering": ["deleted_at"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["updated_at"], name="product_updated_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="producttombstone",
+            index=models.Index(
+                fields=["deleted_at"], name="product_tombstone_deleted_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0004_product_delta_feed"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="exportlog",
+            index=models.Index(fields=["-run_at", "-id"], name="exportlog_run_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="order_user_created_idx"
+            ),
+        ),
+    ]
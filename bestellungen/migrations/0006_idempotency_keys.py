@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:51
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0005_cursor_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255, verbose_name="Schlüssel")),
+                ("method", models.CharField(max_length=10, verbose_name="Methode")),
+                ("path", models.CharField(max_length=255, verbose_name="Pfad")),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(
+                        blank=True, null=True, verbose_name="Statuscode"
+                    ),
+                ),
+                (
+                    "response_body",
+                    models.JSONField(
+                        blank=True,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                        verbose_name="Antwort",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Erstellt am"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="idempotency_keys",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Benutzer",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Idempotenz-Schlüssel",
+                "verbose_name_plural": "Idempotenz-Schlüssel",
+                "indexes": [
+                    models.Index(fields=["created_at"], name="idempotency_created_idx")
+                ],
+                "unique_together": {("user", "key")},
+            },
+        ),
+    ]
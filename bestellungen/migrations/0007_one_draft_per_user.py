@@ -0,0 +1,91 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:59
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def merge_duplicate_drafts(apps, schema_editor):
+    """Merge all drafts of a user into the most recently updated one."""
+    Order = apps.get_model("bestellungen", "Order")
+    OrderItem = apps.get_model("bestellungen", "OrderItem")
+
+    users = (
+        Order.objects.filter(status="DRAFT")
+        .values("user_id")
+        .annotate(drafts=Count("id"))
+        .filter(drafts__gt=1)
+        .values_list("user_id", flat=True)
+    )
+    drafts = Order.objects.filter(status="DRAFT", user_id__in=list(users)).order_by(
+        "user_id", "-updated_at", "-id"
+    )
+
+    keeper_of_user = {}
+    keeper_of_draft = {}
+    for draft_id, user_id in drafts.values_list("id", "user_id"):
+        keeper_of_draft[draft_id] = keeper_of_user.setdefault(user_id, draft_id)
+    if not keeper_of_draft:
+        return
+
+    # Sum quantities per (keeper, product) over all drafts of the user
+    quantities = defaultdict(int)
+    prices = {}
+    items = OrderItem.objects.filter(order_id__in=list(keeper_of_draft)).values_list(
+        "order_id",
+        "product_id",
+        "quantity",
+        "unit_price_cents",
+        "product__max_per_order",
+    )
+    limits = {}
+    for order_id, product_id, quantity, unit_price_cents, max_per_order in items:
+        key = (keeper_of_draft[order_id], product_id)
+        quantities[key] += quantity
+        prices.setdefault(key, unit_price_cents)
+        limits[key] = max_per_order
+
+    keepers = list(keeper_of_user.values())
+    losers = [draft for draft, keeper in keeper_of_draft.items() if draft != keeper]
+
+    OrderItem.objects.filter(order_id__in=keepers).delete()
+    OrderItem.objects.bulk_create(
+        OrderItem(
+            order_id=order_id,
+            product_id=product_id,
+            quantity=min(quantity, limits[order_id, product_id]),
+            unit_price_cents=prices[order_id, product_id],
+        )
+        for (order_id, product_id), quantity in quantities.items()
+    )
+    Order.objects.filter(id__in=losers).delete()
+
+    totals = (
+        OrderItem.objects.filter(order_id__in=keepers)
+        .values("order_id")
+        .annotate(total=Sum(F("quantity") * F("unit_price_cents")))
+    )
+    totals = {row["order_id"]: row["total"] for row in totals}
+    orders = list(Order.objects.filter(id__in=keepers))
+    for order in orders:
+        order.total_cents = totals.get(order.id, 0)
+    Order.objects.bulk_update(orders, ["total_cents"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0006_idempotency_keys"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_drafts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="order",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "DRAFT")),
+                fields=("user",),
+                name="order_one_draft_per_user",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0007_one_draft_per_user"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Wird bei jeder Änderung erhöht (optimistische Sperre)",
+                verbose_name="Version",
+            ),
+        ),
+    ]
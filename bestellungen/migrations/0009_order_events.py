@@ -0,0 +1,106 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0008_order_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_status",
+                    models.CharField(
+                        choices=[
+                            ("DRAFT", "Entwurf"),
+                            ("PLACED", "Aufgegeben"),
+                            ("EXPORTED", "Exportiert"),
+                            ("CANCELLED", "Storniert"),
+                        ],
+                        max_length=20,
+                        verbose_name="Von Status",
+                    ),
+                ),
+                (
+                    "to_status",
+                    models.CharField(
+                        choices=[
+                            ("DRAFT", "Entwurf"),
+                            ("PLACED", "Aufgegeben"),
+                            ("EXPORTED", "Exportiert"),
+                            ("CANCELLED", "Storniert"),
+                        ],
+                        max_length=20,
+                        verbose_name="Nach Status",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("APP", "Shop/API"),
+                            ("ADMIN", "Admin"),
+                            ("COMMAND", "Kommando"),
+                            ("EXPORT", "Export"),
+                        ],
+                        default="APP",
+                        max_length=10,
+                        verbose_name="Quelle",
+                    ),
+                ),
+                (
+                    "note",
+                    models.CharField(blank=True, max_length=255, verbose_name="Notiz"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Zeitpunkt"),
+                ),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Ausgeführt von",
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="events",
+                        to="bestellungen.order",
+                        verbose_name="Bestellung",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Bestellereignis",
+                "verbose_name_plural": "Bestellereignisse",
+                "ordering": ["-created_at", "-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["order", "created_at"], name="orderevent_order_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0009_order_events"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                condition=models.Q(("email_verification_token__isnull", False)),
+                fields=["email_verification_token"],
+                name="user_verification_token_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "status", "-placed_at"],
+                name="order_user_status_placed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(("exported_at__isnull", True), ("status", "PLACED")),
+                fields=["placed_at"],
+                name="order_export_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderchangerequest",
+            index=models.Index(
+                fields=["order", "status"], name="changerequest_order_status_idx"
+            ),
+        ),
+    ]
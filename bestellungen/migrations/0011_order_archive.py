@@ -0,0 +1,117 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:13
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0010_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedOrder",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(
+                        primary_key=True, serialize=False, verbose_name="Bestellnummer"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("DRAFT", "Entwurf"),
+                            ("PLACED", "Aufgegeben"),
+                            ("EXPORTED", "Exportiert"),
+                            ("CANCELLED", "Storniert"),
+                        ],
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "delivery_type",
+                    models.CharField(
+                        choices=[("PICKUP", "Abholung"), ("DELIVERY", "Lieferung")],
+                        max_length=20,
+                        verbose_name="Lieferart",
+                    ),
+                ),
+                (
+                    "delivery_address",
+                    models.TextField(blank=True, verbose_name="Lieferadresse"),
+                ),
+                ("total_cents", models.IntegerField(verbose_name="Gesamt (Cent)")),
+                (
+                    "delivery_fee_cents",
+                    models.IntegerField(verbose_name="Lieferkosten (Cent)"),
+                ),
+                (
+                    "items",
+                    models.JSONField(
+                        default=list,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="Liste aus sku, name, quantity, unit_price_cents",
+                        verbose_name="Artikel",
+                    ),
+                ),
+                (
+                    "history",
+                    models.JSONField(
+                        default=list,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="Liste aus from_status, to_status, source, created_at",
+                        verbose_name="Statusverlauf",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="Erstellt am")),
+                (
+                    "placed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Aufgegeben am"
+                    ),
+                ),
+                (
+                    "delivery_date",
+                    models.DateField(blank=True, null=True, verbose_name="Liefertag"),
+                ),
+                (
+                    "exported_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Exportiert am"
+                    ),
+                ),
+                (
+                    "archived_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Archiviert am"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_orders",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Benutzer",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Archivierte Bestellung",
+                "verbose_name_plural": "Archivierte Bestellungen",
+                "ordering": ["-placed_at", "-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-placed_at"],
+                        name="archivedorder_user_placed_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_snapshots(apps, schema_editor):
+    """Fill item snapshots from the current products and count order items.
+
+    Existing rows can only get the product data as it is now; names changed
+    before this migration are not recoverable.
+    """
+    Order = apps.get_model("bestellungen", "Order")
+    OrderItem = apps.get_model("bestellungen", "OrderItem")
+    Product = apps.get_model("bestellungen", "Product")
+
+    product = Product.objects.filter(pk=OuterRef("product_id"))
+    OrderItem.objects.update(
+        sku=Subquery(product.values("sku")),
+        product_name=Subquery(product.values("name")),
+    )
+
+    items_count = (
+        OrderItem.objects.filter(order=OuterRef("pk"))
+        .values("order")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Order.objects.update(item_count=Coalesce(Subquery(items_count), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0011_order_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="item_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Anzahl der Bestellpositionen",
+                verbose_name="Positionen",
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="product_name",
+            field=models.CharField(
+                blank=True,
+                help_text="Produktname zum Zeitpunkt der Bestellung",
+                max_length=200,
+                verbose_name="Produktname",
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="sku",
+            field=models.CharField(
+                blank=True,
+                help_text="SKU zum Zeitpunkt der Bestellung",
+                max_length=50,
+                verbose_name="SKU",
+            ),
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
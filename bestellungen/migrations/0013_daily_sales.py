@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0012_order_item_snapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Tag")),
+                ("sku", models.CharField(max_length=50, verbose_name="SKU")),
+                ("quantity", models.IntegerField(default=0, verbose_name="Menge")),
+                (
+                    "revenue_cents",
+                    models.BigIntegerField(default=0, verbose_name="Umsatz (Cent)"),
+                ),
+                (
+                    "customer",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_sales",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Kunde",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tagesumsatz",
+                "verbose_name_plural": "Tagesumsätze",
+                "ordering": ["-date", "customer", "sku"],
+                "indexes": [
+                    models.Index(
+                        fields=["customer", "date"], name="dailysales_customer_idx"
+                    ),
+                    models.Index(fields=["sku", "date"], name="dailysales_sku_idx"),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailysales",
+            constraint=models.UniqueConstraint(
+                fields=("date", "customer", "sku"), name="dailysales_unique_key"
+            ),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bestellungen", "0013_daily_sales"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["-placed_at"], name="order_placed_at_idx"),
+        ),
+    ]
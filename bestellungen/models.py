@@ -5,11 +5,29 @@ Models for the bakery ordering system.
 import secrets
 
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, TruncDate
 from django.utils import timezone
 
 
+class CapacityExceeded(ValueError):
+    """Raised when a reservation exceeds the remaining production capacity."""
+
+
+class StaleOrderError(ValueError):
+    """Raised when an order was changed by another request since it was loaded."""
+
+    def __init__(self, message=None):
+        super().__init__(
+            message
+            or "Die Bestellung wurde zwischenzeitlich geändert. "
+            "Bitte laden Sie die Seite neu und versuchen Sie es erneut."
+        )
+
+
 class CustomUser(AbstractUser):
     """Extended user model with email verification."""
 
@@ -45,6 +63,14 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = "Benutzer"
         verbose_name_plural = "Benutzer"
+        indexes = [
+            # Only unverified users carry a token
+            models.Index(
+                fields=["email_verification_token"],
+                condition=Q(email_verification_token__isnull=False),
+                name="user_verification_token_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.email})"
@@ -97,6 +123,9 @@ class Product(models.Model):
         verbose_name = "Produkt"
         verbose_name_plural = "Produkte"
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["updated_at"], name="product_updated_at_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.sku})"
@@ -107,6 +136,201 @@ class Product(models.Model):
         return self.price_cents / 100
 
 
+class ProductTombstone(models.Model):
+    """Marker for a deleted product, used by the catalog delta feed."""
+
+    product_id = models.BigIntegerField(verbose_name="Produkt-ID")
+    sku = models.CharField(max_length=50, verbose_name="SKU")
+    deleted_at = models.DateTimeField(auto_now_add=True, verbose_name="Gelöscht am")
+
+    class Meta:
+        verbose_name = "Gelöschtes Produkt"
+        verbose_name_plural = "Gelöschte Produkte"
+        ordering = ["deleted_at"]
+        indexes = [
+            models.Index(fields=["deleted_at"], name="product_tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.sku} gelöscht am {self.deleted_at:%d.%m.%Y %H:%M}"
+
+    @staticmethod
+    def expiry_cutoff():
+        """Return the deletion time before which tombstones are purged.
+
+        Delta-sync cursors older than this can no longer see every deletion.
+        """
+        from datetime import timedelta
+
+        from django.conf import settings
+
+        days = settings.PRODUCT_TOMBSTONE_RETENTION_DAYS
+        return timezone.now() - timedelta(days=days)
+
+
+class ProductPriceHistory(models.Model):
+    """Change history of product prices and availability."""
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="price_history",
+        verbose_name="Produkt",
+    )
+    old_price_cents = models.IntegerField(verbose_name="Alter Preis (Cent)")
+    new_price_cents = models.IntegerField(verbose_name="Neuer Preis (Cent)")
+    old_available = models.BooleanField(verbose_name="Vorher verfügbar")
+    new_available = models.BooleanField(verbose_name="Jetzt verfügbar")
+    source = models.CharField(max_length=200, blank=True, verbose_name="Quelle")
+    changed_at = models.DateTimeField(auto_now_add=True, verbose_name="Geändert am")
+
+    class Meta:
+        verbose_name = "Preisänderung"
+        verbose_name_plural = "Preisänderungen"
+        ordering = ["-changed_at"]
+        indexes = [
+            models.Index(
+                fields=["product", "-changed_at"], name="price_hist_product_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.product_id}: {self.old_price_cents} → {self.new_price_cents} Cent"
+        )
+
+
+class ProductionCapacity(models.Model):
+    """Production capacity of a product for a single delivery day."""
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="capacities",
+        verbose_name="Produkt",
+    )
+    delivery_date = models.DateField(verbose_name="Liefertag")
+    capacity = models.IntegerField(
+        validators=[MinValueValidator(0)],
+        verbose_name="Kapazität",
+        help_text="Maximale Produktionsmenge für diesen Tag",
+    )
+    reserved = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)],
+        verbose_name="Reserviert",
+        help_text="Bereits durch aufgegebene Bestellungen reservierte Menge",
+    )
+
+    class Meta:
+        verbose_name = "Produktionskapazität"
+        verbose_name_plural = "Produktionskapazitäten"
+        ordering = ["delivery_date", "product__name"]
+        unique_together = ["product", "delivery_date"]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(reserved__gte=0) & Q(reserved__lte=F("capacity")),
+                name="capacity_reserved_within_bounds",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.product.name} am {self.delivery_date:%d.%m.%Y}: "
+            f"{self.reserved}/{self.capacity}"
+        )
+
+    @property
+    def remaining(self):
+        """Return the capacity that is still available."""
+        return max(self.capacity - self.reserved, 0)
+
+    @classmethod
+    def remaining_subquery(cls, delivery_date):
+        """Return an expression annotating products with their remaining capacity.
+
+        Products without a capacity row for the day are unlimited and annotate
+        to ``None``.
+        """
+        return Subquery(
+            cls.objects.filter(product=OuterRef("pk"), delivery_date=delivery_date)
+            .annotate(remaining=F("capacity") - F("reserved"))
+            .values("remaining")[:1]
+        )
+
+    @classmethod
+    def remaining_for(cls, delivery_date, product_ids):
+        """Return ``{product_id: remaining}`` for constrained products of a day.
+
+        Products without a capacity row are unlimited and missing from the
+        result.
+        """
+        return {
+            product_id: max(remaining, 0)
+            for product_id, remaining in cls.objects.filter(
+                delivery_date=delivery_date, product_id__in=product_ids
+            ).values_list("product_id", F("capacity") - F("reserved"))
+        }
+
+    @classmethod
+    def reserve(cls, delivery_date, quantities):
+        """Reserve capacity for ``{product_id: quantity}`` on a delivery day.
+
+        Each constrained product is reserved with a single conditional UPDATE,
+        so concurrent checkouts can never push ``reserved`` above ``capacity``.
+        Must be called inside a transaction so a failed reservation rolls back
+        the ones made before it.
+        """
+        constrained = cls.objects.filter(
+            delivery_date=delivery_date, product_id__in=quantities
+        ).values_list("product_id", flat=True)
+
+        for product_id in sorted(constrained):
+            quantity = quantities[product_id]
+            updated = cls.objects.filter(
+                product_id=product_id,
+                delivery_date=delivery_date,
+                reserved__lte=F("capacity") - quantity,
+            ).update(reserved=F("reserved") + quantity)
+
+            if not updated:
+                capacity = cls.objects.select_related("product").get(
+                    product_id=product_id, delivery_date=delivery_date
+                )
+                raise CapacityExceeded(
+                    f"Tageskapazität für {capacity.product.name} am "
+                    f"{delivery_date:%d.%m.%Y} erschöpft "
+                    f"(noch {capacity.remaining} verfügbar)."
+                )
+
+    @classmethod
+    def release(cls, delivery_date, quantities):
+        """Give back capacity previously reserved for ``{product_id: quantity}``."""
+        for product_id, quantity in sorted(quantities.items()):
+            cls.objects.filter(
+                product_id=product_id, delivery_date=delivery_date
+            ).update(reserved=Greatest(F("reserved") - quantity, 0))
+
+
+class OrderManager(models.Manager):
+    """Manager for orders."""
+
+    def get_cart(self, user):
+        """Return the user's draft order (cart), creating it if needed.
+
+        A partial unique constraint allows one draft per user. The insert
+        ignores conflicts (``ON CONFLICT DO NOTHING``), so parallel requests
+        never create a second draft or fail; they all read the same row.
+        """
+        try:
+            return self.get(user=user, status="DRAFT")
+        except self.model.DoesNotExist:
+            pass
+
+        self.bulk_create([self.model(user=user, status="DRAFT")], ignore_conflicts=True)
+        return self.get(user=user, status="DRAFT")
+
+
 class Order(models.Model):
     """Order model for customer orders."""
 
@@ -170,19 +394,63 @@ class Order(models.Model):
     placed_at = models.DateTimeField(
         blank=True, null=True, verbose_name="Aufgegeben am"
     )
+    delivery_date = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name="Liefertag",
+        help_text="Tag, für den Produktionskapazität reserviert wurde",
+    )
     exported_at = models.DateTimeField(
         blank=True, null=True, verbose_name="Exportiert am"
     )
     external_export_id = models.CharField(
         max_length=100, blank=True, null=True, verbose_name="Externe Export-ID"
     )
+    item_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Positionen",
+        help_text="Anzahl der Bestellpositionen",
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Version",
+        help_text="Wird bei jeder Änderung erhöht (optimistische Sperre)",
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Erstellt am")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Aktualisiert am")
 
+    objects = OrderManager()
+
     class Meta:
         verbose_name = "Bestellung"
         verbose_name_plural = "Bestellungen"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="order_user_created_idx"
+            ),
+            # Cart lookups (user, status), order history and cost overview
+            # (user, status, placed_at range)
+            models.Index(
+                fields=["user", "status", "-placed_at"],
+                name="order_user_status_placed_idx",
+            ),
+            # Admin date hierarchy and placed_at ranges across all customers
+            models.Index(fields=["-placed_at"], name="order_placed_at_idx"),
+            # Orders waiting for export; stays small as orders get exported
+            models.Index(
+                fields=["placed_at"],
+                condition=Q(status="PLACED", exported_at__isnull=True),
+                name="order_export_pending_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=Q(status="DRAFT"),
+                name="order_one_draft_per_user",
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -236,42 +504,173 @@ class Order(models.Model):
         """Same as editable - can cancel before cutoff."""
         return self.is_editable
 
-    def calculate_total(self):
-        """Calculate and update order total from items and delivery fee."""
-        items_total = sum(
-            item.quantity * item.unit_price_cents for item in self.items.all()
+    @staticmethod
+    def next_delivery_date(now=None):
+        """Return the earliest delivery day for an order placed at ``now``.
+
+        Production for the next day starts at the 22:00 cutoff, so orders
+        placed after 22:00 are delivered the day after next.
+        """
+        from datetime import timedelta
+
+        now = timezone.localtime(now)
+        days = 2 if now.hour >= 22 else 1
+        return (now + timedelta(days=days)).date()
+
+    def resolve_delivery_date(self):
+        """Return the delivery day this order reserves capacity for."""
+        earliest = self.next_delivery_date()
+        if self.desired_time:
+            desired = timezone.localtime(self.desired_time).date()
+            if desired > earliest:
+                return desired
+        return earliest
+
+    # Allowed source states per target state. Customers are further limited
+    # by place_order/cancel_order; staff may also un-export (EXPORTED ->
+    # PLACED) and cancel exported orders.
+    TRANSITIONS = {
+        "PLACED": ("DRAFT", "EXPORTED"),
+        "CANCELLED": ("DRAFT", "PLACED", "EXPORTED"),
+        "EXPORTED": ("PLACED",),
+    }
+
+    def save_versioned(self, **values):
+        """Write ``values`` only if the order is unchanged since it was loaded.
+
+        Runs a single ``UPDATE ... WHERE id = %s AND version = %s`` that also
+        bumps the version, so no row lock is held between reading and
+        writing. Raises ``StaleOrderError`` if another request won.
+        """
+        if not self._update_if_current(Order.objects.filter(pk=self.pk), values):
+            raise StaleOrderError()
+
+    def transition(self, to_state, **values):
+        """Move the order to ``to_state`` and return whether this call won.
+
+        The transition is one ``UPDATE ... WHERE id = %s AND status = %s AND
+        version = %s``; of several concurrent transitions exactly one matches
+        a row. ``values`` may contain SQL expressions such as
+        ``total_expressions()``.
+        """
+        if self.status not in self.TRANSITIONS[to_state]:
+            raise ValueError(f"Order cannot change from {self.status} to {to_state}")
+
+        from_status = self.status
+        won = self._update_if_current(
+            Order.objects.filter(pk=self.pk, status=from_status),
+            dict(values, status=to_state),
         )
-        self.total_cents = items_total
+        if won:
+            OrderEvent.objects.create(
+                order=self, from_status=from_status, to_status=to_state
+            )
+            DailySales.record_transition([(self.pk, from_status)], to_state)
+        return won
+
+    def _update_if_current(self, queryset, values):
+        """Update ``queryset`` at this order's version and bump the version."""
+        values["updated_at"] = timezone.now()
+        updated = queryset.filter(version=self.version).update(
+            version=F("version") + 1, **values
+        )
+        if not updated:
+            return False
 
-        # Set delivery fee from user's default if delivery type is DELIVERY
-        if self.delivery_type == "DELIVERY" and self.user:
-            self.delivery_fee_cents = self.user.delivery_fee_cents
-        else:
-            self.delivery_fee_cents = 0
+        expressions = []
+        for name, value in values.items():
+            if hasattr(value, "resolve_expression"):
+                expressions.append(name)
+            else:
+                setattr(self, name, value)
+        self.version += 1
+        if expressions:
+            self.refresh_from_db(fields=expressions)
+        return True
+
+    def _lost_transition(self, action):
+        """Return the error for a transition that another request won."""
+        current = (
+            Order.objects.filter(pk=self.pk).values_list("status", flat=True).first()
+        )
+        if current != self.status:
+            return ValueError(f"Order cannot be {action}. Current status: {current}")
+        return StaleOrderError()
+
+    @staticmethod
+    def total_expressions():
+        """Return SQL expressions for the order's aggregate columns.
+
+        They compute ``total_cents`` and ``item_count`` from the items and
+        ``delivery_fee_cents`` from the customer inside an ``UPDATE`` of
+        orders, without loading any rows.
+        """
+        items = OrderItem.objects.filter(order=OuterRef("pk")).values("order")
+        items_total = items.annotate(
+            total=Sum(F("quantity") * F("unit_price_cents"))
+        ).values("total")
+        items_count = items.annotate(count=Count("pk")).values("count")
+        user_fee = CustomUser.objects.filter(pk=OuterRef("user_id")).values(
+            "delivery_fee_cents"
+        )
+        return {
+            "total_cents": Coalesce(Subquery(items_total), 0),
+            "item_count": Coalesce(Subquery(items_count), 0),
+            "delivery_fee_cents": Case(
+                When(delivery_type="DELIVERY", then=Subquery(user_fee)),
+                default=Value(0),
+            ),
+        }
 
-        self.save(update_fields=["total_cents", "delivery_fee_cents"])
+    def calculate_total(self):
+        """Update order total, item count and delivery fee from the items."""
+        self.save_versioned(**self.total_expressions())
         return self.grand_total_cents
 
     def place_order(self):
-        """Place the order (change status from DRAFT to PLACED)."""
+        """Place the order (change status from DRAFT to PLACED).
+
+        Reserving capacity and the status change run in one transaction; if
+        another request placed or changed the order first, the reservation
+        is rolled back and ``ValueError``/``StaleOrderError`` is raised.
+        """
         if self.status != "DRAFT":
             raise ValueError(f"Order cannot be placed. Current status: {self.status}")
 
-        if not self.items.exists():
-            raise ValueError("Order has no items")
+        with transaction.atomic():
+            quantities = dict(self.items.values_list("product_id", "quantity"))
+            if not quantities:
+                raise ValueError("Order has no items")
 
-        self.calculate_total()
-        self.status = "PLACED"
-        self.placed_at = timezone.now()
-        self.save(update_fields=["status", "placed_at"])
+            delivery_date = self.resolve_delivery_date()
+            ProductionCapacity.reserve(delivery_date, quantities)
+
+            won = self.transition(
+                "PLACED",
+                placed_at=timezone.now(),
+                delivery_date=delivery_date,
+                **self.total_expressions(),
+            )
+            if not won:
+                raise self._lost_transition("placed")
+        return True
 
     def cancel_order(self):
-        """Cancel the order."""
+        """Cancel the order and release its reserved production capacity."""
         if self.status == "EXPORTED":
             raise ValueError("Exported orders cannot be cancelled")
 
-        self.status = "CANCELLED"
-        self.save(update_fields=["status"])
+        with transaction.atomic():
+            was_placed = self.status == "PLACED"
+            if not self.transition("CANCELLED"):
+                raise self._lost_transition("cancelled")
+
+            if was_placed and self.delivery_date:
+                ProductionCapacity.release(
+                    self.delivery_date,
+                    dict(self.items.values_list("product_id", "quantity")),
+                )
+        return True
 
 
 class OrderItem(models.Model):
@@ -291,6 +690,18 @@ class OrderItem(models.Model):
         verbose_name="Einzelpreis (Cent)",
         help_text="Preis zum Zeitpunkt der Bestellung",
     )
+    sku = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name="SKU",
+        help_text="SKU zum Zeitpunkt der Bestellung",
+    )
+    product_name = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="Produktname",
+        help_text="Produktname zum Zeitpunkt der Bestellung",
+    )
 
     class Meta:
         verbose_name = "Bestellposition"
@@ -298,7 +709,7 @@ class OrderItem(models.Model):
         unique_together = ["order", "product"]
 
     def __str__(self):
-        return f"{self.quantity}x {self.product.name}"
+        return f"{self.quantity}x {self.product_name}"
 
     @property
     def unit_price_euro(self):
@@ -321,13 +732,18 @@ class OrderItem(models.Model):
 
         if self.quantity > self.product.max_per_order:
             raise ValidationError(
-                f"Menge überschreitet Maximum von {self.product.max_per_order} für {self.product.name}"
+                f"Menge überschreitet Maximum von {self.product.max_per_order} "
+                f"für {self.product.name}"
             )
 
     def save(self, *args, **kwargs):
-        """Save and snapshot the product price if not set."""
+        """Save and snapshot the product price, SKU and name if not set."""
         if not self.unit_price_cents:
             self.unit_price_cents = self.product.price_cents
+        if not self.sku:
+            self.sku = self.product.sku
+        if not self.product_name:
+            self.product_name = self.product.name
         self.full_clean()
         super().save(*args, **kwargs)
 
@@ -367,11 +783,306 @@ class OrderChangeRequest(models.Model):
         verbose_name = "Änderungsanfrage"
         verbose_name_plural = "Änderungsanfragen"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["order", "status"], name="changerequest_order_status_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_request_type_display()} für Bestellung #{self.order.id} - {self.get_status_display()}"
 
 
+class OrderEvent(models.Model):
+    """Append-only audit record of an order status change."""
+
+    SOURCE_CHOICES = [
+        ("APP", "Shop/API"),
+        ("ADMIN", "Admin"),
+        ("COMMAND", "Kommando"),
+        ("EXPORT", "Export"),
+    ]
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="events",
+        verbose_name="Bestellung",
+    )
+    from_status = models.CharField(
+        max_length=20, choices=Order.STATUS_CHOICES, verbose_name="Von Status"
+    )
+    to_status = models.CharField(
+        max_length=20, choices=Order.STATUS_CHOICES, verbose_name="Nach Status"
+    )
+    source = models.CharField(
+        max_length=10, choices=SOURCE_CHOICES, default="APP", verbose_name="Quelle"
+    )
+    actor = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Ausgeführt von",
+    )
+    note = models.CharField(max_length=255, blank=True, verbose_name="Notiz")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Zeitpunkt")
+
+    class Meta:
+        verbose_name = "Bestellereignis"
+        verbose_name_plural = "Bestellereignisse"
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["order", "created_at"], name="orderevent_order_idx"),
+        ]
+
+    def __str__(self):
+        return f"Bestellung #{self.order_id}: {self.from_status} → {self.to_status}"
+
+
+class ArchivedOrder(models.Model):
+    """Compact, read-only copy of an old exported or cancelled order.
+
+    Written by the ``archive_orders`` command, which deletes the live order
+    afterwards. The id is the original order id. Items and status history
+    are stored denormalized as JSON (SKU, product name and price inlined), so
+    archived orders do not depend on products or other live rows.
+    """
+
+    id = models.BigIntegerField(primary_key=True, verbose_name="Bestellnummer")
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="archived_orders",
+        verbose_name="Benutzer",
+    )
+    status = models.CharField(
+        max_length=20, choices=Order.STATUS_CHOICES, verbose_name="Status"
+    )
+    delivery_type = models.CharField(
+        max_length=20, choices=Order.DELIVERY_TYPE_CHOICES, verbose_name="Lieferart"
+    )
+    delivery_address = models.TextField(blank=True, verbose_name="Lieferadresse")
+    total_cents = models.IntegerField(verbose_name="Gesamt (Cent)")
+    delivery_fee_cents = models.IntegerField(verbose_name="Lieferkosten (Cent)")
+    items = models.JSONField(
+        default=list,
+        encoder=DjangoJSONEncoder,
+        verbose_name="Artikel",
+        help_text="Liste aus sku, name, quantity, unit_price_cents",
+    )
+    history = models.JSONField(
+        default=list,
+        encoder=DjangoJSONEncoder,
+        verbose_name="Statusverlauf",
+        help_text="Liste aus from_status, to_status, source, created_at",
+    )
+    created_at = models.DateTimeField(verbose_name="Erstellt am")
+    placed_at = models.DateTimeField(
+        blank=True, null=True, verbose_name="Aufgegeben am"
+    )
+    delivery_date = models.DateField(blank=True, null=True, verbose_name="Liefertag")
+    exported_at = models.DateTimeField(
+        blank=True, null=True, verbose_name="Exportiert am"
+    )
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Archiviert am")
+
+    class Meta:
+        verbose_name = "Archivierte Bestellung"
+        verbose_name_plural = "Archivierte Bestellungen"
+        ordering = ["-placed_at", "-id"]
+        indexes = [
+            models.Index(
+                fields=["user", "-placed_at"], name="archivedorder_user_placed_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Archivierte Bestellung #{self.id} ({self.get_status_display()})"
+
+    @property
+    def total_euro(self):
+        """Return total in Euro."""
+        return self.total_cents / 100
+
+    @property
+    def grand_total_euro(self):
+        """Return total including delivery fee in Euro."""
+        return (self.total_cents + self.delivery_fee_cents) / 100
+
+    @property
+    def item_lines(self):
+        """Return the items with unit price and subtotal in Euro."""
+        return [
+            {
+                **item,
+                "unit_price_euro": item["unit_price_cents"] / 100,
+                "subtotal_euro": item["quantity"] * item["unit_price_cents"] / 100,
+            }
+            for item in self.items
+        ]
+
+
+class DailySales(models.Model):
+    """Sold quantity and revenue per day, customer and SKU.
+
+    A rollup of the items of placed and exported orders, keyed by the day the
+    order was placed. Status transitions add or subtract their orders
+    incrementally; ``rebuild_rollups`` recomputes a date range from the live
+    and archived orders. Reports read only from this table.
+    """
+
+    # Orders in these statuses count as sales
+    SALES_STATUSES = ("PLACED", "EXPORTED")
+    # First key of the per-day advisory locks (see lock_days)
+    LOCK_KEY = 4813
+
+    date = models.DateField(verbose_name="Tag")
+    # Covered by dailysales_customer_idx
+    customer = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+        db_index=False,
+        verbose_name="Kunde",
+    )
+    sku = models.CharField(max_length=50, verbose_name="SKU")
+    quantity = models.IntegerField(default=0, verbose_name="Menge")
+    revenue_cents = models.BigIntegerField(default=0, verbose_name="Umsatz (Cent)")
+
+    class Meta:
+        verbose_name = "Tagesumsatz"
+        verbose_name_plural = "Tagesumsätze"
+        ordering = ["-date", "customer", "sku"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "customer", "sku"], name="dailysales_unique_key"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["customer", "date"], name="dailysales_customer_idx"),
+            models.Index(fields=["sku", "date"], name="dailysales_sku_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date:%d.%m.%Y} {self.customer_id} {self.sku}: {self.quantity}"
+
+    @property
+    def revenue_euro(self):
+        """Return revenue in Euro."""
+        return self.revenue_cents / 100
+
+    @classmethod
+    def sign(cls, from_status, to_status):
+        """Return +1, -1 or 0 for how a transition changes an order's sales."""
+        return int(to_status in cls.SALES_STATUSES) - int(
+            from_status in cls.SALES_STATUSES
+        )
+
+    @classmethod
+    def record_transition(cls, rows, to_status):
+        """Apply status changes ``[(order_id, from_status)]`` to the rollup."""
+        by_sign = {1: [], -1: []}
+        for order_id, from_status in rows:
+            sign = cls.sign(from_status, to_status)
+            if sign:
+                by_sign[sign].append(order_id)
+
+        totals_by_sign = {
+            sign: cls.aggregate_items(OrderItem.objects.filter(order_id__in=order_ids))
+            for sign, order_ids in by_sign.items()
+            if order_ids
+        }
+        cls.lock_days(
+            (day for totals in totals_by_sign.values() for day, _, _ in totals),
+            shared=True,
+        )
+        for sign, totals in totals_by_sign.items():
+            cls.increment(totals, sign)
+
+    @classmethod
+    def lock_days(cls, days, shared=False):
+        """Lock rollup days until the end of the transaction (PostgreSQL).
+
+        Transitions lock the days they change in shared mode, a rebuild locks
+        its range exclusively, so no increment can land between the rebuild's
+        read of a day and its rewrite. Days are locked in order to rule out
+        deadlocks. Other databases allow only one writer anyway.
+        """
+        if connection.vendor != "postgresql":
+            return
+        function = "pg_advisory_xact_lock_shared" if shared else "pg_advisory_xact_lock"
+        with connection.cursor() as cursor:
+            for day in sorted(set(days)):
+                cursor.execute(
+                    f"SELECT {function}(%s, %s)", [cls.LOCK_KEY, day.toordinal()]
+                )
+
+    @staticmethod
+    def aggregate_items(items):
+        """Return ``{(date, customer_id, sku): [quantity, revenue_cents]}``.
+
+        ``items`` is an ``OrderItem`` queryset; items of orders that were
+        never placed are skipped. The day is the local date of ``placed_at``.
+        """
+        rows = (
+            items.filter(order__placed_at__isnull=False)
+            .values(
+                "sku",
+                day=TruncDate("order__placed_at"),
+                customer_id=F("order__user_id"),
+            )
+            .annotate(
+                sold=Sum("quantity"),
+                revenue=Sum(F("quantity") * F("unit_price_cents")),
+            )
+            .order_by()
+        )
+        return {
+            (row["day"], row["customer_id"], row["sku"]): [row["sold"], row["revenue"]]
+            for row in rows
+        }
+
+    @classmethod
+    def increment(cls, totals, sign=1, batch_size=100):
+        """Add ``sign`` times ``totals`` (see ``aggregate_items``) to the rollup.
+
+        Runs ``INSERT ... ON CONFLICT DO UPDATE SET quantity = quantity +
+        excluded.quantity`` per batch, so concurrent transitions on the same
+        key add up instead of overwriting each other.
+        """
+        qn = connection.ops.quote_name
+        table = qn(cls._meta.db_table)
+        columns = ["date", "customer_id", "sku", "quantity", "revenue_cents"]
+        rows = [
+            (
+                connection.ops.adapt_datefield_value(day),
+                customer_id,
+                sku,
+                sign * quantity,
+                sign * revenue,
+            )
+            for (day, customer_id, sku), (quantity, revenue) in totals.items()
+        ]
+
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start : start + batch_size]
+                placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(batch))
+                cursor.execute(
+                    f"INSERT INTO {table} ({', '.join(map(qn, columns))}) "
+                    f"VALUES {placeholders} "
+                    f"ON CONFLICT ({qn('date')}, {qn('customer_id')}, {qn('sku')}) "
+                    f"DO UPDATE SET "
+                    f"{qn('quantity')} = {table}.{qn('quantity')} "
+                    f"+ EXCLUDED.{qn('quantity')}, "
+                    f"{qn('revenue_cents')} = {table}.{qn('revenue_cents')} "
+                    f"+ EXCLUDED.{qn('revenue_cents')}",
+                    [value for row in batch for value in row],
+                )
+
+
 class ExportLog(models.Model):
     """Log of export operations to Access database."""
 
@@ -393,6 +1104,45 @@ class ExportLog(models.Model):
         verbose_name = "Export-Log"
         verbose_name_plural = "Export-Logs"
         ordering = ["-run_at"]
+        indexes = [
+            models.Index(fields=["-run_at", "-id"], name="exportlog_run_at_idx"),
+        ]
 
     def __str__(self):
         return f"Export {self.run_at.strftime('%Y-%m-%d %H:%M')} - {self.get_status_display()} ({self.orders_exported} Bestellungen)"
+
+
+class IdempotencyKey(models.Model):
+    """Stored API response for a client-supplied ``Idempotency-Key``.
+
+    The row is created before the request is processed; ``status_code`` stays
+    empty until the response is known, which marks the key as in progress.
+    """
+
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+        verbose_name="Benutzer",
+    )
+    key = models.CharField(max_length=255, verbose_name="Schlüssel")
+    method = models.CharField(max_length=10, verbose_name="Methode")
+    path = models.CharField(max_length=255, verbose_name="Pfad")
+    status_code = models.PositiveSmallIntegerField(
+        null=True, blank=True, verbose_name="Statuscode"
+    )
+    response_body = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Antwort"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Erstellt am")
+
+    class Meta:
+        verbose_name = "Idempotenz-Schlüssel"
+        verbose_name_plural = "Idempotenz-Schlüssel"
+        unique_together = ["user", "key"]
+        indexes = [
+            models.Index(fields=["created_at"], name="idempotency_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.key})"
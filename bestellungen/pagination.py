@@ -0,0 +1,66 @@
+"""
+Pagination classes for the bestellungen API and admin.
+"""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+
+class OrderCursorPagination(CursorPagination):
+    """Keyset pagination over (created_at, id), newest first.
+
+    Unlike page-number pagination there is no COUNT(*) and no OFFSET scan;
+    each page is a range scan on the matching composite index.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-created_at", "-id")
+
+
+class ExportLogCursorPagination(CursorPagination):
+    """Keyset pagination over (run_at, id), newest first."""
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-run_at", "-id")
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin paginator that estimates the size of large unfiltered tables.
+
+    An exact ``COUNT(*)`` scans the whole table on PostgreSQL. For querysets
+    without filters the planner's row estimate (``pg_class.reltuples``) is
+    used instead once it exceeds ``estimate_above``; filtered querysets and
+    other databases are counted exactly.
+    """
+
+    estimate_above = 100_000
+
+    @cached_property
+    def count(self):
+        """Return the estimated or exact number of objects."""
+        estimate = self.estimated_count()
+        if estimate is not None and estimate > self.estimate_above:
+            return estimate
+        return super().count
+
+    def estimated_count(self):
+        """Return the planner's row estimate, or None if it does not apply."""
+        query = getattr(self.object_list, "query", None)
+        if query is None or query.where:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [self.object_list.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
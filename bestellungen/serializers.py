@@ -5,11 +5,46 @@ Serializers for the bestellungen API.
 from django.conf import settings
 from django.contrib.auth import authenticate
 from django.core.mail import send_mail
+from django.db import transaction
 from rest_framework import serializers
 
 from .models import CustomUser, ExportLog, Order, OrderItem, Product
 
 
+def selected_fields(request, fields, expandable=()):
+    """Return the fields selected by ``?fields=`` and ``?expand=``.
+
+    Returns None when no ``fields`` parameter is given, meaning the full
+    representation. Expandable (nested) fields are only included when they
+    are listed in ``fields`` or ``expand``. ``id`` is always included.
+    """
+    if request is None or not request.query_params.get("fields"):
+        return None
+
+    def split(name):
+        return {
+            value.strip() for value in request.query_params.get(name, "").split(",")
+        }
+
+    selected = (split("fields") | (split("expand") & set(expandable))) & set(fields)
+    return selected | {"id"}
+
+
+class SparseFieldsMixin:
+    """Serializer mixin that drops fields not selected via ``?fields=``."""
+
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = selected_fields(
+            self.context.get("request"), self.Meta.fields, self.expandable_fields
+        )
+        if selected is not None:
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration."""
 
@@ -115,12 +150,13 @@ class LoginSerializer(serializers.Serializer):
         return data
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Product model."""
 
     price_euro = serializers.DecimalField(
         max_digits=10, decimal_places=2, read_only=True
     )
+    remaining_capacity = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -133,17 +169,22 @@ class ProductSerializer(serializers.ModelSerializer):
             "price_euro",
             "available",
             "max_per_order",
+            "remaining_capacity",
             "created_at",
             "updated_at",
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
 
+    def get_remaining_capacity(self, obj):
+        """Return remaining capacity for the requested day (None = unlimited)."""
+        remaining = getattr(obj, "remaining_capacity", None)
+        return None if remaining is None else max(remaining, 0)
+
 
 class OrderItemSerializer(serializers.ModelSerializer):
     """Serializer for OrderItem model."""
 
-    product_name = serializers.CharField(source="product.name", read_only=True)
-    product_sku = serializers.CharField(source="product.sku", read_only=True)
+    product_sku = serializers.CharField(source="sku", read_only=True)
     subtotal_cents = serializers.IntegerField(read_only=True)
     subtotal_euro = serializers.DecimalField(
         max_digits=10, decimal_places=2, read_only=True
@@ -161,7 +202,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
             "subtotal_cents",
             "subtotal_euro",
         ]
-        read_only_fields = ["id", "unit_price_cents"]
+        read_only_fields = ["id", "product_name", "unit_price_cents"]
 
 
 class OrderItemCreateSerializer(serializers.Serializer):
@@ -196,9 +237,11 @@ class OrderItemCreateSerializer(serializers.Serializer):
         return data
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Order model."""
 
+    expandable_fields = ("items",)
+
     items = OrderItemSerializer(many=True, read_only=True)
     user_email = serializers.EmailField(source="user.email", read_only=True)
     total_euro = serializers.DecimalField(
@@ -214,10 +257,12 @@ class OrderSerializer(serializers.ModelSerializer):
             "status",
             "total_cents",
             "total_euro",
+            "item_count",
             "placed_at",
             "exported_at",
             "created_at",
             "updated_at",
+            "version",
             "items",
         ]
         read_only_fields = [
@@ -225,10 +270,12 @@ class OrderSerializer(serializers.ModelSerializer):
             "user",
             "status",
             "total_cents",
+            "item_count",
             "placed_at",
             "exported_at",
             "created_at",
             "updated_at",
+            "version",
         ]
 
 
@@ -246,27 +293,37 @@ class OrderCreateSerializer(serializers.Serializer):
         return value
 
     def create(self, validated_data):
-        """Create order with items."""
+        """Add items to the user's draft order (there is one per user)."""
         items_data = validated_data.pop("items")
         user = self.context["request"].user
 
-        # Create order
-        order = Order.objects.create(user=user, status="DRAFT")
+        order = Order.objects.get_cart(user)
+
+        # Items and totals are written together; a concurrent cart change
+        # (StaleOrderError) rolls back the items as well
+        with transaction.atomic():
+            self._add_items(order, items_data)
+            order.calculate_total()
+
+        return order
 
-        # Create order items
+    def _add_items(self, order, items_data):
+        """Add items to ``order``, merging with items already in the cart."""
         for item_data in items_data:
             product = Product.objects.get(sku=item_data["sku"])
-            OrderItem.objects.create(
+            order_item, created = OrderItem.objects.get_or_create(
                 order=order,
                 product=product,
-                quantity=item_data["quantity"],
-                unit_price_cents=product.price_cents,
+                defaults={
+                    "quantity": item_data["quantity"],
+                    "unit_price_cents": product.price_cents,
+                },
             )
-
-        # Calculate total
-        order.calculate_total()
-
-        return order
+            if not created:
+                order_item.quantity = min(
+                    order_item.quantity + item_data["quantity"], product.max_per_order
+                )
+                order_item.save()
 
 
 class ExportLogSerializer(serializers.ModelSerializer):
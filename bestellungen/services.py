@@ -0,0 +1,311 @@
+"""
+Set-based operations on many orders at once.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    ArchivedOrder,
+    DailySales,
+    Order,
+    OrderEvent,
+    OrderItem,
+    ProductionCapacity,
+)
+
+# Statuses whose orders hold reserved production capacity
+RESERVING_STATUSES = ("PLACED", "EXPORTED")
+
+# Final statuses; only these orders are archived
+ARCHIVABLE_STATUSES = ("EXPORTED", "CANCELLED")
+
+# Transitions allowed in bulk. Placing a draft needs place_order() (placed
+# time, totals, capacity, rollup), so PLACED only undoes an export here.
+BULK_TRANSITIONS = dict(Order.TRANSITIONS, PLACED=("EXPORTED",))
+
+
+def bulk_transition(
+    queryset,
+    from_states,
+    to_state,
+    actor=None,
+    source="ADMIN",
+    note="",
+    chunk_size=1000,
+    **values,
+):
+    """Move all orders of ``queryset`` in ``from_states`` to ``to_state``.
+
+    Works in chunks of ``chunk_size`` orders, each in its own transaction:
+    the chunk is locked (``SELECT ... FOR UPDATE``), moved with one
+    ``UPDATE`` that also bumps the version, and recorded with one
+    ``bulk_create`` of ``OrderEvent`` rows. The sales rollup is updated in
+    the same transaction and cancelling releases reserved production
+    capacity. Drafts cannot be placed in bulk (see ``BULK_TRANSITIONS``).
+    Returns the ids of the transitioned orders.
+    """
+    from_states = tuple(from_states)
+    invalid = set(from_states) - set(BULK_TRANSITIONS[to_state])
+    if invalid:
+        raise ValueError(
+            f"Orders cannot change from {', '.join(sorted(invalid))} to {to_state}"
+        )
+
+    queryset = queryset.filter(status__in=from_states).order_by("pk")
+    transitioned = []
+    last_pk = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                queryset.filter(pk__gt=last_pk)
+                .select_for_update()
+                .values_list("pk", "status")[:chunk_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            ids = [pk for pk, _ in rows]
+
+            now = timezone.now()
+            Order.objects.filter(pk__in=ids).update(
+                status=to_state, updated_at=now, version=F("version") + 1, **values
+            )
+            OrderEvent.objects.bulk_create(
+                OrderEvent(
+                    order_id=pk,
+                    from_status=status,
+                    to_status=to_state,
+                    source=source,
+                    actor=actor,
+                    note=note,
+                )
+                for pk, status in rows
+            )
+
+            DailySales.record_transition(rows, to_state)
+
+            if to_state == "CANCELLED":
+                release_capacity(
+                    [pk for pk, status in rows if status in RESERVING_STATUSES]
+                )
+
+        transitioned.extend(ids)
+
+    return transitioned
+
+
+def drifted_orders(queryset):
+    """Return the orders of ``queryset`` whose stored totals differ from their items.
+
+    Compares ``total_cents``, ``item_count`` and ``delivery_fee_cents`` with
+    ``Order.total_expressions()`` in the ``WHERE`` clause.
+    """
+    return queryset.exclude(**Order.total_expressions())
+
+
+def recalculate_totals(queryset, chunk_size=1000):
+    """Recompute the totals of all orders of ``queryset`` from their items.
+
+    Works in primary key chunks of ``chunk_size`` orders. Each chunk is one
+    ``UPDATE`` with correlated subqueries that rewrites only drifted orders
+    and bumps their version, so unchanged orders keep their version. Returns
+    the number of corrected orders.
+    """
+    queryset = queryset.order_by("pk")
+    corrected = 0
+    last_pk = 0
+
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_pk).values_list("pk", flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+        corrected += drifted_orders(Order.objects.filter(pk__in=ids)).update(
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+            **Order.total_expressions(),
+        )
+        last_pk = ids[-1]
+
+    return corrected
+
+
+def release_capacity(order_ids):
+    """Release the production capacity reserved by ``order_ids``."""
+    if not order_ids:
+        return
+
+    quantities = defaultdict(dict)
+    rows = (
+        OrderItem.objects.filter(
+            order_id__in=order_ids, order__delivery_date__isnull=False
+        )
+        .values("order__delivery_date", "product_id")
+        .annotate(quantity=Sum("quantity"))
+        .order_by()
+    )
+    for row in rows:
+        quantities[row["order__delivery_date"]][row["product_id"]] = row["quantity"]
+
+    for delivery_date, per_product in quantities.items():
+        ProductionCapacity.release(delivery_date, per_product)
+
+
+def archivable_orders(cutoff):
+    """Return final orders placed (or, if never placed, created) before ``cutoff``."""
+    return Order.objects.filter(
+        Q(placed_at__lt=cutoff) | Q(placed_at__isnull=True, created_at__lt=cutoff),
+        status__in=ARCHIVABLE_STATUSES,
+    )
+
+
+def archive_orders(queryset, chunk_size=1000):
+    """Move the final orders of ``queryset`` into ``ArchivedOrder``.
+
+    Each chunk is one transaction: the orders are locked, copied with one
+    ``bulk_create`` (items and status history inlined as JSON) and deleted
+    together with their items, events and change requests. Returns the
+    number of archived orders.
+    """
+    queryset = queryset.filter(status__in=ARCHIVABLE_STATUSES).order_by("pk")
+    archived = 0
+    last_pk = 0
+
+    while True:
+        with transaction.atomic():
+            orders = list(
+                queryset.filter(pk__gt=last_pk)
+                .select_for_update()
+                .values()[:chunk_size]
+            )
+            if not orders:
+                break
+            last_pk = orders[-1]["id"]
+            ids = [order["id"] for order in orders]
+
+            items = defaultdict(list)
+            for item in (
+                OrderItem.objects.filter(order_id__in=ids)
+                .order_by("pk")
+                .values(
+                    "order_id",
+                    "sku",
+                    "quantity",
+                    "unit_price_cents",
+                    name=F("product_name"),
+                )
+            ):
+                items[item.pop("order_id")].append(item)
+
+            history = defaultdict(list)
+            for event in (
+                OrderEvent.objects.filter(order_id__in=ids)
+                .order_by("created_at", "pk")
+                .values("order_id", "from_status", "to_status", "source", "created_at")
+            ):
+                history[event.pop("order_id")].append(event)
+
+            # ignore_conflicts makes a re-run after a partial failure harmless
+            ArchivedOrder.objects.bulk_create(
+                (
+                    ArchivedOrder(
+                        id=order["id"],
+                        user_id=order["user_id"],
+                        status=order["status"],
+                        delivery_type=order["delivery_type"],
+                        delivery_address=format_address(order),
+                        total_cents=order["total_cents"],
+                        delivery_fee_cents=order["delivery_fee_cents"],
+                        items=items[order["id"]],
+                        history=history[order["id"]],
+                        created_at=order["created_at"],
+                        placed_at=order["placed_at"],
+                        delivery_date=order["delivery_date"],
+                        exported_at=order["exported_at"],
+                    )
+                    for order in orders
+                ),
+                ignore_conflicts=True,
+            )
+            Order.objects.filter(pk__in=ids).delete()
+
+        archived += len(ids)
+
+    return archived
+
+
+def format_address(order):
+    """Return the delivery address of an order values() row as text."""
+    if order["delivery_type"] != "DELIVERY":
+        return ""
+    lines = [
+        order["delivery_street"],
+        f"{order['delivery_postal_code']} {order['delivery_city']}".strip(),
+        order["delivery_phone"] and f"Tel: {order['delivery_phone']}",
+        order["delivery_notes"],
+    ]
+    return "\n".join(line for line in lines if line)
+
+
+def rebuild_daily_sales(start, end, dry_run=False):
+    """Recompute the ``DailySales`` rows for the days ``start`` to ``end``.
+
+    Runs in one transaction: the days of the range are locked against
+    transitions (see ``DailySales.lock_days``), the rows of the range are
+    deleted and written again from the items of live orders and the inlined
+    items of archived orders. Returns the number of rows.
+    """
+    since = timezone.make_aware(datetime.combine(start, time.min))
+    until = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+
+    with transaction.atomic():
+        # Transitions into or out of the range, including orders placed
+        # meanwhile, wait until the range is rebuilt
+        DailySales.lock_days(
+            start + timedelta(days=offset) for offset in range((end - start).days + 1)
+        )
+        orders = Order.objects.filter(
+            status__in=DailySales.SALES_STATUSES,
+            placed_at__gte=since,
+            placed_at__lt=until,
+        )
+        totals = DailySales.aggregate_items(OrderItem.objects.filter(order__in=orders))
+
+        archived = ArchivedOrder.objects.filter(
+            status__in=DailySales.SALES_STATUSES,
+            placed_at__gte=since,
+            placed_at__lt=until,
+        ).values_list("user_id", "placed_at", "items")
+        for customer_id, placed_at, items in archived:
+            day = timezone.localdate(placed_at)
+            for item in items:
+                total = totals.setdefault((day, customer_id, item["sku"]), [0, 0])
+                total[0] += item["quantity"]
+                total[1] += item["quantity"] * item["unit_price_cents"]
+
+        DailySales.objects.filter(date__gte=start, date__lte=end).delete()
+        DailySales.objects.bulk_create(
+            (
+                DailySales(
+                    date=day,
+                    customer_id=customer_id,
+                    sku=sku,
+                    quantity=quantity,
+                    revenue_cents=revenue,
+                )
+                for (day, customer_id, sku), (quantity, revenue) in totals.items()
+            ),
+            batch_size=1000,
+        )
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return len(totals)
@@ -0,0 +1,39 @@
+"""
+Signal handlers for the bestellungen app.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import evict_token
+from .cache import invalidate_catalog
+from .models import CustomUser, Product, ProductTombstone
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_on_product_change(sender, **kwargs):
+    """Drop cached catalog responses when a single product changes."""
+    invalidate_catalog()
+
+
+@receiver(post_delete, sender=Product)
+def record_product_tombstone(sender, instance, **kwargs):
+    """Remember deleted products so delta syncs can remove them."""
+    ProductTombstone.objects.create(product_id=instance.pk, sku=instance.sku)
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    """Revoke a cached token as soon as it is deleted (logout)."""
+    evict_token(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+def evict_tokens_on_user_change(sender, instance, created, **kwargs):
+    """Drop cached tokens of a changed user so deactivation applies immediately."""
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list("key", flat=True):
+        evict_token(key)
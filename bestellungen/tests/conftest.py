@@ -0,0 +1,14 @@
+"""
+Shared pytest fixtures.
+"""
+
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Isolate tests from cached catalog responses and counters."""
+    cache.clear()
+    yield
+    cache.clear()
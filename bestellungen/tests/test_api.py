@@ -2,12 +2,20 @@
 Tests for API views.
 """
 
+from datetime import date
+
 import pytest
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from bestellungen.models import CustomUser, Order, OrderItem, Product
+from bestellungen.models import (
+    CustomUser,
+    Order,
+    OrderItem,
+    Product,
+    ProductionCapacity,
+)
 
 
 @pytest.fixture
@@ -131,6 +139,37 @@ class TestProductAPI:
         assert response.status_code == status.HTTP_200_OK
         assert response.data["sku"] == "TEST-001"
         assert response.data["name"] == "Test Product"
+        assert response.data["remaining_capacity"] is None
+
+    def test_product_shows_remaining_capacity(self, api_client, product):
+        """Test that remaining capacity for the delivery day is exposed."""
+        delivery_date = Order.next_delivery_date()
+        ProductionCapacity.objects.create(
+            product=product, delivery_date=delivery_date, capacity=40, reserved=15
+        )
+
+        url = reverse("product-detail", kwargs={"sku": "TEST-001"})
+        response = api_client.get(url, {"delivery_date": delivery_date.isoformat()})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["remaining_capacity"] == 25
+
+    def test_cached_list_shows_current_capacity(self, api_client, product):
+        """Test that reservations show up although the list is cached."""
+        capacity = ProductionCapacity.objects.create(
+            product=product, delivery_date=Order.next_delivery_date(), capacity=10
+        )
+        url = reverse("product-list")
+        assert api_client.get(url).data["results"][0]["remaining_capacity"] == 10
+
+        ProductionCapacity.reserve(capacity.delivery_date, {product.id: 7})
+        response = api_client.get(url)
+
+        assert response.data["results"][0]["remaining_capacity"] == 3
+        only_sku = api_client.get(url, {"fields": "sku,remaining_capacity"})
+        assert only_sku.data["results"] == [
+            {"id": product.id, "sku": "TEST-001", "remaining_capacity": 3}
+        ]
 
 
 @pytest.mark.django_db
@@ -159,6 +198,29 @@ class TestOrderAPI:
         assert response.data["status"] == "DRAFT"
         assert len(response.data["items"]) == 1
 
+    def test_create_order_with_concurrent_cart_change(
+        self, api_client, user, product, monkeypatch
+    ):
+        """Test that a cart changed mid-request returns 409 and adds nothing."""
+        api_client.force_authenticate(user=user)
+        calculate_total = Order.calculate_total
+
+        def concurrent_change(order):
+            # Another request changes the cart after this one loaded it
+            Order.objects.filter(pk=order.pk).update(version=order.version + 1)
+            return calculate_total(order)
+
+        monkeypatch.setattr(Order, "calculate_total", concurrent_change)
+
+        response = api_client.post(
+            reverse("order-list"),
+            {"items": [{"sku": "TEST-001", "quantity": 2}]},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert not OrderItem.objects.exists()
+
     def test_place_order(self, api_client, user, product):
         """Test placing an order."""
         api_client.force_authenticate(user=user)
@@ -180,6 +242,23 @@ class TestOrderAPI:
         assert response.data["status"] == "PLACED"
         assert response.data["placed_at"] is not None
 
+    def test_place_order_with_stale_version(self, api_client, user, product):
+        """Test that placing an order changed since it was read returns 409."""
+        api_client.force_authenticate(user=user)
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        order.calculate_total()
+
+        url = reverse("order-place", kwargs={"pk": order.id})
+        response = api_client.post(url, {"version": 0}, format="json")
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert Order.objects.get(id=order.id).status == "DRAFT"
+
+        response = api_client.post(url, {"version": 1}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["version"] == 2
+
     def test_list_user_orders(self, api_client, user, product):
         """Test listing user's orders."""
         api_client.force_authenticate(user=user)
@@ -199,3 +278,723 @@ class TestOrderAPI:
 
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data["results"]) >= 1
+
+
+@pytest.mark.django_db
+class TestProductChangesAPI:
+    """Tests for the catalog delta feed."""
+
+    def test_changes_without_cursor_returns_catalog(self, api_client, product):
+        """Test that the first sync returns all available products."""
+        Product.objects.create(sku="OFF", name="Off", price_cents=1, available=False)
+
+        response = api_client.get(reverse("product-changes"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [p["sku"] for p in response.data["products"]] == ["TEST-001"]
+        assert response.data["deleted"] == []
+        assert response.data["cursor"]
+
+    def test_changes_since_cursor(self, api_client, product, settings):
+        """Test that only changed, unavailable and deleted products are returned."""
+        settings.CATALOG_CHANGES_OVERLAP_SECONDS = 0
+        unchanged = Product.objects.create(sku="SAME", name="Same", price_cents=1)
+        gone = Product.objects.create(sku="GONE", name="Gone", price_cents=1)
+        cursor = api_client.get(reverse("product-changes")).data["cursor"]
+
+        product.available = False
+        product.save()
+        gone_id = gone.id
+        gone.delete()
+        Product.objects.create(sku="NEW", name="New", price_cents=1)
+
+        response = api_client.get(reverse("product-changes"), {"since": cursor})
+
+        assert response.status_code == status.HTTP_200_OK
+        skus = [p["sku"] for p in response.data["products"]]
+        assert skus == ["TEST-001", "NEW"]
+        assert unchanged.sku not in skus
+        assert response.data["products"][0]["available"] is False
+        assert response.data["deleted"] == [{"id": gone_id, "sku": "GONE"}]
+
+        again = api_client.get(
+            reverse("product-changes"), {"since": response.data["cursor"]}
+        )
+        assert again.data["products"] == []
+        assert again.data["deleted"] == []
+
+    def test_cursor_overlaps_recent_changes(self, api_client, product, settings):
+        """Test that changes inside the overlap window are sent again."""
+        from django.utils.dateparse import parse_datetime
+
+        settings.CATALOG_CHANGES_OVERLAP_SECONDS = 60
+
+        first = api_client.get(reverse("product-changes"))
+        again = api_client.get(
+            reverse("product-changes"), {"since": first.data["cursor"]}
+        )
+
+        assert parse_datetime(first.data["cursor"]) < product.updated_at
+        assert [p["id"] for p in again.data["products"]] == [product.id]
+
+    def test_changes_with_expired_cursor(self, api_client, settings):
+        """Test that cursors older than the tombstone retention are rejected."""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        settings.PRODUCT_TOMBSTONE_RETENTION_DAYS = 30
+        since = timezone.now() - timedelta(days=31)
+
+        response = api_client.get(
+            reverse("product-changes"), {"since": since.isoformat()}
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "since" in response.data
+
+    def test_changes_with_invalid_cursor(self, api_client):
+        """Test that an invalid cursor is rejected."""
+        response = api_client.get(reverse("product-changes"), {"since": "gestern"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_changes_with_impossible_cursor(self, api_client):
+        """Test that a well-formed but impossible timestamp is rejected."""
+        response = api_client.get(
+            reverse("product-changes"), {"since": "2024-13-45T00:00"}
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    """Tests for cursor pagination on orders and export logs."""
+
+    def test_orders_are_paginated_by_cursor(self, api_client, user):
+        """Test that all orders are reachable by following next links."""
+        api_client.force_authenticate(user=user)
+        created = [Order.objects.create(user=user, status="PLACED") for _ in range(5)]
+
+        response = api_client.get(reverse("order-list"), {"page_size": 2})
+        seen = []
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            assert "count" not in response.data
+            seen.extend(order["id"] for order in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = api_client.get(response.data["next"])
+
+        assert seen == [order.id for order in reversed(created)]
+
+    def test_export_logs_are_paginated(self, api_client, user):
+        """Test that export logs are no longer capped at 50 entries."""
+        from bestellungen.models import ExportLog
+
+        user.is_staff = True
+        user.save()
+        api_client.force_authenticate(user=user)
+        ExportLog.objects.bulk_create(ExportLog() for _ in range(60))
+
+        response = api_client.get(reverse("export-logs"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 50
+        assert response.data["next"] is not None
+
+        next_page = api_client.get(response.data["next"])
+        assert len(next_page.data["results"]) == 10
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    """Tests for ?fields= and ?expand= on order and product endpoints."""
+
+    @pytest.fixture
+    def order(self, user, product):
+        """Create a placed order with one item."""
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        order.place_order()
+        return order
+
+    def test_order_fields_skip_items(
+        self, api_client, user, order, django_assert_num_queries
+    ):
+        """Test that only selected fields are returned and items are not loaded."""
+        api_client.force_authenticate(user=user)
+
+        with django_assert_num_queries(1):
+            response = api_client.get(
+                reverse("order-list"), {"fields": "status,total_euro"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == [
+            {"id": order.id, "status": "PLACED", "total_euro": "5.00"}
+        ]
+
+    def test_order_expand_items(self, api_client, user, order):
+        """Test that items are included when expanded."""
+        api_client.force_authenticate(user=user)
+
+        response = api_client.get(
+            reverse("order-detail", kwargs={"pk": order.id}),
+            {"fields": "status", "expand": "items"},
+        )
+
+        assert set(response.data) == {"id", "status", "items"}
+        assert response.data["items"][0]["product_sku"] == "TEST-001"
+
+    def test_order_without_params_is_unchanged(self, api_client, user, order):
+        """Test that the full representation stays the default."""
+        api_client.force_authenticate(user=user)
+
+        response = api_client.get(reverse("order-detail", kwargs={"pk": order.id}))
+
+        assert "items" in response.data
+        assert "user_email" in response.data
+
+    def test_product_fields(self, api_client, product):
+        """Test sparse fieldsets on the product list."""
+        response = api_client.get(reverse("product-list"), {"fields": "sku,price_euro"})
+
+        assert response.data["results"] == [
+            {"id": product.id, "sku": "TEST-001", "price_euro": "2.50"}
+        ]
+
+
+@pytest.mark.django_db
+class TestAdminOrderStream:
+    """Tests for the staff order stream."""
+
+    @pytest.fixture
+    def staff(self):
+        """Create a staff user."""
+        return CustomUser.objects.create_user(
+            username="staff",
+            email="staff@example.com",
+            password="testpass1234567890",
+            is_staff=True,
+        )
+
+    def test_stream_requires_staff(self, api_client, user):
+        """Test that regular customers cannot stream orders."""
+        api_client.force_authenticate(user=user)
+
+        response = api_client.get(
+            reverse("admin-order-stream"), {"from": "2025-01-01", "to": "2025-01-31"}
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_stream_returns_json_lines(self, api_client, staff, user, product):
+        """Test that orders in the range are streamed one per line."""
+        import json
+        from datetime import datetime
+
+        from django.utils import timezone
+
+        api_client.force_authenticate(user=staff)
+        inside = []
+        for day in (1, 15, 31):
+            order = Order.objects.create(
+                user=user,
+                status="PLACED",
+                placed_at=timezone.make_aware(datetime(2025, 1, day, 12)),
+            )
+            OrderItem.objects.create(order=order, product=product, quantity=day % 9 + 1)
+            inside.append(order.id)
+        Order.objects.create(
+            user=user,
+            status="PLACED",
+            placed_at=timezone.make_aware(datetime(2025, 2, 1, 0, 30)),
+        )
+
+        response = api_client.get(
+            reverse("admin-order-stream"), {"from": "2025-01-01", "to": "2025-01-31"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/x-ndjson"
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        orders = [json.loads(line) for line in lines]
+        assert [order["id"] for order in orders] == inside
+        assert orders[0]["items"][0]["product_sku"] == "TEST-001"
+
+    def test_stream_requires_range(self, api_client, staff):
+        """Test that from and to are required."""
+        api_client.force_authenticate(user=staff)
+
+        response = api_client.get(reverse("admin-order-stream"), {"from": "2025-01-01"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestSalesReport:
+    """Tests for the staff sales report."""
+
+    @pytest.fixture
+    def staff(self):
+        """Create a staff user."""
+        return CustomUser.objects.create_user(
+            username="staff",
+            email="staff@example.com",
+            password="testpass1234567890",
+            is_staff=True,
+        )
+
+    @pytest.fixture
+    def sales(self, user, staff):
+        """Create rollup rows for two customers and two SKUs."""
+        from bestellungen.models import DailySales
+
+        for day, customer, sku, quantity in [
+            (date(2025, 1, 6), user, "SEMMEL", 4),
+            (date(2025, 1, 20), user, "SEMMEL", 2),
+            (date(2025, 1, 20), user, "BREZEL", 1),
+            (date(2025, 2, 3), staff, "SEMMEL", 10),
+            (date(2025, 3, 3), user, "SEMMEL", 50),
+        ]:
+            DailySales.objects.create(
+                date=day,
+                customer=customer,
+                sku=sku,
+                quantity=quantity,
+                revenue_cents=quantity * 45,
+            )
+
+    def test_requires_staff(self, api_client, user):
+        """Test that regular customers cannot read reports."""
+        api_client.force_authenticate(user=user)
+
+        response = api_client.get(
+            reverse("report-sales"), {"from": "2025-01-01", "to": "2025-01-31"}
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_totals_per_sku_and_month(self, api_client, staff, sales):
+        """Test grouping by SKU and month within the range."""
+        api_client.force_authenticate(user=staff)
+
+        response = api_client.get(
+            reverse("report-sales"),
+            {
+                "from": "2025-01-01",
+                "to": "2025-02-28",
+                "group_by": "sku",
+                "period": "month",
+            },
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == [
+            {
+                "period": date(2025, 1, 1),
+                "sku": "BREZEL",
+                "quantity": 1,
+                "revenue_cents": 45,
+            },
+            {
+                "period": date(2025, 1, 1),
+                "sku": "SEMMEL",
+                "quantity": 6,
+                "revenue_cents": 270,
+            },
+            {
+                "period": date(2025, 2, 1),
+                "sku": "SEMMEL",
+                "quantity": 10,
+                "revenue_cents": 450,
+            },
+        ]
+
+    def test_customer_total(self, api_client, staff, user, sales):
+        """Test filtering by customer without grouping."""
+        api_client.force_authenticate(user=staff)
+
+        response = api_client.get(
+            reverse("report-sales"),
+            {
+                "from": "2025-01-01",
+                "to": "2025-03-31",
+                "customer": user.id,
+                "sku": "SEMMEL",
+            },
+        )
+
+        assert response.data["results"] == [{"quantity": 56, "revenue_cents": 2520}]
+
+    def test_rejects_unknown_grouping(self, api_client, staff):
+        """Test that only known dimensions and periods are accepted."""
+        api_client.force_authenticate(user=staff)
+        params = {"from": "2025-01-01", "to": "2025-01-31"}
+
+        bad_group = api_client.get(
+            reverse("report-sales"), {**params, "group_by": "city"}
+        )
+        bad_period = api_client.get(
+            reverse("report-sales"), {**params, "period": "hour"}
+        )
+
+        assert bad_group.status_code == status.HTTP_400_BAD_REQUEST
+        assert bad_period.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+    """Tests for the cached token authentication."""
+
+    @pytest.fixture
+    def token(self, user):
+        """Create an API token for the user."""
+        from rest_framework.authtoken.models import Token
+
+        return Token.objects.create(user=user)
+
+    @pytest.fixture(autouse=True)
+    def reset_stats(self):
+        """Reset the per-process hit counters."""
+        from bestellungen.authentication import CachedTokenAuthentication
+
+        CachedTokenAuthentication.reset_stats()
+
+    def test_second_request_is_served_from_cache(self, api_client, token):
+        """Test that the token lookup is cached after the first request."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from bestellungen.authentication import CachedTokenAuthentication
+
+        api_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        url = reverse("order-list")
+
+        with CaptureQueriesContext(connection) as first:
+            assert api_client.get(url).status_code == status.HTTP_200_OK
+        with CaptureQueriesContext(connection) as second:
+            assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        assert len(second) == len(first) - 1
+        assert CachedTokenAuthentication.stats() == {
+            "hits": 1,
+            "misses": 1,
+            "hit_rate": 0.5,
+        }
+
+    def test_metrics_report_hit_rate(self, api_client, user, token):
+        """Test that staff can read the hit rate of the token cache."""
+        CustomUser.objects.filter(pk=user.pk).update(is_staff=True)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        assert api_client.get(reverse("order-list")).status_code == status.HTTP_200_OK
+
+        response = api_client.get(reverse("admin-metrics"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {
+            "token_cache": {"hits": 1, "misses": 1, "hit_rate": 0.5}
+        }
+
+    def test_metrics_require_staff(self, api_client, token):
+        """Test that customers cannot read the metrics."""
+        api_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        response = api_client.get(reverse("admin-metrics"))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_logout_revokes_cached_token(self, api_client, token):
+        """Test that a token is rejected right after logout."""
+        api_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        assert api_client.get(reverse("order-list")).status_code == status.HTTP_200_OK
+
+        response = api_client.post(reverse("auth-logout"))
+        assert response.status_code == status.HTTP_200_OK
+
+        response = api_client.get(reverse("order-list"))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivation_revokes_cached_token(self, api_client, user, token):
+        """Test that a deactivated user is rejected immediately."""
+        api_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        assert api_client.get(reverse("order-list")).status_code == status.HTTP_200_OK
+
+        user.is_active = False
+        user.save()
+
+        response = api_client.get(reverse("order-list"))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestThrottling:
+    """Tests for per-customer API throttling."""
+
+    @pytest.fixture(autouse=True)
+    def rates(self, monkeypatch):
+        """Use low rates for the tests."""
+        from bestellungen.throttling import CustomerRateThrottle
+
+        monkeypatch.setattr(
+            CustomerRateThrottle,
+            "THROTTLE_RATES",
+            {
+                "catalog": "2/min",
+                "order_writes": "1/min",
+                "order_writes_b2b": "3/min",
+            },
+        )
+
+    def test_catalog_reads_are_throttled(self, api_client, product):
+        """Test that catalog reads beyond the rate are rejected."""
+        url = reverse("product-list")
+
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 0 < int(response["Retry-After"]) <= 60
+
+    def test_order_reads_are_not_throttled(self, api_client, user):
+        """Test that only order writes count against the order scope."""
+        api_client.force_authenticate(user=user)
+
+        for _ in range(3):
+            response = api_client.get(reverse("order-list"))
+            assert response.status_code == status.HTTP_200_OK
+
+    def test_b2b_customers_get_higher_limit(self, api_client, user):
+        """Test that customers with a customer number use the B2B rate."""
+        other = CustomUser.objects.create_user(
+            username="b2b",
+            email="b2b@example.com",
+            password="testpass1234567890",
+            customer_number="K-1000",
+        )
+        url = reverse("order-list")
+
+        api_client.force_authenticate(user=user)
+        codes = [api_client.post(url, {}, format="json").status_code for _ in range(2)]
+        assert codes[-1] == status.HTTP_429_TOO_MANY_REQUESTS
+
+        api_client.force_authenticate(user=other)
+        codes = [api_client.post(url, {}, format="json").status_code for _ in range(4)]
+        assert status.HTTP_429_TOO_MANY_REQUESTS not in codes[:3]
+        assert codes[3] == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+@pytest.mark.django_db
+class TestIdempotencyKeys:
+    """Tests for Idempotency-Key support on order writes."""
+
+    def test_retried_create_returns_stored_response(self, api_client, user, product):
+        """Test that a retried create does not create a second order."""
+        api_client.force_authenticate(user=user)
+        data = {"items": [{"sku": "TEST-001", "quantity": 2}]}
+
+        first = api_client.post(
+            reverse("order-list"), data, format="json", HTTP_IDEMPOTENCY_KEY="abc-1"
+        )
+        retry = api_client.post(
+            reverse("order-list"), data, format="json", HTTP_IDEMPOTENCY_KEY="abc-1"
+        )
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry.json() == first.json()
+        assert retry["Idempotent-Replayed"] == "true"
+        assert Order.objects.filter(user=user).count() == 1
+
+    def test_retried_place_replays_success(self, api_client, user, product):
+        """Test that a retried place returns the first result, not an error."""
+        api_client.force_authenticate(user=user)
+        order = Order.objects.create(user=user, status="DRAFT")
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        url = reverse("order-place", kwargs={"pk": order.id})
+
+        first = api_client.post(url, HTTP_IDEMPOTENCY_KEY="place-1")
+        retry = api_client.post(url, HTTP_IDEMPOTENCY_KEY="place-1")
+        fresh = api_client.post(url, HTTP_IDEMPOTENCY_KEY="place-2")
+
+        assert first.status_code == status.HTTP_200_OK
+        assert retry.status_code == status.HTTP_200_OK
+        assert retry.json()["status"] == "PLACED"
+        assert fresh.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_key_reused_for_other_request(self, api_client, user, product):
+        """Test that a key cannot be reused for a different endpoint."""
+        api_client.force_authenticate(user=user)
+        order = Order.objects.create(user=user, status="DRAFT")
+        OrderItem.objects.create(order=order, product=product, quantity=1)
+
+        api_client.post(
+            reverse("order-place", kwargs={"pk": order.id}), HTTP_IDEMPOTENCY_KEY="k"
+        )
+        response = api_client.post(
+            reverse("order-cancel", kwargs={"pk": order.id}), HTTP_IDEMPOTENCY_KEY="k"
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert Order.objects.get(id=order.id).status == "PLACED"
+
+    def test_key_in_progress_conflicts(self, api_client, user):
+        """Test that a retry while the first request is running gets 409."""
+        from bestellungen.models import IdempotencyKey
+
+        api_client.force_authenticate(user=user)
+        IdempotencyKey.objects.create(
+            user=user, key="running", method="POST", path=reverse("order-list")
+        )
+
+        response = api_client.post(
+            reverse("order-list"), {}, format="json", HTTP_IDEMPOTENCY_KEY="running"
+        )
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+
+@pytest.mark.django_db
+class TestBatchAPI:
+    """Tests for the batch endpoint."""
+
+    def test_batch_runs_sub_requests(self, api_client, user, product):
+        """Test that sub-requests run as the caller and return in order."""
+        api_client.force_authenticate(user=user)
+        order = Order.objects.create(user=user, status="DRAFT")
+        OrderItem.objects.create(order=order, product=product, quantity=1)
+
+        response = api_client.post(
+            reverse("batch"),
+            {
+                "requests": [
+                    {"method": "GET", "path": "products/?fields=sku"},
+                    {
+                        "method": "POST",
+                        "path": "orders/",
+                        "body": {"items": [{"sku": "TEST-001", "quantity": 3}]},
+                    },
+                    {"method": "POST", "path": f"/api/v1/orders/{order.id}/cancel/"},
+                    {"method": "GET", "path": "orders/999999/"},
+                ]
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["responses"]
+        assert [result["status"] for result in results] == [200, 201, 200, 404]
+        assert results[0]["body"]["results"] == [{"id": product.id, "sku": "TEST-001"}]
+        assert results[1]["body"]["id"] == order.id
+        assert results[2]["body"]["status"] == "CANCELLED"
+        assert Order.objects.filter(user=user).count() == 1
+
+    def test_batch_rejects_auth_endpoints(self, api_client, user):
+        """Test that session-based auth endpoints cannot be batched."""
+        from rest_framework.authtoken.models import Token
+
+        token = Token.objects.create(user=user)
+        api_client.force_authenticate(user=user, token=token)
+
+        response = api_client.post(
+            reverse("batch"),
+            {"requests": [{"method": "POST", "path": "auth/logout/"}]},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["responses"][0]["status"] == 400
+        assert Token.objects.filter(user=user).exists()
+
+    def test_batch_reports_failing_entry_only(
+        self, api_client, user, product, monkeypatch
+    ):
+        """Test that an exception fails its own entry, not the whole batch."""
+        from bestellungen.api_views import ProductViewSet
+
+        api_client.force_authenticate(user=user)
+
+        def broken(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(ProductViewSet, "retrieve", broken)
+
+        response = api_client.post(
+            reverse("batch"),
+            {
+                "requests": [
+                    {
+                        "method": "POST",
+                        "path": "orders/",
+                        "body": {"items": [{"sku": "TEST-001", "quantity": 1}]},
+                    },
+                    {"method": "GET", "path": "products/TEST-001/"},
+                    {"method": "GET", "path": "products/?fields=sku"},
+                ]
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["responses"]
+        assert [result["status"] for result in results] == [201, 500, 200]
+        assert OrderItem.objects.filter(order__user=user).exists()
+
+    def test_atomic_batch_rolls_back_on_error(self, api_client, user, product):
+        """Test that an atomic batch is rolled back when a sub-request fails."""
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(
+            reverse("batch"),
+            {
+                "atomic": True,
+                "requests": [
+                    {
+                        "method": "POST",
+                        "path": "orders/",
+                        "body": {"items": [{"sku": "TEST-001", "quantity": 1}]},
+                    },
+                    {"method": "POST", "path": "orders/999999/place/"},
+                    {"method": "GET", "path": "products/"},
+                ],
+            },
+            format="json",
+        )
+
+        body = response.json()
+        assert body["committed"] is False
+        assert [result["status"] for result in body["responses"]] == [201, 404]
+        assert not Order.objects.filter(user=user).exists()
+
+    def test_batch_rejects_foreign_paths(self, api_client, user):
+        """Test that only API routes can be called."""
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(
+            reverse("batch"),
+            {
+                "requests": [
+                    {"method": "GET", "path": "/admin/"},
+                    {"method": "POST", "path": "batch/"},
+                ]
+            },
+            format="json",
+        )
+
+        assert [result["status"] for result in response.json()["responses"]] == [
+            400,
+            400,
+        ]
+
+    def test_batch_requires_authentication(self, api_client):
+        """Test that anonymous users cannot use the batch endpoint."""
+        response = api_client.post(
+            reverse("batch"),
+            {"requests": [{"method": "GET", "path": "products/"}]},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,648 @@
+"""
+Tests for management commands.
+"""
+
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from bestellungen.cache import catalog_version
+from bestellungen.models import CustomUser, IdempotencyKey, Product, ProductPriceHistory
+
+
+def write_csv(tmp_path, content, name="products.csv"):
+    """Write CSV content to a temporary file and return its path."""
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.django_db
+class TestImportProducts:
+    """Tests for the import_products command."""
+
+    @pytest.fixture
+    def product(self):
+        """Create an existing product."""
+        return Product.objects.create(
+            sku="1000", name="Pane pugliese", price_cents=450, available=True
+        )
+
+    def test_import_reports_counts(self, tmp_path, product):
+        """Test inserted, updated and unchanged counts."""
+        Product.objects.create(sku="1001", name="Ciabatta", price_cents=300)
+        path = write_csv(
+            tmp_path,
+            "sku,name,price_cents,available\n"
+            "1000,Pane pugliese,480,1\n"
+            "1001,Ciabatta,300,1\n"
+            "1002,Focaccia,350,0\n",
+        )
+        out = StringIO()
+
+        call_command("import_products", path, stdout=out)
+
+        output = out.getvalue()
+        assert "Inserted:  1" in output
+        assert "Updated:   1" in output
+        assert "Unchanged: 1" in output
+
+        product.refresh_from_db()
+        assert product.price_cents == 480
+        assert Product.objects.get(sku="1002").available is False
+
+    def test_import_records_price_history(self, tmp_path, product):
+        """Test that price and availability changes are recorded."""
+        path = write_csv(tmp_path, "sku,price_cents,available\n1000,500,nein\n")
+
+        call_command("import_products", path, stdout=StringIO())
+
+        history = ProductPriceHistory.objects.get(product=product)
+        assert history.old_price_cents == 450
+        assert history.new_price_cents == 500
+        assert history.old_available is True
+        assert history.new_available is False
+        assert history.source == "import:products.csv"
+
+    def test_import_updates_partial_columns(self, tmp_path, product):
+        """Test that columns missing from the CSV keep their values."""
+        path = write_csv(tmp_path, "sku,name\n1000,Pane di Altamura\n")
+        out = StringIO()
+
+        call_command("import_products", path, stdout=out)
+
+        assert "Updated:   1" in out.getvalue()
+        product.refresh_from_db()
+        assert product.name == "Pane di Altamura"
+        assert product.price_cents == 450
+        assert product.available is True
+
+    def test_import_skips_invalid_rows(self, tmp_path):
+        """Test that invalid rows are reported and skipped."""
+        path = write_csv(
+            tmp_path,
+            "sku,name,price_cents\n2000,Cornetto,abc\n2001,Cornetto,120\n,Leer,100\n",
+        )
+        out = StringIO()
+
+        call_command("import_products", path, stdout=out)
+
+        assert "Errors:    2" in out.getvalue()
+        assert list(Product.objects.values_list("sku", flat=True)) == ["2001"]
+
+    def test_dry_run_writes_nothing(self, tmp_path, product):
+        """Test that a dry run does not change the catalog."""
+        path = write_csv(tmp_path, "sku,name,price_cents\n1000,Neu,999\n3000,X,1\n")
+
+        call_command("import_products", path, "--dry-run", stdout=StringIO())
+
+        product.refresh_from_db()
+        assert product.price_cents == 450
+        assert not Product.objects.filter(sku="3000").exists()
+        assert not ProductPriceHistory.objects.exists()
+
+    def test_import_invalidates_catalog_once(self, tmp_path, product):
+        """Test that the catalog cache version is bumped exactly once."""
+        rows = "".join(f"{4000 + i},Produkt {i},{100 + i}\n" for i in range(50))
+        path = write_csv(tmp_path, "sku,name,price_cents\n" + rows)
+        version = catalog_version()
+
+        call_command("import_products", path, "--batch-size", "10", stdout=StringIO())
+
+        assert cache.get("catalog:version") == version + 1
+        assert Product.objects.count() == 51
+
+
+@pytest.mark.django_db
+class TestPurgeIdempotencyKeys:
+    """Tests for the purge_idempotency_keys command."""
+
+    def test_purge_deletes_expired_keys_only(self):
+        """Test that only keys older than the TTL are deleted."""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        user = CustomUser.objects.create_user(
+            username="purge", email="purge@example.com", password="x"
+        )
+        old = IdempotencyKey.objects.create(
+            user=user, key="old", method="POST", path="/api/v1/orders/"
+        )
+        IdempotencyKey.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        IdempotencyKey.objects.create(
+            user=user, key="new", method="POST", path="/api/v1/orders/"
+        )
+        out = StringIO()
+
+        call_command("purge_idempotency_keys", stdout=out)
+
+        assert "Deleted: 1" in out.getvalue()
+        assert list(IdempotencyKey.objects.values_list("key", flat=True)) == ["new"]
+
+
+@pytest.mark.django_db
+class TestPurgeProductTombstones:
+    """Tests for the purge_product_tombstones command."""
+
+    def test_purge_deletes_old_tombstones_only(self, settings):
+        """Test that only tombstones older than the retention are deleted."""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from bestellungen.models import ProductTombstone
+
+        settings.PRODUCT_TOMBSTONE_RETENTION_DAYS = 30
+        old = ProductTombstone.objects.create(product_id=1, sku="OLD")
+        ProductTombstone.objects.filter(pk=old.pk).update(
+            deleted_at=timezone.now() - timedelta(days=31)
+        )
+        ProductTombstone.objects.create(product_id=2, sku="NEW")
+        out = StringIO()
+
+        call_command("purge_product_tombstones", stdout=out)
+
+        assert "Deleted: 1" in out.getvalue()
+        assert list(ProductTombstone.objects.values_list("sku", flat=True)) == ["NEW"]
+
+
+@pytest.mark.django_db
+class TestExportOrders:
+    """Tests for the export_orders command."""
+
+    def test_export_claims_placed_orders(self, tmp_path, settings):
+        """Test that exported orders are claimed with a version bump."""
+        from bestellungen.models import Order, OrderItem
+
+        settings.EXPORT_CSV_PATH = str(tmp_path)
+        user = CustomUser.objects.create_user(
+            username="export", email="export@example.com", password="x"
+        )
+        product = Product.objects.create(sku="EXP-1", name="Brot", price_cents=300)
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        order.place_order()
+
+        call_command("export_orders", stdout=StringIO())
+
+        order.refresh_from_db()
+        assert order.status == "EXPORTED"
+        assert order.exported_at is not None
+        assert order.version == 2
+        (csv_file,) = tmp_path.iterdir()
+        assert "EXP-1" in csv_file.read_text()
+
+    def test_export_writes_item_snapshot(self, tmp_path, settings):
+        """Test that the CSV shows SKU and name as of order time."""
+        from bestellungen.models import Order, OrderItem
+
+        settings.EXPORT_CSV_PATH = str(tmp_path)
+        user = CustomUser.objects.create_user(
+            username="snapshot", email="snapshot@example.com", password="x"
+        )
+        product = Product.objects.create(sku="EXP-2", name="Dinkel", price_cents=300)
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=1)
+        order.place_order()
+        Product.objects.filter(pk=product.pk).update(sku="EXP-2B", name="Weizen")
+
+        call_command("export_orders", stdout=StringIO())
+
+        (csv_file,) = tmp_path.iterdir()
+        content = csv_file.read_text()
+        assert "EXP-2,Dinkel" in content
+        assert "Weizen" not in content
+
+
+@pytest.mark.django_db
+class TestTransitionOrders:
+    """Tests for the transition_orders command."""
+
+    @pytest.fixture
+    def order(self):
+        """Create a placed order."""
+        from bestellungen.models import Order, OrderItem
+
+        user = CustomUser.objects.create_user(
+            username="transition", email="transition@example.com", password="x"
+        )
+        product = Product.objects.create(sku="TR-1", name="Brot", price_cents=300)
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=1)
+        order.place_order()
+        return order
+
+    def test_cancels_orders_of_customer(self, order):
+        """Test cancelling all orders of a customer with a note."""
+        out = StringIO()
+        call_command(
+            "transition_orders",
+            "--to",
+            "CANCELLED",
+            "--customer",
+            "Transition@example.com",
+            "--note",
+            "Kunde geschlossen",
+            stdout=out,
+        )
+
+        order.refresh_from_db()
+        assert order.status == "CANCELLED"
+        event = order.events.first()
+        assert (event.source, event.note) == ("COMMAND", "Kunde geschlossen")
+        assert "Transitioned: 1" in out.getvalue()
+
+    def test_dry_run_changes_nothing(self, order):
+        """Test that a dry run only counts."""
+        out = StringIO()
+        call_command(
+            "transition_orders",
+            "--to",
+            "CANCELLED",
+            "--ids",
+            str(order.id),
+            "--dry-run",
+            stdout=out,
+        )
+
+        order.refresh_from_db()
+        assert order.status == "PLACED"
+        assert "Matching: 1" in out.getvalue()
+
+    def test_requires_filter(self):
+        """Test that a filter is mandatory."""
+        from django.core.management.base import CommandError
+
+        with pytest.raises(CommandError):
+            call_command("transition_orders", "--to", "CANCELLED")
+
+    def test_to_placed_leaves_carts_alone(self, order):
+        """Test that --to PLACED only resets exported orders, never carts."""
+        from bestellungen.models import Order
+
+        cart = Order.objects.get_cart(order.user)
+        call_command(
+            "transition_orders",
+            "--to",
+            "PLACED",
+            "--customer",
+            "transition@example.com",
+            stdout=StringIO(),
+        )
+
+        cart.refresh_from_db()
+        assert cart.status == "DRAFT"
+
+    def test_rejects_draft_source_for_placed(self, order):
+        """Test that drafts cannot be placed in bulk."""
+        from django.core.management.base import CommandError
+
+        with pytest.raises(CommandError):
+            call_command(
+                "transition_orders",
+                "--to",
+                "PLACED",
+                "--from",
+                "DRAFT",
+                "--ids",
+                str(order.id),
+            )
+
+
+@pytest.mark.django_db
+class TestPurgeDrafts:
+    """Tests for the purge_drafts command."""
+
+    def make_draft(self, name, days_old, quantity=None):
+        """Create a draft last updated ``days_old`` days ago."""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from bestellungen.models import Order, OrderItem
+
+        user = CustomUser.objects.create_user(
+            username=name, email=f"{name}@example.com", password="x"
+        )
+        order = Order.objects.create(user=user)
+        if quantity:
+            product = Product.objects.create(sku=name, name=name, price_cents=100)
+            OrderItem.objects.create(order=order, product=product, quantity=quantity)
+        Order.objects.filter(pk=order.pk).update(
+            updated_at=timezone.now() - timedelta(days=days_old)
+        )
+        return order
+
+    def test_deletes_empty_and_stale_drafts(self):
+        """Test that only old empty and abandoned drafts are deleted."""
+        from bestellungen.models import Order, OrderItem
+
+        self.make_draft("empty-old", 2)
+        self.make_draft("stale", 40, quantity=3)
+        fresh_empty = self.make_draft("empty-new", 0)
+        kept_cart = self.make_draft("cart", 10, quantity=1)
+        out = StringIO()
+
+        call_command("purge_drafts", "--batch-size", "1", stdout=out)
+
+        assert set(Order.objects.values_list("pk", flat=True)) == {
+            fresh_empty.pk,
+            kept_cart.pk,
+        }
+        assert OrderItem.objects.count() == 1
+        output = out.getvalue()
+        assert "Empty:       1" in output
+        assert "Stale:       1" in output
+        assert "Items:       1" in output
+        assert "Batches:     2" in output
+        assert "Reclaimed:   n/a" in output
+
+    def test_keeps_placed_orders(self):
+        """Test that non-draft orders are never touched."""
+        from bestellungen.models import Order
+
+        order = self.make_draft("placed", 100)
+        Order.objects.filter(pk=order.pk).update(status="CANCELLED")
+
+        call_command("purge_drafts", stdout=StringIO())
+
+        assert Order.objects.filter(pk=order.pk).exists()
+
+    def test_keeps_draft_filled_before_lock(self, monkeypatch):
+        """Test that the conditions are re-checked on the locked batch."""
+        from django.db.models import QuerySet
+
+        from bestellungen.models import Order, OrderItem
+
+        order = self.make_draft("racing", 2)
+        product = Product.objects.create(sku="RACE", name="Race", price_cents=100)
+        select_for_update = QuerySet.select_for_update
+
+        def fill_cart(queryset, *args, **kwargs):
+            OrderItem.objects.create(order=order, product=product, quantity=1)
+            return select_for_update(queryset, *args, **kwargs)
+
+        monkeypatch.setattr(QuerySet, "select_for_update", fill_cart)
+
+        call_command("purge_drafts", stdout=StringIO())
+
+        assert Order.objects.filter(pk=order.pk).exists()
+        assert OrderItem.objects.filter(order=order).count() == 1
+
+    def test_dry_run(self):
+        """Test that a dry run only counts."""
+        from bestellungen.models import Order
+
+        self.make_draft("dry", 5)
+        out = StringIO()
+
+        call_command("purge_drafts", "--dry-run", stdout=out)
+
+        assert Order.objects.count() == 1
+        assert "Empty:       1" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestArchiveOrders:
+    """Tests for the archive_orders command."""
+
+    @pytest.fixture
+    def user(self):
+        """Create a customer."""
+        return CustomUser.objects.create_user(
+            username="archive", email="archive@example.com", password="x"
+        )
+
+    def make_order(self, user, status, days_old):
+        """Create an order with one item placed ``days_old`` days ago."""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from bestellungen.models import Order, OrderItem
+
+        product, _ = Product.objects.get_or_create(
+            sku="ARC-1", defaults={"name": "Roggenbrot", "price_cents": 350}
+        )
+        order = Order.objects.create(
+            user=user,
+            status=status,
+            placed_at=timezone.now() - timedelta(days=days_old),
+            delivery_street="Hauptstr. 1",
+            delivery_postal_code="12345",
+            delivery_city="Berlin",
+        )
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        return order
+
+    def test_moves_old_final_orders(self, user):
+        """Test that only old exported/cancelled orders are archived."""
+        from bestellungen.models import ArchivedOrder, Order, OrderItem
+
+        exported = self.make_order(user, "EXPORTED", 400)
+        cancelled = self.make_order(user, "CANCELLED", 400)
+        recent = self.make_order(user, "EXPORTED", 10)
+        placed = self.make_order(user, "PLACED", 400)
+        out = StringIO()
+
+        call_command(
+            "archive_orders", "--months", "12", "--chunk-size", "1", stdout=out
+        )
+
+        assert set(Order.objects.values_list("pk", flat=True)) == {
+            recent.pk,
+            placed.pk,
+        }
+        assert OrderItem.objects.count() == 2
+        assert set(ArchivedOrder.objects.values_list("pk", flat=True)) == {
+            exported.pk,
+            cancelled.pk,
+        }
+        assert "Archived: 2" in out.getvalue()
+
+    def test_archive_is_denormalized(self, user):
+        """Test that items are stored with SKU, name and price."""
+        from bestellungen.models import ArchivedOrder, Order
+
+        order = self.make_order(user, "EXPORTED", 400)
+        Order.objects.filter(pk=order.pk).update(
+            total_cents=700, delivery_fee_cents=250
+        )
+
+        call_command("archive_orders", "--months", "12", stdout=StringIO())
+        Product.objects.filter(sku="ARC-1").update(name="Umbenannt", price_cents=1)
+
+        archived = ArchivedOrder.objects.get(pk=order.pk)
+        assert archived.user == user
+        assert archived.items == [
+            {
+                "sku": "ARC-1",
+                "name": "Roggenbrot",
+                "quantity": 2,
+                "unit_price_cents": 350,
+            }
+        ]
+        assert archived.grand_total_euro == 9.5
+        assert archived.delivery_address == "Hauptstr. 1\n12345 Berlin"
+
+    def test_dry_run(self, user):
+        """Test that a dry run only counts."""
+        from bestellungen.models import ArchivedOrder
+
+        self.make_order(user, "CANCELLED", 400)
+        out = StringIO()
+
+        call_command("archive_orders", "--months", "12", "--dry-run", stdout=out)
+
+        assert not ArchivedOrder.objects.exists()
+        assert "Matching: 1" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestRebuildRollups:
+    """Tests for the rebuild_rollups command."""
+
+    @pytest.fixture
+    def user(self):
+        """Create a customer."""
+        return CustomUser.objects.create_user(
+            username="rebuild", email="rebuild@example.com", password="x"
+        )
+
+    def make_order(self, user, status, day, quantity):
+        """Create an order with one SEMMEL item placed at noon of ``day``."""
+        from datetime import datetime
+
+        from django.utils import timezone
+
+        from bestellungen.models import Order, OrderItem
+
+        product, _ = Product.objects.get_or_create(
+            sku="SEMMEL", defaults={"name": "Semmel", "price_cents": 45}
+        )
+        order = Order.objects.create(
+            user=user,
+            status=status,
+            placed_at=timezone.make_aware(datetime(day.year, day.month, day.day, 12)),
+        )
+        OrderItem.objects.create(order=order, product=product, quantity=quantity)
+        return order
+
+    def test_rebuilds_from_live_and_archived_orders(self, user):
+        """Test that the rollup is recomputed, including archived orders."""
+        from datetime import date
+
+        from bestellungen.models import DailySales, Order
+        from bestellungen.services import archive_orders
+
+        self.make_order(user, "EXPORTED", date(2025, 1, 6), 2)
+        self.make_order(user, "EXPORTED", date(2025, 1, 6), 3)
+        self.make_order(user, "PLACED", date(2025, 1, 20), 1)
+        self.make_order(user, "CANCELLED", date(2025, 1, 20), 9)
+        self.make_order(user, "PLACED", date(2025, 3, 1), 7)
+        archive_orders(Order.objects.filter(placed_at__date=date(2025, 1, 6)))
+        # Stale row inside the range and one outside it
+        DailySales.objects.create(
+            date=date(2025, 1, 10), customer=user, sku="SEMMEL", quantity=99
+        )
+        DailySales.objects.create(
+            date=date(2025, 3, 1), customer=user, sku="SEMMEL", quantity=99
+        )
+        out = StringIO()
+
+        call_command(
+            "rebuild_rollups",
+            "--from",
+            "2025-01-01",
+            "--to",
+            "2025-01-31",
+            "--chunk-days",
+            "10",
+            stdout=out,
+        )
+
+        assert set(
+            DailySales.objects.values_list("date", "quantity", "revenue_cents")
+        ) == {
+            (date(2025, 1, 6), 5, 225),
+            (date(2025, 1, 20), 1, 45),
+            (date(2025, 3, 1), 99, 0),
+        }
+        assert "Chunks:   4" in out.getvalue()
+        assert "Rows:     2" in out.getvalue()
+
+    def test_defaults_to_first_placed_order(self, user):
+        """Test that without a range everything up to today is rebuilt."""
+        from datetime import date
+
+        from bestellungen.models import DailySales
+
+        self.make_order(user, "PLACED", date(2025, 1, 6), 2)
+
+        call_command("rebuild_rollups", stdout=StringIO())
+
+        assert DailySales.objects.get().quantity == 2
+
+    def test_dry_run(self, user):
+        """Test that a dry run writes nothing."""
+        from datetime import date
+
+        from bestellungen.models import DailySales
+
+        self.make_order(user, "PLACED", date(2025, 1, 6), 2)
+        out = StringIO()
+
+        call_command("rebuild_rollups", "--dry-run", stdout=out)
+
+        assert not DailySales.objects.exists()
+        assert "Rows:     1" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestRecalculateTotals:
+    """Tests for the recalculate_totals command."""
+
+    @pytest.fixture
+    def order(self):
+        """Create a placed order with two rolls."""
+        from bestellungen.models import Order, OrderItem
+
+        user = CustomUser.objects.create_user(
+            username="drift", email="drift@example.com", password="x"
+        )
+        product = Product.objects.create(sku="SEMMEL", name="Semmel", price_cents=45)
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        order.place_order()
+        return order
+
+    def test_dry_run_lists_drift(self, order):
+        """Test that a dry run shows stored and computed values only."""
+        from bestellungen.models import Order
+
+        Order.objects.filter(pk=order.pk).update(total_cents=100)
+        out = StringIO()
+
+        call_command("recalculate_totals", "--dry-run", stdout=out)
+
+        assert f"#{order.pk}: total_cents 100 → 90" in out.getvalue()
+        assert "Drifted: 1" in out.getvalue()
+        assert Order.objects.get(pk=order.pk).total_cents == 100
+
+    def test_fixes_drift(self, order):
+        """Test that drifted totals are rewritten."""
+        from bestellungen.models import Order
+
+        Order.objects.filter(pk=order.pk).update(total_cents=100, item_count=0)
+        out = StringIO()
+
+        call_command("recalculate_totals", "--status", "PLACED", stdout=out)
+
+        order.refresh_from_db()
+        assert (order.total_cents, order.item_count) == (90, 1)
+        assert "Corrected: 1" in out.getvalue()
@@ -0,0 +1,183 @@
+"""
+Tests for read-replica routing.
+
+The test database has no replica alias, so the ``replica`` fixture pretends
+one is configured and records which alias each read would use while still
+running it on the default database.
+"""
+
+import pytest
+from django.db import router, transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bestellungen import db_router
+from bestellungen.models import CustomUser, Order, OrderItem, Product
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Enable routing and return the list of (model, alias) reads."""
+    reads = []
+
+    def db_for_read(self, model, **hints):
+        reads.append((model.__name__, db_router._read_db.get() or "default"))
+        return "default"
+
+    monkeypatch.setattr(db_router, "replica_configured", lambda: True)
+    monkeypatch.setattr("bestellungen.middleware.replica_configured", lambda: True)
+    monkeypatch.setattr(db_router.ReplicaRouter, "db_for_read", db_for_read)
+    return reads
+
+
+@pytest.fixture
+def user():
+    """Create a verified user."""
+    return CustomUser.objects.create_user(
+        username="replica",
+        email="replica@example.com",
+        password="testpass1234567890",
+        is_verified_email=True,
+    )
+
+
+@pytest.fixture
+def product():
+    """Create a test product."""
+    return Product.objects.create(sku="REP-1", name="Replika", price_cents=100)
+
+
+def aliases(reads, model):
+    """Return the set of aliases used to read ``model``."""
+    return {alias for name, alias in reads if name == model}
+
+
+class TestReplicaRouter:
+    """Tests for the router itself."""
+
+    def test_reads_default_outside_read_replica(self):
+        """Test that reads use the primary unless a block selects the replica."""
+        assert router.db_for_read(Order) == "default"
+        assert router.db_for_write(Order) == "default"
+
+    def test_read_replica_selects_replica(self, monkeypatch):
+        """Test that read_replica() routes reads but never writes."""
+        monkeypatch.setattr(db_router, "replica_configured", lambda: True)
+
+        with db_router.read_replica():
+            assert router.db_for_read(Order) == "replica"
+            assert router.db_for_write(Order) == "default"
+        assert router.db_for_read(Order) == "default"
+
+    def test_without_replica_nothing_changes(self):
+        """Test that read_replica() is a no-op without a replica."""
+        with db_router.read_replica():
+            assert router.db_for_read(Order) == "default"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_transaction_reads_primary(self, monkeypatch):
+        """Test that reads inside a transaction see its own writes."""
+        monkeypatch.setattr(db_router, "replica_configured", lambda: True)
+
+        with transaction.atomic(), db_router.read_replica():
+            assert router.db_for_read(Order) == "default"
+
+    def test_replica_is_never_migrated(self):
+        """Test that migrations only run on the primary."""
+        assert router.allow_migrate("replica", "bestellungen") is False
+        assert router.allow_migrate("default", "bestellungen") is True
+
+
+# Inside the usual test transaction read_replica() would stay on the primary
+@pytest.mark.django_db(transaction=True)
+class TestReadYourWrites:
+    """Tests for sticky reads after a user's own write."""
+
+    def test_sticky_user_reads_primary(self, replica, user):
+        """Test that a recent writer is kept on the primary."""
+        db_router.mark_sticky(user)
+
+        with db_router.read_replica(user):
+            list(Order.objects.filter(user=user))
+
+        assert aliases(replica, "Order") == {"default"}
+
+    def test_write_request_makes_user_sticky(self, replica, client, user, product):
+        """Test that the page after a cart change is read from the primary."""
+        client.force_login(user)
+        cart = Order.objects.get_cart(user)
+        OrderItem.objects.create(order=cart, product=product, quantity=1)
+        assert not db_router.is_sticky(user)
+
+        client.post(
+            reverse("checkout"), {"delivery_type": "PICKUP", "version": cart.version}
+        )
+        assert db_router.is_sticky(user)
+
+        replica.clear()
+        response = client.get(reverse("order_list"))
+
+        assert response.status_code == 200
+        assert aliases(replica, "Order") == {"default"}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaViews:
+    """Read-only views read from the replica."""
+
+    def test_order_list(self, replica, client, user):
+        """Test the order history page."""
+        Order.objects.create(user=user, status="PLACED")
+        client.force_login(user)
+
+        response = client.get(reverse("order_list"))
+
+        assert response.status_code == 200
+        assert aliases(replica, "Order") == {"replica"}
+
+    def test_async_product_list(self, replica, client, product):
+        """Test that the async product list routes its reads too."""
+        response = client.get(reverse("product_list"))
+
+        assert response.status_code == 200
+        assert aliases(replica, "Product") == {"replica"}
+
+    def test_api_order_reads_and_writes(self, replica, user, product):
+        """Test that API reads use the replica and writes the primary."""
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        client.get(reverse("order-list"))
+        assert aliases(replica, "Order") == {"replica"}
+
+        replica.clear()
+        response = client.post(
+            reverse("order-list"),
+            {"items": [{"sku": "REP-1", "quantity": 1}]},
+            format="json",
+        )
+        assert response.status_code == 201
+        assert aliases(replica, "Order") == {"default"}
+
+    def test_failing_view_leaves_replica(self, replica, user, monkeypatch):
+        """Test that an exception does not leak the replica into later reads."""
+        from bestellungen.api_views import OrderViewSet
+
+        def fail(self, request, *args, **kwargs):
+            raise RuntimeError("kaputt")
+
+        monkeypatch.setattr(OrderViewSet, "list", fail)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        with pytest.raises(RuntimeError):
+            client.get(reverse("order-list"))
+
+        assert db_router._read_db.get() is None
+
+    def test_cached_product_list_stays_on_primary(self, replica, product):
+        """Test that the catalog cache is never filled from the replica."""
+        response = APIClient().get(reverse("product-list"))
+
+        assert response.status_code == 200
+        assert aliases(replica, "Product") == {"default"}
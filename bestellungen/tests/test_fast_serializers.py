@@ -0,0 +1,98 @@
+"""
+Tests for the values()-based order serialization fast path.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from bestellungen.fast_serializers import format_euro, order_columns, serialize_orders
+from bestellungen.models import CustomUser, Order, OrderItem, Product
+from bestellungen.renderers import FastJSONRenderer
+from bestellungen.serializers import OrderSerializer
+
+
+@pytest.fixture
+def user():
+    """Create a test user."""
+    return CustomUser.objects.create_user(
+        username="fast", email="fast@example.com", password="testpass123"
+    )
+
+
+@pytest.fixture
+def orders(user):
+    """Create orders with items, unicode names and null timestamps."""
+    products = [
+        Product.objects.create(sku="B-1", name="Brötchen", price_cents=45),
+        Product.objects.create(sku="B-2", name="Line\u2028Sep", price_cents=1999),
+        Product.objects.create(sku="B-3", name='Quote "Brot"', price_cents=100000),
+    ]
+    result = []
+    for i in range(4):
+        order = Order.objects.create(
+            user=user,
+            status="PLACED" if i else "DRAFT",
+            total_cents=i * 1234 + 5,
+            placed_at=timezone.now() - timedelta(days=i) if i else None,
+        )
+        for product in products[: i + 1]:
+            OrderItem.objects.create(order=order, product=product, quantity=i + 1)
+        result.append(order)
+    return result
+
+
+@pytest.mark.django_db
+class TestFastSerialization:
+    """The fast path must render byte-identical JSON."""
+
+    def test_format_euro(self):
+        """Test money formatting against DecimalField output."""
+        assert format_euro(0) == "0.00"
+        assert format_euro(5) == "0.05"
+        assert format_euro(1999) == "19.99"
+        assert format_euro(100000) == "1000.00"
+
+    def test_output_is_byte_identical(self, user, orders):
+        """Test that both paths render the same bytes."""
+        queryset = Order.objects.filter(user=user).order_by("-created_at", "-id")
+
+        expected = JSONRenderer().render(
+            OrderSerializer(queryset.prefetch_related("items__product"), many=True).data
+        )
+        actual = FastJSONRenderer().render(
+            serialize_orders(list(queryset.values(*order_columns())))
+        )
+
+        assert actual == expected
+
+    def test_renamed_products_keep_order_snapshot(self, user, orders):
+        """Test that both paths show SKU and name as of order time."""
+        Product.objects.filter(sku="B-1").update(sku="B-1-NEU", name="Umbenannt")
+        queryset = Order.objects.filter(user=user).order_by("-created_at", "-id")
+
+        expected = JSONRenderer().render(
+            OrderSerializer(queryset.prefetch_related("items"), many=True).data
+        )
+        actual = FastJSONRenderer().render(
+            serialize_orders(list(queryset.values(*order_columns())))
+        )
+
+        assert actual == expected
+        assert b"Umbenannt" not in actual
+        assert b"B-1-NEU" not in actual
+
+    def test_list_endpoint_matches_detail(self, user, orders):
+        """Test that list entries equal the serializer-based detail view."""
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        listed = client.get(reverse("order-list")).json()["results"]
+
+        for entry in listed:
+            detail = client.get(reverse("order-detail", kwargs={"pk": entry["id"]}))
+            assert entry == detail.json()
@@ -6,7 +6,17 @@ import pytest
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
-from bestellungen.models import CustomUser, Order, OrderItem, Product
+from bestellungen.models import (
+    CapacityExceeded,
+    CustomUser,
+    DailySales,
+    Order,
+    OrderEvent,
+    OrderItem,
+    Product,
+    ProductionCapacity,
+)
+from bestellungen.services import bulk_transition, recalculate_totals
 
 
 @pytest.mark.django_db
@@ -186,6 +196,96 @@ class TestOrder:
         with pytest.raises(ValueError, match="Exported orders cannot be cancelled"):
             order.cancel_order()
 
+    def test_writes_bump_version(self, user, product):
+        """Test that total, place and cancel each bump the version once."""
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=1)
+
+        order.calculate_total()
+        order.place_order()
+        order.cancel_order()
+
+        order.refresh_from_db()
+        assert order.version == 3
+        assert order.status == "CANCELLED"
+
+    def test_stale_order_is_not_overwritten(self, user, product):
+        """Test that a write based on an outdated copy is rejected."""
+        from bestellungen.models import StaleOrderError
+
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        stale = Order.objects.get(pk=order.pk)
+
+        order.place_order()
+
+        with pytest.raises(StaleOrderError):
+            stale.calculate_total()
+        order.refresh_from_db()
+        assert order.status == "PLACED"
+        assert order.total_cents == 500
+
+    def test_concurrent_place_has_one_winner(self, user, product):
+        """Test that only one of two copies of a draft can be placed."""
+        from bestellungen.models import ProductionCapacity
+
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        other = Order.objects.get(pk=order.pk)
+        capacity = ProductionCapacity.objects.create(
+            product=product, delivery_date=Order.next_delivery_date(), capacity=10
+        )
+
+        assert order.place_order() is True
+        with pytest.raises(ValueError, match="Current status: PLACED"):
+            other.place_order()
+
+        capacity.refresh_from_db()
+        assert capacity.reserved == 2
+
+    def test_cancel_loses_against_export(self, user, product):
+        """Test that a stale cancel does not overwrite an export."""
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=1)
+        order.place_order()
+        stale = Order.objects.get(pk=order.pk)
+
+        assert order.transition("EXPORTED", exported_at=timezone.now())
+
+        with pytest.raises(ValueError, match="Current status: EXPORTED"):
+            stale.cancel_order()
+        order.refresh_from_db()
+        assert order.status == "EXPORTED"
+
+    def test_get_cart_returns_single_draft(self, user):
+        """Test that the cart is created once and reused."""
+        cart = Order.objects.get_cart(user)
+
+        assert cart.status == "DRAFT"
+        assert Order.objects.get_cart(user) == cart
+        assert Order.objects.filter(user=user).count() == 1
+
+    def test_get_cart_after_checkout_creates_new_draft(self, user, product):
+        """Test that a placed cart is replaced by a new draft."""
+        cart = Order.objects.get_cart(user)
+        OrderItem.objects.create(order=cart, product=product, quantity=1)
+        cart.place_order()
+
+        new_cart = Order.objects.get_cart(user)
+
+        assert new_cart.pk != cart.pk
+        assert new_cart.status == "DRAFT"
+
+    def test_second_draft_is_rejected(self, user):
+        """Test that the database allows only one draft per user."""
+        from django.db import IntegrityError, transaction
+
+        Order.objects.create(user=user, status="DRAFT")
+        Order.objects.create(user=user, status="PLACED")
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Order.objects.create(user=user, status="DRAFT")
+
 
 @pytest.mark.django_db
 class TestOrderItem:
@@ -254,3 +354,357 @@ class TestOrderItem:
         # Order item should still have old price
         item.refresh_from_db()
         assert item.unit_price_cents == 300
+
+    def test_order_item_snapshots_product(self, user, product):
+        """Test that SKU and name stay as they were when the item was added."""
+        order = Order.objects.create(user=user)
+        item = OrderItem.objects.create(order=order, product=product, quantity=1)
+
+        Product.objects.filter(pk=product.pk).update(sku="NEW-001", name="Neu")
+
+        item.refresh_from_db()
+        assert (item.sku, item.product_name) == ("TEST-001", "Test Product")
+        assert str(item) == "1x Test Product"
+
+    def test_calculate_total_counts_items(self, user, product):
+        """Test that item_count follows the items."""
+        other = Product.objects.create(sku="TEST-002", name="Other", price_cents=50)
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        OrderItem.objects.create(order=order, product=other, quantity=1)
+
+        order.calculate_total()
+        assert order.item_count == 2
+
+        order.items.filter(product=other).delete()
+        order.calculate_total()
+        order.refresh_from_db()
+        assert order.item_count == 1
+
+
+@pytest.mark.django_db
+class TestProductionCapacity:
+    """Tests for daily production capacity reservations."""
+
+    @pytest.fixture
+    def user(self):
+        """Create a test user."""
+        return CustomUser.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+
+    @pytest.fixture
+    def product(self):
+        """Create a test product."""
+        return Product.objects.create(
+            sku="CROISSANT", name="Croissant", price_cents=120, available=True
+        )
+
+    def make_order(self, user, product, quantity):
+        """Create a draft order with a single item."""
+        order = Order.objects.create(user=user)
+        OrderItem.objects.create(order=order, product=product, quantity=quantity)
+        return order
+
+    def test_place_order_reserves_capacity(self, user, product):
+        """Test that placing an order reserves capacity for the delivery day."""
+        capacity = ProductionCapacity.objects.create(
+            product=product, delivery_date=Order.next_delivery_date(), capacity=10
+        )
+
+        order = self.make_order(user, product, 4)
+        order.place_order()
+
+        capacity.refresh_from_db()
+        assert capacity.reserved == 4
+        assert capacity.remaining == 6
+        assert order.delivery_date == capacity.delivery_date
+
+    def test_place_order_exceeding_capacity_fails(self, user, product):
+        """Test that an order exceeding remaining capacity is rejected."""
+        other = Product.objects.create(sku="ROLL", name="Roll", price_cents=50)
+        delivery_date = Order.next_delivery_date()
+        ProductionCapacity.objects.create(
+            product=other, delivery_date=delivery_date, capacity=10
+        )
+        capacity = ProductionCapacity.objects.create(
+            product=product, delivery_date=delivery_date, capacity=3
+        )
+
+        order = self.make_order(user, product, 4)
+        OrderItem.objects.create(order=order, product=other, quantity=2)
+
+        with pytest.raises(CapacityExceeded, match="Croissant"):
+            order.place_order()
+
+        order.refresh_from_db()
+        capacity.refresh_from_db()
+        assert order.status == "DRAFT"
+        assert capacity.reserved == 0
+        assert ProductionCapacity.objects.get(product=other).reserved == 0
+
+    def test_product_without_capacity_is_unlimited(self, user, product):
+        """Test that products without a capacity row are not restricted."""
+        order = self.make_order(user, product, 50)
+        order.place_order()
+
+        assert order.status == "PLACED"
+
+    def test_cancel_order_releases_capacity(self, user, product):
+        """Test that cancelling a placed order frees its reservation."""
+        capacity = ProductionCapacity.objects.create(
+            product=product, delivery_date=Order.next_delivery_date(), capacity=5
+        )
+
+        order = self.make_order(user, product, 5)
+        order.place_order()
+        order.cancel_order()
+
+        capacity.refresh_from_db()
+        assert capacity.reserved == 0
+
+
+@pytest.mark.django_db
+class TestBulkTransition:
+    """Tests for set-based order status transitions."""
+
+    @pytest.fixture
+    def product(self):
+        """Create a test product."""
+        return Product.objects.create(sku="BREZEL", name="Brezel", price_cents=80)
+
+    def make_placed_orders(self, product, count, quantity=2):
+        """Create ``count`` placed orders, one per user."""
+        orders = []
+        for i in range(count):
+            user = CustomUser.objects.create_user(
+                username=f"bulk{i}", email=f"bulk{i}@example.com", password="x"
+            )
+            order = Order.objects.create(user=user)
+            OrderItem.objects.create(order=order, product=product, quantity=quantity)
+            order.place_order()
+            orders.append(order)
+        return orders
+
+    def test_cancels_in_chunks_and_records_events(self, product):
+        """Test that every order is moved, versioned and audited."""
+        capacity = ProductionCapacity.objects.create(
+            product=product, delivery_date=Order.next_delivery_date(), capacity=20
+        )
+        orders = self.make_placed_orders(product, 5)
+        capacity.refresh_from_db()
+        assert capacity.reserved == 10
+
+        ids = bulk_transition(
+            Order.objects.all(), ["PLACED"], "CANCELLED", note="Tour", chunk_size=2
+        )
+
+        assert sorted(ids) == sorted(order.id for order in orders)
+        assert set(Order.objects.values_list("status", "version")) == {("CANCELLED", 2)}
+        events = OrderEvent.objects.filter(to_status="CANCELLED")
+        assert events.count() == 5
+        assert set(events.values_list("from_status", "source", "note")) == {
+            ("PLACED", "ADMIN", "Tour")
+        }
+        capacity.refresh_from_db()
+        assert capacity.reserved == 0
+
+    def test_skips_orders_in_other_states(self, product):
+        """Test that orders outside ``from_states`` are left alone."""
+        placed, cancelled = self.make_placed_orders(product, 2)
+        cancelled.cancel_order()
+
+        ids = bulk_transition(Order.objects.all(), ["PLACED"], "CANCELLED")
+
+        assert ids == [placed.id]
+        assert OrderEvent.objects.filter(order=cancelled, source="ADMIN").count() == 0
+
+    def test_unexport_clears_export_fields(self, product):
+        """Test resetting exported orders to placed."""
+        (order,) = self.make_placed_orders(product, 1)
+        bulk_transition(
+            Order.objects.all(), ["PLACED"], "EXPORTED", exported_at=timezone.now()
+        )
+
+        bulk_transition(
+            Order.objects.all(),
+            ["EXPORTED"],
+            "PLACED",
+            exported_at=None,
+            external_export_id=None,
+        )
+
+        order.refresh_from_db()
+        assert order.status == "PLACED"
+        assert order.exported_at is None
+        assert list(order.events.values_list("from_status", "to_status")) == [
+            ("EXPORTED", "PLACED"),
+            ("PLACED", "EXPORTED"),
+            ("DRAFT", "PLACED"),
+        ]
+
+    def test_rejects_invalid_transition(self):
+        """Test that transitions not in the state machine are refused."""
+        with pytest.raises(ValueError):
+            bulk_transition(Order.objects.all(), ["CANCELLED"], "PLACED")
+
+    def test_rejects_placing_drafts(self, product):
+        """Test that drafts must be placed through place_order()."""
+        user = CustomUser.objects.create_user(
+            username="bulkdraft", email="bulkdraft@example.com", password="x"
+        )
+        Order.objects.create(user=user)
+
+        with pytest.raises(ValueError):
+            bulk_transition(Order.objects.all(), ["DRAFT"], "PLACED")
+        assert Order.objects.get().status == "DRAFT"
+
+
+@pytest.mark.django_db
+class TestDailySales:
+    """Tests for the incrementally maintained sales rollup."""
+
+    @pytest.fixture
+    def user(self):
+        """Create a customer."""
+        return CustomUser.objects.create_user(
+            username="rollup", email="rollup@example.com", password="x"
+        )
+
+    def make_cart(self, user, quantities):
+        """Create a draft order with ``{(sku, price_cents): quantity}``."""
+        order = Order.objects.create(user=user)
+        for (sku, price_cents), quantity in quantities.items():
+            product, _ = Product.objects.get_or_create(
+                sku=sku, defaults={"name": sku, "price_cents": price_cents}
+            )
+            OrderItem.objects.create(order=order, product=product, quantity=quantity)
+        return order
+
+    def rollup(self):
+        """Return ``{sku: (quantity, revenue_cents)}`` of all rollup rows."""
+        return {
+            sku: (quantity, revenue)
+            for sku, quantity, revenue in DailySales.objects.values_list(
+                "sku", "quantity", "revenue_cents"
+            )
+        }
+
+    def test_place_adds_and_cancel_subtracts(self, user):
+        """Test that placing and cancelling update the rollup."""
+        first = self.make_cart(user, {("SEMMEL", 45): 4, ("BREZEL", 80): 1})
+        first.place_order()
+        second = self.make_cart(user, {("SEMMEL", 45): 2})
+        second.place_order()
+
+        assert self.rollup() == {"SEMMEL": (6, 270), "BREZEL": (1, 80)}
+        row = DailySales.objects.get(sku="SEMMEL")
+        assert row.date == timezone.localdate(first.placed_at)
+        assert row.customer == user
+
+        second.cancel_order()
+
+        assert self.rollup() == {"SEMMEL": (4, 180), "BREZEL": (1, 80)}
+
+    def test_export_and_unexport_keep_sales(self, user):
+        """Test that exported orders still count as sales."""
+        order = self.make_cart(user, {("SEMMEL", 45): 3})
+        order.place_order()
+
+        bulk_transition(Order.objects.all(), ["PLACED"], "EXPORTED")
+        bulk_transition(Order.objects.all(), ["EXPORTED"], "PLACED")
+
+        assert self.rollup() == {"SEMMEL": (3, 135)}
+
+    def test_bulk_cancel_subtracts(self, user):
+        """Test that bulk cancelling exported orders updates the rollup."""
+        for _ in range(3):
+            self.make_cart(user, {("SEMMEL", 45): 1}).place_order()
+        bulk_transition(Order.objects.all(), ["PLACED"], "EXPORTED")
+
+        bulk_transition(Order.objects.all(), ["EXPORTED"], "CANCELLED", chunk_size=2)
+
+        assert self.rollup() == {"SEMMEL": (0, 0)}
+
+    def test_cancelling_a_draft_changes_nothing(self, user):
+        """Test that drafts are never counted."""
+        order = self.make_cart(user, {("SEMMEL", 45): 3})
+
+        order.cancel_order()
+
+        assert not DailySales.objects.exists()
+
+    def test_transitions_and_rebuild_lock_their_days(self, user, monkeypatch):
+        """Test that increments and rebuilds of a day exclude each other."""
+        from datetime import timedelta
+
+        from bestellungen.services import rebuild_daily_sales
+
+        calls = []
+        monkeypatch.setattr(
+            DailySales,
+            "lock_days",
+            lambda days, shared=False: calls.append((sorted(set(days)), shared)),
+        )
+        order = self.make_cart(user, {("SEMMEL", 45): 1})
+
+        order.place_order()
+        today = timezone.localdate(order.placed_at)
+        rebuild_daily_sales(today - timedelta(days=1), today)
+
+        assert calls == [
+            ([today], True),
+            ([today - timedelta(days=1), today], False),
+        ]
+
+
+@pytest.mark.django_db
+class TestRecalculateTotals:
+    """Tests for set-based recalculation of stored order totals."""
+
+    @pytest.fixture
+    def orders(self):
+        """Create three placed orders with correct totals."""
+        product = Product.objects.create(sku="ZOPF", name="Zopf", price_cents=300)
+        orders = []
+        for i in range(3):
+            user = CustomUser.objects.create_user(
+                username=f"recalc{i}",
+                email=f"recalc{i}@example.com",
+                password="x",
+                delivery_fee_cents=250,
+            )
+            order = Order.objects.create(user=user)
+            OrderItem.objects.create(order=order, product=product, quantity=i + 1)
+            order.place_order()
+            orders.append(order)
+        return orders
+
+    def test_fixes_only_drifted_orders(self, orders):
+        """Test that drifted orders are corrected and others keep their version."""
+        drifted, fee_changed, unchanged = orders
+        Order.objects.filter(pk=drifted.pk).update(total_cents=1, item_count=9)
+        CustomUser.objects.filter(pk=fee_changed.user_id).update(delivery_fee_cents=0)
+
+        corrected = recalculate_totals(Order.objects.all(), chunk_size=2)
+
+        assert corrected == 2
+        versions = dict(Order.objects.values_list("pk", "version"))
+        assert versions == {drifted.pk: 2, fee_changed.pk: 2, unchanged.pk: 1}
+        drifted.refresh_from_db()
+        fee_changed.refresh_from_db()
+        assert (drifted.total_cents, drifted.item_count) == (300, 1)
+        assert fee_changed.delivery_fee_cents == 0
+
+    def test_respects_queryset(self, orders):
+        """Test that orders outside the queryset are left alone."""
+        Order.objects.update(total_cents=1)
+
+        corrected = recalculate_totals(Order.objects.filter(pk=orders[0].pk))
+
+        assert corrected == 1
+        assert sorted(Order.objects.values_list("total_cents", flat=True)) == [
+            1,
+            1,
+            300,
+        ]
@@ -0,0 +1,83 @@
+"""
+Query budgets for API endpoints.
+
+Every endpoint listed in QUERY_BUDGETS must stay within its declared number
+of queries, and that number must not grow with the amount of data.
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bestellungen.models import CustomUser, Order, OrderItem, Product
+
+# (url name, url kwargs, authenticated, max queries)
+QUERY_BUDGETS = [
+    # Count, page and the (uncached) remaining capacity of the page
+    ("product-list", {}, False, 3),
+    ("product-detail", {"sku": "SKU-0"}, False, 1),
+    ("product-changes", {}, False, 1),
+    ("order-list", {}, True, 2),
+    ("order-detail", {"pk": "latest"}, True, 2),
+]
+
+
+def seed(user, orders, items_per_order=3):
+    """Create products and placed orders for ``user``."""
+    products = [
+        Product.objects.get_or_create(
+            sku=f"SKU-{i}", defaults={"name": f"Produkt {i}", "price_cents": 100 + i}
+        )[0]
+        for i in range(items_per_order)
+    ]
+    for _ in range(orders):
+        order = Order.objects.create(user=user, status="PLACED")
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order,
+                product=product,
+                quantity=2,
+                unit_price_cents=product.price_cents,
+            )
+            for product in products
+        )
+
+
+def assert_query_budget(client, url, budget):
+    """Request ``url`` and fail if it runs more than ``budget`` queries."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+
+    assert response.status_code == 200, response.content
+    assert (
+        len(queries) <= budget
+    ), f"{url} ran {len(queries)} queries (budget {budget}):\n" + "\n".join(
+        q["sql"] for q in queries.captured_queries
+    )
+    return len(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name,kwargs,authenticated,budget", QUERY_BUDGETS)
+def test_endpoint_query_budget(name, kwargs, authenticated, budget):
+    """Test that each endpoint stays within its budget as data grows."""
+    user = CustomUser.objects.create_user(
+        username="budget", email="budget@example.com", password="testpass123"
+    )
+    client = APIClient()
+    if authenticated:
+        client.force_authenticate(user=user)
+
+    counts = []
+    for orders in (2, 20):
+        seed(user, orders)
+        url_kwargs = dict(kwargs)
+        if url_kwargs.get("pk") == "latest":
+            url_kwargs["pk"] = Order.objects.latest("id").pk
+        # Bypass the catalog response cache so the queries are measured
+        url = reverse(name, kwargs=url_kwargs) + f"?n={orders}"
+        counts.append(assert_query_budget(client, url, budget))
+
+    assert counts[0] == counts[1]
@@ -0,0 +1,123 @@
+"""
+Query plans for the hot queries.
+
+Each hot filter must be answered with an index on a seeded dataset. The
+plans are read via ``QuerySet.explain()`` after ``ANALYZE``, so the
+planner works with realistic statistics.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from bestellungen.models import CustomUser, Order, OrderChangeRequest
+
+USERS = 40
+ORDERS_PER_USER = 50
+
+
+@pytest.fixture
+def dataset():
+    """Seed users, orders and change requests and refresh statistics."""
+    now = timezone.now()
+    CustomUser.objects.bulk_create(
+        CustomUser(
+            username=f"plan{i}",
+            email=f"plan{i}@example.com",
+            email_verification_token=f"token-{i}" if i % 10 == 0 else None,
+        )
+        for i in range(USERS)
+    )
+    users = list(CustomUser.objects.order_by("pk"))
+    statuses = ["EXPORTED"] * 7 + ["CANCELLED", "PLACED"]
+    Order.objects.bulk_create(
+        Order(
+            user=user,
+            status=statuses[n % len(statuses)],
+            placed_at=now - timedelta(days=n),
+            exported_at=now - timedelta(days=n) if n % len(statuses) < 7 else None,
+        )
+        for user in users
+        for n in range(ORDERS_PER_USER)
+    )
+    Order.objects.bulk_create(Order(user=user) for user in users)
+    OrderChangeRequest.objects.bulk_create(
+        OrderChangeRequest(order=order, request_type="CANCEL", status="REJECTED")
+        for order in Order.objects.filter(status="EXPORTED")[:500]
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return users
+
+
+def assert_index_scan(queryset, *index_names):
+    """Fail unless the plan of ``queryset`` reads through an index.
+
+    With ``index_names``, one of these indexes must appear in the plan.
+    """
+    plan = queryset.explain()
+    if connection.vendor == "postgresql":
+        uses_index = "Index" in plan and "Seq Scan" not in plan
+    else:
+        uses_index = "USING INDEX" in plan or "USING COVERING INDEX" in plan
+    assert uses_index, plan
+    if index_names:
+        assert any(name in plan for name in index_names), plan
+
+
+@pytest.mark.django_db
+class TestHotQueryPlans:
+    """Each hot query must use its index."""
+
+    def test_cart_lookup(self, dataset):
+        """Test the (user, status) lookup of the cart views."""
+        # Like get(), without the default ordering
+        queryset = Order.objects.filter(user=dataset[3], status="DRAFT").order_by()
+        assert_index_scan(
+            queryset, "order_user_status_placed_idx", "order_one_draft_per_user"
+        )
+
+    def test_order_history(self, dataset):
+        """Test the order history of order_list (a search by user)."""
+        queryset = (
+            Order.objects.filter(user=dataset[3])
+            .exclude(status="DRAFT")
+            .order_by("-placed_at")
+        )
+        assert_index_scan(queryset)
+
+    def test_costs(self, dataset):
+        """Test the (user, status, placed_at) range of costs_view."""
+        queryset = Order.objects.filter(
+            user=dataset[3],
+            status__in=["PLACED", "EXPORTED"],
+            placed_at__gte=timezone.now() - timedelta(days=7),
+        )
+        assert_index_scan(queryset, "order_user_status_placed_idx")
+
+    def test_export_pending(self, dataset):
+        """Test the partial index used by export_orders."""
+        queryset = Order.objects.filter(status="PLACED", exported_at__isnull=True)
+        assert_index_scan(queryset, "order_export_pending_idx")
+
+    def test_email_verification(self, dataset):
+        """Test the token lookup of verify_email_view."""
+        queryset = CustomUser.objects.filter(email_verification_token="token-10")
+        assert_index_scan(queryset, "user_verification_token_idx")
+
+    def test_pending_change_request(self, dataset):
+        """Test the (order, status) lookup of request_change_view."""
+        order = Order.objects.filter(status="EXPORTED").first()
+        queryset = OrderChangeRequest.objects.filter(order=order, status="PENDING")
+        assert_index_scan(queryset, "changerequest_order_status_idx")
+
+    def test_admin_date_hierarchy(self, dataset):
+        """Test a day of the OrderAdmin date hierarchy across all customers."""
+        now = timezone.now()
+        queryset = Order.objects.filter(
+            placed_at__gte=now - timedelta(days=2), placed_at__lt=now
+        ).order_by("-placed_at")
+        assert_index_scan(queryset, "order_placed_at_idx")
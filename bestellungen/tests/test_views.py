@@ -0,0 +1,375 @@
+"""
+Tests for the frontend views.
+"""
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from bestellungen.models import CustomUser, Order, OrderItem, Product
+
+
+@pytest.fixture
+def user():
+    """Create a verified user."""
+    return CustomUser.objects.create_user(
+        username="testuser",
+        email="test@example.com",
+        password="testpass1234567890",
+        first_name="Test",
+        is_verified_email=True,
+    )
+
+
+@pytest.fixture
+def product():
+    """Create a test product."""
+    return Product.objects.create(sku="TEST-001", name="Test Brötchen", price_cents=45)
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    """Tests for the async read views."""
+
+    def test_product_list_anonymous(self, client, product):
+        """Test that the async product list renders for anonymous users."""
+        response = client.get(reverse("product_list"))
+
+        assert response.status_code == 200
+        assert "Test Brötchen" in response.content.decode()
+
+    def test_product_list_logged_in(self, client, user, product):
+        """Test that the navigation can use the user loaded in a thread."""
+        client.force_login(user)
+
+        response = client.get(reverse("product_list"))
+
+        assert response.status_code == 200
+        assert "Meine Bestellungen" in response.content.decode()
+
+    def test_order_detail(self, client, user, product):
+        """Test that the order detail renders its items."""
+        order = Order.objects.create(user=user, status="PLACED")
+        OrderItem.objects.create(order=order, product=product, quantity=3)
+        client.force_login(user)
+
+        response = client.get(reverse("order_detail", args=[order.id]))
+
+        assert response.status_code == 200
+        assert "TEST-001" in response.content.decode()
+
+    def test_order_detail_requires_login(self, client, user):
+        """Test that anonymous users are redirected to the login page."""
+        order = Order.objects.create(user=user, status="PLACED")
+
+        response = client.get(reverse("order_detail", args=[order.id]))
+
+        assert response.status_code == 302
+        assert reverse("login") in response["Location"]
+
+    def test_order_detail_of_other_user(self, client, user):
+        """Test that orders of other customers are not found."""
+        other = CustomUser.objects.create_user(
+            username="other", email="other@example.com", password="x"
+        )
+        order = Order.objects.create(user=other, status="PLACED")
+        client.force_login(user)
+
+        response = client.get(reverse("order_detail", args=[order.id]))
+
+        assert response.status_code == 404
+
+    def test_middleware_chain_is_async_capable(self, settings):
+        """Test that no sync-only middleware forces the chain into threads."""
+        for path in settings.MIDDLEWARE:
+            assert getattr(import_string(path), "async_capable", False), path
+
+    def test_lockout_under_async_chain(self, async_client, user, settings):
+        """Test that failed logins still lock out through the async chain."""
+        settings.AXES_FAILURE_LIMIT = 2
+        data = {"email": "test@example.com", "password": "falsch"}
+
+        async def attempts():
+            await async_client.post(reverse("login"), data)
+            return await async_client.post(reverse("login"), data)
+
+        response = async_to_sync(attempts)()
+
+        assert response.status_code == 429
+
+
+@pytest.mark.django_db
+class TestCart:
+    """Tests for the cart views."""
+
+    def test_cart_reuses_draft(self, client, user, product):
+        """Test that repeated cart requests use the same draft order."""
+        client.force_login(user)
+
+        client.get(reverse("cart"))
+        client.post(
+            reverse("cart"), {"action": "add", "product_id": product.id, "quantity": 2}
+        )
+        client.post(
+            reverse("cart"), {"action": "add", "product_id": product.id, "quantity": 1}
+        )
+
+        draft = Order.objects.get(user=user, status="DRAFT")
+        assert draft.items.get().quantity == 3
+
+    def test_cart_change_with_stale_version_is_rolled_back(self, client, user, product):
+        """Test that a cart form from an outdated page does not change items."""
+        client.force_login(user)
+        cart = Order.objects.get_cart(user)
+        OrderItem.objects.create(order=cart, product=product, quantity=1)
+        cart.calculate_total()
+
+        response = client.post(
+            reverse("cart"),
+            {"action": "update", "product_id": product.id, "quantity": 5, "version": 0},
+            follow=True,
+        )
+
+        assert "zwischenzeitlich geändert" in response.content.decode()
+        assert cart.items.get().quantity == 1
+
+    def test_cart_change_with_invalid_version(self, client, user, product):
+        """Test that a tampered version is treated like a concurrent change."""
+        client.force_login(user)
+        cart = Order.objects.get_cart(user)
+        OrderItem.objects.create(order=cart, product=product, quantity=1)
+
+        response = client.post(
+            reverse("cart"),
+            {
+                "action": "update",
+                "product_id": product.id,
+                "quantity": 5,
+                "version": "",
+            },
+            follow=True,
+        )
+
+        assert "zwischenzeitlich geändert" in response.content.decode()
+        assert cart.items.get().quantity == 1
+
+    def test_reorder_with_concurrent_cart_change_is_rolled_back(
+        self, client, user, product, monkeypatch
+    ):
+        """Test that reorder adds nothing if the cart changes meanwhile."""
+        previous = Order.objects.create(user=user, status="EXPORTED")
+        OrderItem.objects.create(order=previous, product=product, quantity=2)
+        client.force_login(user)
+        calculate_total = Order.calculate_total
+
+        def concurrent_change(order):
+            # Another request changes the cart after this one loaded it
+            Order.objects.filter(pk=order.pk).update(version=order.version + 1)
+            return calculate_total(order)
+
+        monkeypatch.setattr(Order, "calculate_total", concurrent_change)
+
+        response = client.get(reverse("reorder", args=[previous.id]), follow=True)
+
+        assert "zwischenzeitlich geändert" in response.content.decode()
+        assert not Order.objects.get_cart(user).items.exists()
+
+
+@pytest.mark.django_db
+class TestCheckout:
+    """Tests for the checkout view."""
+
+    def checkout(self, client, user, product):
+        """Fill the cart and place it via the checkout form."""
+        cart = Order.objects.get_cart(user)
+        OrderItem.objects.create(order=cart, product=product, quantity=2)
+        client.force_login(user)
+        response = client.post(
+            reverse("checkout"),
+            {"delivery_type": "PICKUP", "version": cart.version},
+        )
+        assert response.status_code == 302
+        return cart
+
+    def test_checkout_creates_new_cart(self, client, user, product):
+        """Test that an empty cart is created after checkout by default."""
+        cart = self.checkout(client, user, product)
+
+        assert Order.objects.get(pk=cart.pk).status == "PLACED"
+        assert Order.objects.filter(user=user, status="DRAFT").exists()
+
+    def test_checkout_with_invalid_version(self, client, user, product):
+        """Test that a tampered version does not place the order."""
+        cart = Order.objects.get_cart(user)
+        OrderItem.objects.create(order=cart, product=product, quantity=2)
+        client.force_login(user)
+
+        response = client.post(
+            reverse("checkout"), {"delivery_type": "PICKUP", "version": "abc"}
+        )
+
+        assert response.status_code == 302
+        assert response["Location"] == reverse("checkout")
+        assert Order.objects.get(pk=cart.pk).status == "DRAFT"
+
+    def test_checkout_without_placeholder_cart(self, client, user, product, settings):
+        """Test that no placeholder draft is created when disabled."""
+        settings.CREATE_CART_AFTER_CHECKOUT = False
+
+        cart = self.checkout(client, user, product)
+
+        assert Order.objects.get(pk=cart.pk).status == "PLACED"
+        assert not Order.objects.filter(user=user, status="DRAFT").exists()
+
+
+@pytest.mark.django_db
+class TestArchivedOrders:
+    """Tests for the read-only order archive."""
+
+    @pytest.fixture
+    def archived(self, user):
+        """Create an archived order."""
+        from django.utils import timezone
+
+        from bestellungen.models import ArchivedOrder
+
+        return ArchivedOrder.objects.create(
+            id=4711,
+            user=user,
+            status="EXPORTED",
+            delivery_type="PICKUP",
+            total_cents=90,
+            delivery_fee_cents=0,
+            items=[
+                {
+                    "sku": "OLD-1",
+                    "name": "Altes Brot",
+                    "quantity": 2,
+                    "unit_price_cents": 45,
+                }
+            ],
+            created_at=timezone.now(),
+            placed_at=timezone.now(),
+        )
+
+    def test_archive_list_and_detail(self, client, user, archived):
+        """Test that customers can read their archived orders."""
+        client.force_login(user)
+
+        response = client.get(reverse("archived_order_list"))
+        assert response.status_code == 200
+        assert "#4711" in response.content.decode()
+
+        response = client.get(reverse("archived_order_detail", args=[4711]))
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert "Altes Brot" in content
+        assert "0,90€" in content or "0.90€" in content
+
+    def test_order_detail_redirects_to_archive(self, client, user, archived):
+        """Test that links to archived orders keep working."""
+        client.force_login(user)
+
+        response = client.get(reverse("order_detail", args=[4711]))
+
+        assert response.status_code == 302
+        assert response.url == reverse("archived_order_detail", args=[4711])
+
+    def test_archive_of_other_user_is_hidden(self, client, archived):
+        """Test that archived orders are private."""
+        other = CustomUser.objects.create_user(
+            username="other", email="other@example.com", password="x"
+        )
+        client.force_login(other)
+
+        response = client.get(reverse("archived_order_detail", args=[4711]))
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestOrderAdmin:
+    """Tests for the order changelist in the admin."""
+
+    @pytest.fixture
+    def admin_client(self, client):
+        """Return a client logged in as a superuser."""
+        admin = CustomUser.objects.create_superuser(
+            username="admin", email="admin@example.com", password="x"
+        )
+        client.force_login(admin)
+        return client
+
+    @pytest.fixture
+    def orders(self, user, product):
+        """Create placed orders for two customers."""
+        other = CustomUser.objects.create_user(
+            username="other", email="other@example.com", password="x"
+        )
+        orders = []
+        for customer in (user, other, user):
+            order = Order.objects.create(user=customer)
+            OrderItem.objects.create(order=order, product=product, quantity=1)
+            order.place_order()
+            orders.append(order)
+        return orders
+
+    def test_changelist_queries_do_not_grow_per_row(
+        self, admin_client, orders, django_assert_max_num_queries
+    ):
+        """Test that customers are joined instead of loaded per row."""
+        admin_client.get(reverse("admin:bestellungen_order_changelist"))
+        for i in range(20):
+            Order.objects.create(
+                user=CustomUser.objects.create_user(
+                    username=f"row{i}", email=f"row{i}@example.com", password="x"
+                )
+            )
+
+        with django_assert_max_num_queries(12):
+            response = admin_client.get(reverse("admin:bestellungen_order_changelist"))
+
+        assert response.status_code == 200
+        assert response.context["cl"].result_count == 23
+
+    def test_search_by_order_number(self, admin_client, orders):
+        """Test that a number finds exactly that order."""
+        response = admin_client.get(
+            reverse("admin:bestellungen_order_changelist"), {"q": f"#{orders[1].pk}"}
+        )
+
+        assert [order.pk for order in response.context["cl"].result_list] == [
+            orders[1].pk
+        ]
+
+    def test_search_by_customer(self, admin_client, orders):
+        """Test that text still searches the customer."""
+        response = admin_client.get(
+            reverse("admin:bestellungen_order_changelist"), {"q": "other@"}
+        )
+
+        assert [order.pk for order in response.context["cl"].result_list] == [
+            orders[1].pk
+        ]
+
+    def test_status_counts_are_cached(self, admin_client, orders):
+        """Test that the status sidebar shows counts from the cache."""
+        url = reverse("admin:bestellungen_order_changelist")
+
+        first = admin_client.get(url)
+        orders[0].cancel_order()
+        second = admin_client.get(url, {"status": "PLACED"})
+
+        assert "Aufgegeben (3)" in first.content.decode()
+        assert "Aufgegeben (3)" in second.content.decode()
+        assert second.context["cl"].result_count == 2
+
+    def test_status_is_read_only(self, admin_client, orders):
+        """Test that status changes are only possible through the actions."""
+        response = admin_client.get(
+            reverse("admin:bestellungen_order_change", args=[orders[0].pk])
+        )
+
+        assert response.status_code == 200
+        assert "status" not in response.context["adminform"].form.fields
@@ -17,6 +17,12 @@ urlpatterns = [
     path("checkout/", views.checkout_view, name="checkout"),
     path("orders/", views.order_list, name="order_list"),
     path("orders/<int:order_id>/", views.order_detail, name="order_detail"),
+    path("orders/archive/", views.archived_order_list, name="archived_order_list"),
+    path(
+        "orders/archive/<int:order_id>/",
+        views.archived_order_detail,
+        name="archived_order_detail",
+    ),
     path("orders/<int:order_id>/reorder/", views.reorder_view, name="reorder"),
     path("orders/<int:order_id>/cancel/", views.cancel_order_view, name="cancel_order"),
     path(
@@ -2,15 +2,28 @@
 Views for the bestellungen app frontend.
 """
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 
+from .db_router import replica_view
+from .decorators import aget_user, async_login_required
 from .forms import LoginForm, RegistrationForm
-from .models import CustomUser, Order, OrderItem, Product
+from .models import (
+    ArchivedOrder,
+    CustomUser,
+    Order,
+    OrderItem,
+    Product,
+    ProductionCapacity,
+    StaleOrderError,
+)
 
 
 def home(request):
@@ -96,74 +109,109 @@ def verify_email_view(request, token):
     return redirect("home")
 
 
-def product_list(request):
-    """Product list view."""
-    products = Product.objects.filter(available=True).order_by("name")
-    return render(request, "bestellungen/product_list.html", {"products": products})
+@replica_view
+async def product_list(request):
+    """Product list view (async, so slow clients do not block a worker)."""
+    await aget_user(request)
+    delivery_date = Order.next_delivery_date()
+    products = [
+        product
+        async for product in Product.objects.filter(available=True)
+        .annotate(
+            remaining_capacity=ProductionCapacity.remaining_subquery(delivery_date)
+        )
+        .order_by("name")
+    ]
+    return render(
+        request,
+        "bestellungen/product_list.html",
+        {"products": products, "delivery_date": delivery_date},
+    )
 
 
 @login_required
 def cart_view(request):
     """Shopping cart view."""
-    # Get or create draft order for user
-    order, created = Order.objects.get_or_create(user=request.user, status="DRAFT")
+    order = Order.objects.get_cart(request.user)
 
     if request.method == "POST":
         product_id = request.POST.get("product_id")
         quantity = int(request.POST.get("quantity", 1))
         action = request.POST.get("action")
 
-        if action == "add":
-            product = get_object_or_404(Product, id=product_id, available=True)
+        try:
+            # Version the page was rendered with; item changes are rolled
+            # back if the cart was changed in another tab since then
+            order.version = posted_version(request, order)
+            with transaction.atomic():
+                update_cart(request, order, action, product_id, quantity)
+        except StaleOrderError as e:
+            messages.error(request, str(e))
+
+        return redirect("cart")
+
+    return render(request, "bestellungen/cart.html", {"order": order})
+
+
+def posted_version(request, order):
+    """Return the order version the submitted form was rendered with.
+
+    Without the field the loaded version is used; a tampered value is
+    treated like a concurrent change.
+    """
+    try:
+        return int(request.POST.get("version", order.version))
+    except (TypeError, ValueError):
+        raise StaleOrderError()
 
-            if quantity > product.max_per_order:
-                messages.error(
-                    request,
-                    f"Maximale Menge für {product.name} ist {product.max_per_order}.",
-                )
-            else:
-                # Add or update item in cart
-                order_item, created = OrderItem.objects.get_or_create(
-                    order=order,
-                    product=product,
-                    defaults={
-                        "quantity": quantity,
-                        "unit_price_cents": product.price_cents,
-                    },
-                )
-
-                if not created:
-                    order_item.quantity += quantity
-                    if order_item.quantity > product.max_per_order:
-                        order_item.quantity = product.max_per_order
-                    order_item.save()
-
-                order.calculate_total()
-                messages.success(
-                    request, f"{product.name} wurde zum Warenkorb hinzugefügt."
-                )
-
-        elif action == "remove":
-            OrderItem.objects.filter(order=order, product_id=product_id).delete()
-            order.calculate_total()
-            messages.success(request, "Artikel wurde aus dem Warenkorb entfernt.")
 
-        elif action == "update":
-            order_item = get_object_or_404(
-                OrderItem, order=order, product_id=product_id
+def update_cart(request, order, action, product_id, quantity):
+    """Apply a cart form action to the draft ``order``."""
+    if action == "add":
+        product = get_object_or_404(Product, id=product_id, available=True)
+
+        if quantity > product.max_per_order:
+            messages.error(
+                request,
+                f"Maximale Menge für {product.name} ist {product.max_per_order}.",
             )
-            if quantity <= 0:
-                order_item.delete()
-            else:
-                if quantity > order_item.product.max_per_order:
-                    quantity = order_item.product.max_per_order
-                order_item.quantity = quantity
+        else:
+            # Add or update item in cart
+            order_item, created = OrderItem.objects.get_or_create(
+                order=order,
+                product=product,
+                defaults={
+                    "quantity": quantity,
+                    "unit_price_cents": product.price_cents,
+                },
+            )
+
+            if not created:
+                order_item.quantity += quantity
+                if order_item.quantity > product.max_per_order:
+                    order_item.quantity = product.max_per_order
                 order_item.save()
+
             order.calculate_total()
+            messages.success(
+                request, f"{product.name} wurde zum Warenkorb hinzugefügt."
+            )
 
-        return redirect("cart")
+    elif action == "remove":
+        OrderItem.objects.filter(order=order, product_id=product_id).delete()
+        order.calculate_total()
+        messages.success(request, "Artikel wurde aus dem Warenkorb entfernt.")
 
-    return render(request, "bestellungen/cart.html", {"order": order})
+    elif action == "update":
+        order_item = get_object_or_404(OrderItem, order=order, product_id=product_id)
+        if quantity <= 0:
+            order_item.delete()
+        else:
+            if quantity > order_item.product.max_per_order:
+                quantity = order_item.product.max_per_order
+            order_item.quantity = quantity
+            order_item.save()
+        order.calculate_total()
 
 
 @login_required
@@ -180,6 +228,13 @@ def checkout_view(request):
         return redirect("product_list")
 
     if request.method == "POST":
+        # Version the checkout page was rendered with
+        try:
+            order.version = posted_version(request, order)
+        except StaleOrderError as e:
+            messages.error(request, str(e))
+            return redirect("checkout")
+
         # Save delivery information
         order.delivery_type = request.POST.get("delivery_type", "DELIVERY")
 
@@ -210,16 +265,28 @@ def checkout_view(request):
             )
             order.delivery_notes = request.POST.get("delivery_notes", "")
 
-        order.save()
-
         try:
+            order.save_versioned(
+                delivery_type=order.delivery_type,
+                desired_time=order.desired_time,
+                delivery_street=order.delivery_street,
+                delivery_city=order.delivery_city,
+                delivery_postal_code=order.delivery_postal_code,
+                delivery_phone=order.delivery_phone,
+                delivery_notes=order.delivery_notes,
+            )
             order.place_order()
-            # Create new empty cart for user
-            Order.objects.create(user=request.user, status="DRAFT")
+            # Create new empty cart for user; otherwise the cart is created
+            # lazily when the user adds the next product
+            if settings.CREATE_CART_AFTER_CHECKOUT:
+                Order.objects.get_cart(request.user)
             messages.success(
                 request, f"Bestellung #{order.id} wurde erfolgreich aufgegeben!"
             )
             return redirect("order_detail", order_id=order.id)
+        except StaleOrderError as e:
+            messages.error(request, str(e))
+            return redirect("checkout")
         except ValueError as e:
             messages.error(request, str(e))
 
@@ -234,6 +301,7 @@ def checkout_view(request):
 
 
 @login_required
+@replica_view
 def order_list(request):
     """Order history view."""
     orders = (
@@ -245,18 +313,44 @@ def order_list(request):
     return render(request, "bestellungen/order_list.html", {"orders": orders})
 
 
-@login_required
-def order_detail(request, order_id):
-    """Order detail view."""
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+@async_login_required
+@replica_view
+async def order_detail(request, order_id):
+    """Order detail view (async, so slow clients do not block a worker)."""
+    try:
+        order = await (
+            Order.objects.select_related("user")
+            .prefetch_related("items")
+            .aget(id=order_id, user=request.user)
+        )
+    except Order.DoesNotExist:
+        # Old orders live in the archive under the same id
+        if await ArchivedOrder.objects.filter(id=order_id, user=request.user).aexists():
+            return redirect("archived_order_detail", order_id=order_id)
+        raise Http404("Bestellung nicht gefunden.")
     return render(request, "bestellungen/order_detail.html", {"order": order})
 
 
+@login_required
+def archived_order_list(request):
+    """Read-only list of the user's archived orders."""
+    orders = ArchivedOrder.objects.filter(user=request.user).defer("history")
+    return render(request, "bestellungen/archived_order_list.html", {"orders": orders})
+
+
+@login_required
+def archived_order_detail(request, order_id):
+    """Read-only detail of an archived order."""
+    order = get_object_or_404(ArchivedOrder, id=order_id, user=request.user)
+    return render(request, "bestellungen/archived_order_detail.html", {"order": order})
+
+
 @login_required
 def profile_view(request):
     """User profile view."""
     order_count = (
         Order.objects.filter(user=request.user).exclude(status="DRAFT").count()
+        + ArchivedOrder.objects.filter(user=request.user).count()
     )
     return render(
         request,
@@ -289,33 +383,38 @@ def reorder_view(request, order_id):
         messages.error(request, "Diese Bestellung kann nicht wiederholt werden.")
         return redirect("order_list")
 
-    # Get or create draft order (cart)
-    cart, created = Order.objects.get_or_create(user=request.user, status="DRAFT")
+    cart = Order.objects.get_cart(request.user)
 
-    # Copy items from original order to cart
+    # Copy items from original order to cart; if the cart is changed
+    # concurrently, the copied items are rolled back with the totals
     items_added = 0
-    for item in original_order.items.all():
-        if item.product.available:
-            # Check if item already in cart
-            cart_item, created = OrderItem.objects.get_or_create(
-                order=cart,
-                product=item.product,
-                defaults={
-                    "quantity": item.quantity,
-                    "unit_price_cents": item.product.price_cents,
-                },
-            )
+    try:
+        with transaction.atomic():
+            for item in original_order.items.all():
+                if item.product.available:
+                    # Check if item already in cart
+                    cart_item, created = OrderItem.objects.get_or_create(
+                        order=cart,
+                        product=item.product,
+                        defaults={
+                            "quantity": item.quantity,
+                            "unit_price_cents": item.product.price_cents,
+                        },
+                    )
 
-            if not created:
-                # Update quantity if item already exists
-                cart_item.quantity += item.quantity
-                if cart_item.quantity > item.product.max_per_order:
-                    cart_item.quantity = item.product.max_per_order
-                cart_item.save()
+                    if not created:
+                        # Update quantity if item already exists
+                        cart_item.quantity += item.quantity
+                        if cart_item.quantity > item.product.max_per_order:
+                            cart_item.quantity = item.product.max_per_order
+                        cart_item.save()
 
-            items_added += 1
+                    items_added += 1
 
-    cart.calculate_total()
+            cart.calculate_total()
+    except StaleOrderError as e:
+        messages.error(request, str(e))
+        return redirect("cart")
 
     if items_added > 0:
         messages.success(
@@ -344,8 +443,19 @@ def cancel_order_view(request, order_id):
         return redirect("order_detail", order_id=order.id)
 
     if request.method == "POST":
-        order.status = "CANCELLED"
-        order.save(update_fields=["status"])
+        try:
+            order.cancel_order()
+        except StaleOrderError as e:
+            messages.error(request, str(e))
+            return redirect("order_detail", order_id=order.id)
+        except ValueError:
+            # Exported (or cancelled) by someone else since the page was loaded
+            messages.error(
+                request,
+                "Diese Bestellung kann nicht mehr storniert werden. "
+                "Bitte verwenden Sie die Änderungsanfrage.",
+            )
+            return redirect("order_detail", order_id=order.id)
         messages.success(request, f"Bestellung #{order.id} wurde storniert.")
         return redirect("order_list")
 
@@ -398,6 +508,7 @@ def request_change_view(request, order_id):
 
 
 @login_required
+@replica_view
 def costs_view(request):
     """Show cost overview for week and month."""
     from datetime import timedelta
@@ -0,0 +1,82 @@
+"""
+Simple HTTP load test for comparing the WSGI and ASGI deployment profiles.
+
+Requirements:
+- Python 3.x (standard library only)
+
+Usage:
+    python load_test.py http://localhost/products/ --concurrency 50 --requests 2000
+    python load_test.py http://localhost/api/v1/orders/ --token <api-token>
+
+Run it once against `docker-compose up` (WSGI) and once against
+`docker-compose -f docker-compose.yml -f docker-compose.asgi.yml up` (ASGI)
+with the same data and compare throughput and latency percentiles.
+"""
+
+import argparse
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch(url, headers, timeout):
+    """Request ``url`` once and return ``(status, seconds)``."""
+    request = urllib.request.Request(url, headers=headers)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 0
+    return status, time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    """Return the given percentile of sorted ``values``."""
+    index = min(len(values) - 1, int(len(values) * fraction))
+    return values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("url")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--token", help="API token (Authorization: Token ...)")
+    parser.add_argument("--session", help="Session cookie for frontend views")
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    headers = {}
+    if args.token:
+        headers["Authorization"] = f"Token {args.token}"
+    if args.session:
+        headers["Cookie"] = f"sessionid={args.session}"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(
+            pool.map(
+                lambda _: fetch(args.url, headers, args.timeout),
+                range(args.requests),
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds for _, seconds in results)
+    errors = sum(1 for status, _ in results if not 200 <= status < 400)
+
+    print(f"URL:          {args.url}")
+    print(f"Concurrency:  {args.concurrency}")
+    print(f"Requests:     {len(results)} ({errors} errors)")
+    print(f"Throughput:   {len(results) / elapsed:.1f} req/s")
+    for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        print(f"Latency {label}:  {percentile(latencies, fraction) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()